@@ -1 +1,3 @@
-# Database connection and configuration package 
\ No newline at end of file
+# Database connection and configuration package
+from .pool import ConnectionPool, PoolTimeout
+from .executor import AsyncDatabase, DatabaseBusy, QueryTimeout
@@ -0,0 +1,218 @@
+"""
+비동기 API 용 DB 실행기
+
+FastAPI 핸들러는 async def 인데 psycopg2 는 동기 드라이버라서, 핸들러에서 바로 쿼리를 실행하면
+느린 쿼리 하나(/api/dashboard 집계 등)가 이벤트 루프를 막아 다른 요청이 모두 기다립니다.
+쿼리 함수를 전용 스레드 풀에서 실행하고 결과만 await 합니다.
+- 동시 실행 수 제한 (스레드 수 = 동시 실행 수 ≤ 연결 풀 최대 크기), 넘는 요청은 queue_timeout 초까지 대기
+- 큰 결과는 stream() 으로 서버 측 커서에서 묶음 단위로 읽음 (내보내기 API)
+  - 쿼리 자리와 따로 동시 스트림 수 제한 (max_streams), 느린 다운로드가 쿼리 자리를 차지하지 않음
+  - 스트림마다 연결 하나를 다 읽을 때까지 사용하므로 max_concurrency + max_streams ≤ 연결 풀 최대 크기
+- 쿼리 시간 제한은 연결의 statement_timeout (ConnectionPool 연결 옵션) 으로 DB 에서 취소
+- 대기 / 실행 중 / 거절 / 시간 초과 통계 (/api/health 에 표시)
+
+사용 예:
+    database = AsyncDatabase(pool, max_concurrency=8, max_streams=2)
+    rows = await database.run(lambda conn: ...)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import errors
+
+from .pool import PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+# 기본 설정
+MAX_CONCURRENCY = 10     # 동시에 실행할 쿼리 함수 수 (DB 스레드 수)
+MAX_STREAMS = 2          # 동시에 열어 둘 서버 측 커서 스트림 수 (내보내기)
+QUEUE_TIMEOUT = 10.0     # 실행 순서를 기다릴 최대 시간 (초)
+
+
+class DatabaseBusy(Exception):
+    """동시 실행 수를 모두 사용 중이고 대기 시간이 지남 (연결 풀 대기 초과 포함)"""
+
+
+class QueryTimeout(Exception):
+    """statement_timeout 으로 쿼리가 취소됨"""
+
+
+class AsyncDatabase:
+    """연결 풀 + 크기 제한 스레드 풀로 동기 쿼리 함수를 await 가능하게 실행"""
+
+    def __init__(self, pool, max_concurrency: int = MAX_CONCURRENCY, queue_timeout: float = QUEUE_TIMEOUT,
+                 max_streams: int = MAX_STREAMS):
+        self.pool = pool
+        self.max_concurrency = max_concurrency
+        self.max_streams = max_streams
+        self.queue_timeout = queue_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stream_semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'queries': 0,             # 실행한 쿼리 함수 수
+            'running': 0,             # 지금 실행 중
+            'waiting': 0,             # 지금 실행 순서를 기다리는 중
+            'rejected': 0,            # 대기 시간 초과로 거절
+            'timeouts': 0,            # statement_timeout 으로 취소
+            'queue_seconds': 0.0,     # 실행 순서 대기 시간 합계
+            'max_queue_seconds': 0.0,
+            'streams': 0,             # 지금 열려 있는 스트림
+            'streams_rejected': 0,    # 스트림 자리 대기 시간 초과로 거절
+        }
+
+    def start(self):
+        """스레드 풀 / 동시 실행 제한 준비 (이벤트 루프 안에서 호출)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='db')
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._stream_semaphore = asyncio.Semaphore(self.max_streams)
+
+    def shutdown(self):
+        """실행 중인 쿼리가 끝나길 기다린 뒤 스레드 풀 정리"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor, self._semaphore, self._stream_semaphore = None, None, None
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def _call(self, func: Callable, args: tuple):
+        """DB 스레드: 연결을 빌려서 func(conn, *args) 실행"""
+        def call():
+            with self.pool.connection() as conn:
+                return func(conn, *args)
+        return self._translate(call)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """func(conn, *args) 를 DB 스레드에서 실행하고 결과 반환 (이벤트 루프는 막지 않음)"""
+        await self._acquire_slot()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._call, func, args)
+        finally:
+            self._release_slot()
+
+    async def _acquire_slot(self):
+        """동시 실행 자리 하나 얻기 (queue_timeout 초까지 대기, 넘으면 DatabaseBusy)"""
+        self.start()
+        started = time.monotonic()
+
+        self._count('waiting')
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._count('rejected')
+            raise DatabaseBusy(f"DB 실행 대기 시간 초과 ({self.queue_timeout:.1f}초, "
+                               f"동시 실행 {self.max_concurrency}개 사용 중)")
+        finally:
+            self._count('waiting', -1)
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._stats['queries'] += 1
+            self._stats['running'] += 1
+            self._stats['queue_seconds'] += waited
+            self._stats['max_queue_seconds'] = max(self._stats['max_queue_seconds'], waited)
+
+    def _release_slot(self):
+        self._count('running', -1)
+        self._semaphore.release()
+
+    async def _acquire_stream_slot(self):
+        """스트림 자리 하나 얻기 (쿼리 자리와 별도, queue_timeout 초까지 대기, 넘으면 DatabaseBusy)"""
+        self.start()
+        try:
+            await asyncio.wait_for(self._stream_semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._count('streams_rejected')
+            raise DatabaseBusy(f"내보내기 대기 시간 초과 ({self.queue_timeout:.1f}초, "
+                               f"동시 내보내기 {self.max_streams}개 사용 중)")
+        self._count('streams')
+
+    def _release_stream_slot(self):
+        self._count('streams', -1)
+        self._stream_semaphore.release()
+
+    async def stream(self, sql: str, params: Sequence = (), chunk_rows: int = 10000,
+                     name: str = 'export') -> AsyncIterator[List[tuple]]:
+        """
+        서버 측 커서 (DECLARE ... / FETCH chunk_rows) 로 결과를 나눠 읽는 async 제너레이터 (행은 튜플)
+        결과 전체를 메모리에 올리지 않고, 다 읽거나 중단될 때까지 연결 하나와 스트림 자리 하나를 사용
+        (쿼리 자리는 쓰지 않으므로 느린 다운로드가 다른 API 요청을 막지 않음)
+        첫 묶음은 cursor.description 으로 만든 컬럼 이름 목록 (SQL 오류는 첫 묶음을 받을 때 발생)
+        """
+        await self._acquire_stream_slot()
+        loop = asyncio.get_running_loop()
+        conn = cursor = None
+
+        def open_cursor():
+            nonlocal conn, cursor
+            conn = self.pool.acquire()
+            # 이름 있는 커서는 트랜잭션 안에서만 유지됨 (API 연결은 autocommit)
+            conn.autocommit = False
+            cursor = conn.cursor(name=name, cursor_factory=psycopg2.extensions.cursor)
+            cursor.itersize = chunk_rows
+            cursor.execute(sql, params)
+            rows = cursor.fetchmany(chunk_rows)
+            return [column.name for column in cursor.description], rows
+
+        def close_cursor():
+            if conn is None:
+                return
+            try:
+                if cursor is not None and not conn.closed:
+                    cursor.close()
+                if not conn.closed:
+                    conn.rollback()
+                    conn.autocommit = self.pool.autocommit
+            except psycopg2.Error:
+                pass
+            finally:
+                self.pool.release(conn)
+
+        try:
+            names, rows = await loop.run_in_executor(self._executor, self._translate, open_cursor)
+            yield names
+            while rows:
+                yield rows
+                rows = await loop.run_in_executor(self._executor, self._translate, cursor.fetchmany, chunk_rows)
+        finally:
+            try:
+                await asyncio.shield(loop.run_in_executor(self._executor, close_cursor))
+            finally:
+                self._release_stream_slot()
+
+    def _translate(self, func: Callable, *args):
+        """DB 스레드: 풀 대기 초과 / statement_timeout 을 API 예외로 변환"""
+        try:
+            return func(*args)
+        except PoolTimeout as e:
+            raise DatabaseBusy(str(e)) from e
+        except errors.QueryCanceled as e:
+            self._count('timeouts')
+            raise QueryTimeout(str(e).strip()) from e
+
+    def stats(self) -> Dict[str, Any]:
+        """동시 실행 상태 / 누적 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'max_concurrency': self.max_concurrency,
+            'max_streams': self.max_streams,
+            'queue_seconds': round(stats['queue_seconds'], 4),
+            'max_queue_seconds': round(stats['max_queue_seconds'], 4),
+        })
+        return stats
@@ -0,0 +1,247 @@
+"""
+API 서버용 PostgreSQL 연결 풀
+
+요청마다 psycopg2.connect 로 새로 연결하면 (원격 DB 의 경우) TLS 핸드셰이크와 백엔드 프로세스 생성 비용이
+대부분의 쿼리보다 큽니다. 연결을 미리 열어 두고 요청마다 빌려 쓰고 돌려줍니다.
+- 최소 / 최대 연결 수 (최대까지 모두 사용 중이면 timeout 초까지 대기 후 PoolTimeout)
+- 끊어진 연결 확인: 닫힌 연결은 버리고, 오래 쉬던 연결은 빌려주기 전에 SELECT 1 로 확인
+- 대기 시간 / 대기 초과 / 새 연결 / 버린 연결 수 통계 (/api/health 에 표시)
+
+사용 예:
+    pool = ConnectionPool(minconn=1, maxconn=10, host='localhost', database='k_stock_insight')
+    pool.open()
+    with pool.connection() as conn:
+        ...
+    pool.close()
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+# 기본 설정
+POOL_MIN = 1               # 시작할 때 열어 둘 연결 수
+POOL_MAX = 10              # 최대 연결 수
+POOL_TIMEOUT = 10.0        # 연결을 빌릴 때 최대 대기 시간 (초)
+POOL_CHECK_IDLE = 30.0     # 이보다 오래 쉬던 연결은 빌려주기 전에 SELECT 1 로 확인 (초)
+
+
+class PoolTimeout(Exception):
+    """최대 연결 수까지 모두 사용 중이고 대기 시간이 지남"""
+
+
+class ConnectionPool:
+    """스레드 안전 psycopg2 연결 풀 (대기 시간 제한 / 끊어진 연결 확인 / 통계)"""
+
+    def __init__(self, dsn: Optional[str] = None, minconn: int = POOL_MIN, maxconn: int = POOL_MAX,
+                 timeout: float = POOL_TIMEOUT, check_idle: float = POOL_CHECK_IDLE,
+                 autocommit: bool = True, **connect_kwargs):
+        """
+        dsn 또는 connect_kwargs: psycopg2.connect 인자 (cursor_factory 등 포함)
+        autocommit: 조회 전용 API 라서 기본은 트랜잭션 없이 실행 (idle in transaction 방지)
+        """
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"잘못된 풀 크기: min={minconn}, max={maxconn}")
+
+        self.dsn = dsn
+        self.connect_kwargs = connect_kwargs
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.autocommit = autocommit
+
+        self._idle = deque()   # (연결, 돌려받은 시각)
+        self._size = 0         # 열려 있는 연결 수 (사용 중 + 대기 중 + 연결 중)
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._stats = {
+            'acquired': 0,          # 빌려준 횟수
+            'created': 0,           # 새로 연 연결 수
+            'discarded': 0,         # 끊어져서 버린 연결 수
+            'timeouts': 0,          # 대기 시간 초과 횟수
+            'waited': 0,            # 바로 빌리지 못하고 기다린 횟수
+            'wait_seconds': 0.0,    # 대기 시간 합계
+            'max_wait_seconds': 0.0,
+        }
+
+    # ----------------------------
+    # 연결 생성 / 확인
+    # ----------------------------
+
+    def _connect(self):
+        if self.dsn:
+            conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+        else:
+            conn = psycopg2.connect(**self.connect_kwargs)
+        conn.autocommit = self.autocommit
+        return conn
+
+    def _alive(self, conn, idle_since: float) -> bool:
+        """빌려주기 전 연결 상태 확인 (오래 쉬던 연결만 실제 쿼리로 확인)"""
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.check_idle:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def open(self):
+        """최소 연결 수만큼 미리 연결 (실패해도 요청 시 다시 시도)"""
+        with self._cond:
+            self._closed = False
+        for _ in range(self.minconn - self.size):
+            try:
+                conn = self._connect()
+            except psycopg2.Error as e:
+                logger.warning(f"연결 풀 초기 연결 실패: {e}")
+                return
+            with self._cond:
+                self._size += 1
+                self._stats['created'] += 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+        logger.info(f"🔌 연결 풀 준비: {self.size}개 (최대 {self.maxconn}개)")
+
+    # ----------------------------
+    # 빌리기 / 돌려주기
+    # ----------------------------
+
+    def acquire(self, timeout: Optional[float] = None):
+        """연결 빌리기 (최대 timeout 초 대기, 넘으면 PoolTimeout)"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("연결 풀이 닫혔습니다")
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"연결 대기 시간 초과 ({timeout:.1f}초, 최대 {self.maxconn}개 사용 중)")
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+            elif not self._alive(conn, idle_since):
+                logger.warning("끊어진 DB 연결을 풀에서 제거합니다")
+                self._discard(conn)
+                continue
+
+            wait = time.monotonic() - started
+            with self._cond:
+                self._stats['acquired'] += 1
+                self._stats['waited'] += waited
+                self._stats['wait_seconds'] += wait
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], wait)
+            return conn
+
+    def release(self, conn):
+        """연결 돌려주기 (끊어졌거나 정리할 수 없는 연결은 버림)"""
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+
+        if self._closed or conn.closed or \
+                conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """with 블록 동안 연결 빌리기"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    # ----------------------------
+    # 상태
+    # ----------------------------
+
+    @property
+    def size(self) -> int:
+        with self._cond:
+            return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 상태 / 누적 통계"""
+        with self._cond:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            size = self._size
+        stats.update({
+            'min': self.minconn,
+            'max': self.maxconn,
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'wait_seconds': round(stats['wait_seconds'], 4),
+            'max_wait_seconds': round(stats['max_wait_seconds'], 4),
+        })
+        return stats
+
+    def close(self):
+        """대기 중인 연결을 모두 닫기 (사용 중인 연결은 돌려받을 때 닫힘)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
@@ -1,15 +1,33 @@
 # FastAPI main application 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import psycopg2
 from psycopg2.extras import RealDictCursor
+import asyncio
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 from datetime import datetime, date
 import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
+try:
+    from .database import AsyncDatabase, ConnectionPool, DatabaseBusy, QueryTimeout
+    from .services import DataGeneration, ResponseCache, ResponseCacheMiddleware, StockSearchIndex
+    from .services import EXACT, ESTIMATED, estimate_distinct, table_counts
+    from .services import EXPORT_CHUNK_ROWS, EXPORT_FORMATS, EXPORT_ORDER, EXPORT_TABLES, ExportResponse, check_export, \
+        export_writer
+    from .services import FORMAT_ARROW, FORMAT_JSON, arrow_response, columnar_response, fetch_columns, group_columns, \
+        json_response, negotiate_format, to_rows
+except ImportError:  # backend 디렉터리에서 uvicorn main:app 으로 실행한 경우
+    from database import AsyncDatabase, ConnectionPool, DatabaseBusy, QueryTimeout
+    from services import DataGeneration, ResponseCache, ResponseCacheMiddleware, StockSearchIndex
+    from services import EXACT, ESTIMATED, estimate_distinct, table_counts
+    from services import EXPORT_CHUNK_ROWS, EXPORT_FORMATS, EXPORT_ORDER, EXPORT_TABLES, ExportResponse, check_export, \
+        export_writer
+    from services import FORMAT_ARROW, FORMAT_JSON, arrow_response, columnar_response, fetch_columns, group_columns, \
+        json_response, negotiate_format, to_rows
+
 # .env 파일 로드
 load_dotenv()
 
@@ -17,10 +35,24 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작 시 연결 풀 / DB 실행기 준비, 종료 시 정리"""
+    db_pool.open()
+    database.start()
+    try:
+        await load_stock_index()
+    except Exception as e:
+        logger.warning(f"종목 검색 인덱스 준비 실패 (요청 시 다시 시도): {e}")
+    yield
+    database.shutdown()
+    db_pool.close()
+
 app = FastAPI(
     title="K-Stock Insight API",
     description="한국 주식 시장 분석 및 투자자 동향 API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정 - 환경에 따라 다르게 설정
@@ -41,27 +73,34 @@ elif os.getenv('ENVIRONMENT') == 'production':
         "https://k-stock-frontend.onrender.com"
     ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # 데이터베이스 설정
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# 연결 풀 설정 (요청마다 새로 연결하지 않고 미리 열어 둔 연결을 빌려 씀)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))  # 시작할 때 열어 둘 연결 수
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))  # 최대 연결 수
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # 연결을 빌릴 때 최대 대기 시간 (초)
+DB_POOL_CHECK_IDLE = float(os.getenv('DB_POOL_CHECK_IDLE', '30'))  # 이보다 오래 쉬던 연결은 확인 후 사용 (초)
+
+# 쿼리 실행 설정 (동기 psycopg2 쿼리를 이벤트 루프 밖 DB 스레드에서 실행)
+DB_MAX_EXPORTS = int(os.getenv('DB_MAX_EXPORTS', '2'))  # 동시 내보내기 수 (쿼리 실행 자리와 별도, 연결은 풀에서 빌림)
+DB_QUERY_CONNECTIONS = max(1, DB_POOL_MAX - DB_MAX_EXPORTS)  # 내보내기 몫을 뺀 쿼리용 연결 수
+DB_MAX_CONCURRENCY = min(int(os.getenv('DB_MAX_CONCURRENCY', str(DB_QUERY_CONNECTIONS))), DB_QUERY_CONNECTIONS)  # 동시 실행 쿼리 수
+DB_QUEUE_TIMEOUT = float(os.getenv('DB_QUEUE_TIMEOUT', '10'))  # 실행 순서를 기다릴 최대 시간 (초, 넘으면 503)
+DB_STATEMENT_TIMEOUT = float(os.getenv('DB_STATEMENT_TIMEOUT', '30'))  # 쿼리 하나의 최대 실행 시간 (초, 넘으면 504)
+
+POOL_OPTIONS = {
+    'minconn': DB_POOL_MIN,
+    'maxconn': DB_POOL_MAX,
+    'timeout': DB_POOL_TIMEOUT,
+    'check_idle': DB_POOL_CHECK_IDLE,
+    'cursor_factory': RealDictCursor,
+    'options': f'-c statement_timeout={int(DB_STATEMENT_TIMEOUT * 1000)}',
+}
+
 if DATABASE_URL:
     # DATABASE_URL이 있는 경우 이를 사용
-    def get_db_connection():
-        """데이터베이스 연결 생성 (DATABASE_URL 사용)"""
-        try:
-            conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-            return conn
-        except Exception as e:
-            logger.error(f"데이터베이스 연결 실패: {e}")
-            raise HTTPException(status_code=500, detail="데이터베이스 연결 실패")
+    db_pool = ConnectionPool(DATABASE_URL, **POOL_OPTIONS)
 else:
     # 개별 설정 사용
     DB_CONFIG = {
@@ -71,15 +110,94 @@ else:
         'user': os.getenv('DB_USER', 'hhhhp'),
         'password': os.getenv('DB_PASSWORD', '')
     }
+    db_pool = ConnectionPool(**DB_CONFIG, **POOL_OPTIONS)
 
-    def get_db_connection():
-        """데이터베이스 연결 생성"""
-        try:
-            conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
-            return conn
-        except Exception as e:
-            logger.error(f"데이터베이스 연결 실패: {e}")
-            raise HTTPException(status_code=500, detail="데이터베이스 연결 실패")
+database = AsyncDatabase(db_pool, max_concurrency=DB_MAX_CONCURRENCY, queue_timeout=DB_QUEUE_TIMEOUT,
+                         max_streams=DB_MAX_EXPORTS)
+
+async def get_db() -> AsyncDatabase:
+    """DB 실행기 의존성 (핸들러는 await db.run(query) 로 쿼리 함수를 DB 스레드에서 실행)"""
+    return database
+
+# 핸들러의 500 처리에 섞지 않고 전용 상태 코드로 내보낼 예외
+PASSTHROUGH_ERRORS = (HTTPException, DatabaseBusy, QueryTimeout)
+
+@app.exception_handler(DatabaseBusy)
+async def database_busy_handler(request, exc: DatabaseBusy):
+    """동시 실행 / 연결이 모두 사용 중 → 503"""
+    logger.error(f"데이터베이스 대기 시간 초과: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "데이터베이스 대기 시간 초과"})
+
+@app.exception_handler(QueryTimeout)
+async def query_timeout_handler(request, exc: QueryTimeout):
+    """statement_timeout 으로 취소된 쿼리 → 504"""
+    logger.error(f"쿼리 시간 초과 ({request.url.path}): {exc}")
+    return JSONResponse(status_code=504, content={"detail": "쿼리 시간 초과"})
+
+# 응답 캐시 설정 (데이터는 업데이트 스크립트가 실행될 때만 바뀌므로 데이터 세대별로 응답을 재사용)
+API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '512'))  # 저장할 최대 응답 수 (LRU)
+API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '3600'))  # 응답 하나의 유효 시간 (초)
+API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', '60'))  # 브라우저 재사용 시간 (Cache-Control max-age, 초)
+API_CACHE_GENERATION_CHECK = float(os.getenv('API_CACHE_GENERATION_CHECK', '30'))  # 데이터 세대 확인 간격 (초)
+DATA_GENERATION = 'api'  # data_generation 테이블의 세대 이름 (scripts/data_generation.py)
+
+async def load_data_generation() -> str:
+    """데이터 세대 토큰 (마지막 거래일 + 업데이트 스크립트가 올리는 세대 번호)"""
+    def query(conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('data_generation') IS NOT NULL AS exists")
+            row = None
+            if cursor.fetchone()['exists']:
+                cursor.execute("SELECT generation, latest_date FROM data_generation WHERE name = %s",
+                               (DATA_GENERATION,))
+                row = cursor.fetchone()
+            if row is None:
+                # 세대 테이블이 아직 없으면 마지막 거래일만으로 판단
+                cursor.execute("SELECT 0 AS generation, MAX(date) AS latest_date FROM trading_calendar")
+                row = cursor.fetchone()
+        return f"{row['latest_date'] or '-'}.{row['generation']}"
+    
+    return await database.run(query)
+
+response_cache = ResponseCache(max_entries=API_CACHE_MAX_ENTRIES, ttl=API_CACHE_TTL)
+data_generation = DataGeneration(load_data_generation, check_interval=API_CACHE_GENERATION_CHECK)
+stock_count_cache = ResponseCache(max_entries=API_CACHE_MAX_ENTRIES, ttl=API_CACHE_TTL)  # /api/stocks 조건별 종목 수
+
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    generation=data_generation,
+    max_age=API_CACHE_MAX_AGE,
+    exclude=["/api/health", "/api/stocks/suggest"],  # 자동완성은 검색 인덱스가 바로 답하고 입력마다 URL 이 달라 저장하지 않음
+)
+
+# CORS 는 응답 캐시 바깥에서 실행되도록 마지막에 등록 (캐시된 응답 / 304 에도 CORS 헤더 추가)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# 대시보드 순매수 집계 기간 (거래일 수, trading_calendar 기준)
+DASHBOARD_TRADING_DAYS = 5
+DASHBOARD_SNAPSHOT = 'dashboard'  # dashboard_snapshot 테이블의 스냅샷 이름
+DASHBOARD_TOP_N = 10  # 대시보드 목록별 종목 수 (scripts/dashboard_snapshot.py 의 TOP_N 과 동일)
+
+# /api/prices/batch 설정
+BATCH_MAX_TICKERS = 500  # 한 번에 조회할 최대 종목 수
+BATCH_DEFAULT_TRADING_DAYS = 100  # 시작일이 없을 때 최근 N 거래일 (종목별 시세 API 기본 limit 과 동일)
+BATCH_FALLBACK_CALENDAR_DAYS = 150  # 거래일 달력이 비어 있을 때 대신 쓰는 최근 N 달력일 (약 100 거래일)
+
+# /api/export 설정
+EXPORT_FETCH_ROWS = int(os.getenv("EXPORT_FETCH_ROWS", str(EXPORT_CHUNK_ROWS)))  # 서버 측 커서에서 한 번에 읽을 행 수
+
+# /api/sectors 응답 컬럼 (등락률 / 수익률은 %)
+SECTOR_COLUMNS = """
+    sector_code, sector_name, date, open, high, low, close, volume,
+    prev_close, change, change_rate, return_5d, return_20d
+"""
 
 @app.get("/")
 async def root():
@@ -93,15 +211,20 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     """헬스 체크 엔드포인트"""
+    def query(conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        conn.close()
+        await database.run(query)
         
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": db_pool.stats(),
+            "executor": database.stats(),
+            "cache": {**response_cache.stats(), "generation": data_generation.token},
+            "search_index": stock_index.stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -110,127 +233,235 @@ async def health_check():
             content={
                 "status": "unhealthy", 
                 "error": str(e),
+                "pool": db_pool.stats(),
+                "executor": database.stats(),
                 "timestamp": datetime.now().isoformat()
             }
         )
 
 @app.get("/api/stats")
-async def get_database_stats():
-    """데이터베이스 통계 정보"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # 각 테이블별 레코드 수 조회
+async def get_database_stats(estimated: bool = False, db: AsyncDatabase = Depends(get_db)):
+    """
+    데이터베이스 통계 정보 (수집 / 업데이트 때 계산한 table_stats, 없으면 플래너 추정치)
+    accuracy: 값마다 exact / estimated, estimated=true 면 저장된 통계 없이 추정치만 사용
+    """
+    def query(conn):
+        counts = table_counts(conn, use_counters=not estimated)
+        
+        # 각 테이블별 레코드 수
         stats = {}
+        accuracy = {}
         
         tables = ['stocks', 'daily_prices', 'sector_prices', 'investor_trends']
         for table in tables:
-            cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
-            result = cursor.fetchone()
-            stats[table] = result['count']
-        
-        # 추가 통계
-        cursor.execute("SELECT COUNT(DISTINCT ticker) as unique_stocks FROM daily_prices")
-        stats['unique_stocks_with_prices'] = cursor.fetchone()['unique_stocks']
+            count = counts.get(table, {'rows': 0, 'accuracy': ESTIMATED})
+            stats[table] = count['rows']
+            accuracy[table] = count['accuracy']
+        
+        # 추가 통계 (저장된 통계가 없으면 pg_stats 추정치 / 날짜 인덱스 양 끝)
+        prices = counts.get('daily_prices', {}).get('stats')
+        if prices:
+            stats['unique_stocks_with_prices'] = prices['distinct_tickers']
+            accuracy['unique_stocks_with_prices'] = EXACT
+            min_date, max_date = prices['min_date'], prices['max_date']
+        else:
+            stats['unique_stocks_with_prices'] = estimate_distinct(conn, 'daily_prices', 'ticker', stats['daily_prices'])
+            accuracy['unique_stocks_with_prices'] = ESTIMATED
+            
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(date) as min_date, MAX(date) as max_date FROM daily_prices")
+            date_range = cursor.fetchone()
+            min_date, max_date = date_range['min_date'], date_range['max_date']
         
-        cursor.execute("SELECT MIN(date) as min_date, MAX(date) as max_date FROM daily_prices")
-        date_range = cursor.fetchone()
         stats['date_range'] = {
-            'start': date_range['min_date'].isoformat() if date_range['min_date'] else None,
-            'end': date_range['max_date'].isoformat() if date_range['max_date'] else None
+            'start': min_date.isoformat() if min_date else None,
+            'end': max_date.isoformat() if max_date else None
         }
+        accuracy['date_range'] = EXACT
         
-        conn.close()
+        stats['accuracy'] = accuracy
+        stats['counted_at'] = prices['updated_at'].isoformat(timespec='seconds') if prices else None
         return stats
-        
+    
+    try:
+        return await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"통계 조회 실패: {str(e)}")
 
+# 종목 검색 인덱스 (종목코드 / 종목명 / 초성, 데이터 세대가 바뀌면 다시 읽음)
+stock_index = StockSearchIndex()
+stock_index_lock = asyncio.Lock()
+
+async def load_stock_index():
+    """검색 인덱스를 현재 데이터 세대로 준비 (세대 확인에 실패하면 이전 인덱스를 그대로 사용)"""
+    token = await data_generation.current()
+    if stock_index.loaded_at is not None and (token is None or token == stock_index.token):
+        return
+    
+    def query(conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ticker, name, market, delisted_date IS NOT NULL AS delisted
+            FROM stocks
+        """)
+        return [(row['ticker'], row['name'], row['market'], row['delisted']) for row in cursor.fetchall()]
+    
+    async with stock_index_lock:
+        if stock_index.loaded_at is None or token != stock_index.token:
+            stock_index.load(await database.run(query), token)
+            logger.info(f"🔎 종목 검색 인덱스 {len(stock_index):,}개 종목 (데이터 세대 {token})")
+
+def stock_filters(market: Optional[str], search: Optional[str], tickers: Optional[List[str]] = None):
+    """종목 목록 / 종목 수 조회 공통 조건 (stocks 별칭 s, tickers: 검색 인덱스에서 찾은 종목코드)"""
+    conditions = ""
+    params = []
+    
+    # 시장 필터
+    if market:
+        conditions += " AND s.market = %s"
+        params.append(market)
+    
+    # 검색 필터 (검색 인덱스를 쓸 수 없을 때만 ILIKE)
+    if tickers is not None:
+        conditions += " AND s.ticker = ANY(%s)"
+        params.append(tickers)
+    elif search:
+        conditions += " AND (s.name ILIKE %s OR s.ticker ILIKE %s)"
+        params.extend([f"%{search}%", f"%{search}%"])
+    
+    return conditions, params
+
+async def search_tickers(market: Optional[str], search: Optional[str]) -> Optional[List[str]]:
+    """검색어와 일치하는 종목코드 (검색어가 없거나 인덱스를 쓸 수 없으면 None)"""
+    if not search:
+        return None
+    try:
+        await load_stock_index()
+    except PASSTHROUGH_ERRORS:
+        raise
+    except Exception as e:
+        logger.warning(f"종목 검색 인덱스를 쓸 수 없어 ILIKE 로 검색합니다: {e}")
+        return None
+    return stock_index.tickers(search, market)
+
+async def count_stocks(db: AsyncDatabase, market: Optional[str], search: Optional[str],
+                       tickers: Optional[List[str]] = None) -> int:
+    """조건별 종목 수 (데이터 세대별 캐시, 페이지를 넘길 때마다 COUNT(*) 를 다시 실행하지 않음)"""
+    if tickers is not None:
+        return len(tickers)
+    
+    token = await data_generation.current()
+    key = (token, market or '', (search or '').lower())
+    if token is not None and (total := stock_count_cache.get(key)) is not None:
+        return total
+    
+    def query(conn):
+        conditions, params = stock_filters(market, search)
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) as total FROM stocks s WHERE 1=1{conditions}", params)
+        return cursor.fetchone()['total']
+    
+    total = await db.run(query)
+    if token is not None:
+        stock_count_cache.set(key, total)
+    return total
+
 @app.get("/api/stocks")
 async def get_stocks(
     limit: int = 100,
     offset: int = 0,
+    after: Optional[str] = Query(None, alias="cursor"),
     market: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncDatabase = Depends(get_db)
 ):
-    """종목 목록 조회"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """종목 목록 조회 (cursor: 이전 응답의 next_cursor, 종목코드 기준 키셋 페이지네이션 / 없으면 offset)"""
+    tickers = await search_tickers(market, search)
     
-    try:
-        # 기본 쿼리 - sectors 테이블과 JOIN
-        query = """
-            SELECT s.ticker, s.name, s.market, sec.sector_name
-            FROM stocks s 
-            LEFT JOIN sectors sec ON s.ticker = sec.ticker
-            WHERE 1=1
-        """
-        params = []
-        
-        # 시장 필터
-        if market:
-            query += " AND s.market = %s"
-            params.append(market)
-        
-        # 검색 필터
-        if search:
-            query += " AND (s.name ILIKE %s OR s.ticker ILIKE %s)"
-            params.extend([f"%{search}%", f"%{search}%"])
-        
-        # 정렬 및 페이징
-        query += " ORDER BY s.ticker LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+    def query(conn):
+        cursor = conn.cursor()
+        conditions, params = stock_filters(market, search, tickers)
         
-        cursor.execute(query, params)
-        stocks = cursor.fetchall()
+        # 키셋 페이지네이션: 종목코드 기본키 인덱스로 cursor 다음 종목부터 바로 읽음
+        if after:
+            conditions += " AND s.ticker > %s"
+            params.append(after)
         
-        # 전체 개수 조회
-        count_query = """
-            SELECT COUNT(*) as total 
+        # 업종은 종목당 하나만 (여러 업종에 속해도 종목은 한 행, 종목코드가 페이지 경계로 유일)
+        query = f"""
+            SELECT s.ticker, s.name, s.market, sec.sector_name
             FROM stocks s 
-            LEFT JOIN sectors sec ON s.ticker = sec.ticker
-            WHERE 1=1
+            LEFT JOIN LATERAL (
+                SELECT sector_name FROM sectors
+                WHERE ticker = s.ticker
+                ORDER BY sector_code
+                LIMIT 1
+            ) sec ON TRUE
+            WHERE 1=1{conditions}
+            ORDER BY s.ticker
+            LIMIT %s
         """
-        count_params = []
+        # 다음 페이지가 있는지 확인하려고 한 행 더 조회
+        params.append(limit + 1)
+        if not after and offset:
+            query += " OFFSET %s"
+            params.append(offset)
         
-        if market:
-            count_query += " AND s.market = %s"
-            count_params.append(market)
-            
-        if search:
-            count_query += " AND (s.name ILIKE %s OR s.ticker ILIKE %s)"
-            count_params.extend([f"%{search}%", f"%{search}%"])
-        
-        cursor.execute(count_query, count_params)
-        total = cursor.fetchone()['total']
-        
-        conn.close()
+        cursor.execute(query, params)
+        stocks = [dict(stock) for stock in cursor.fetchall()]
+        has_more = len(stocks) > limit
+        return stocks[:limit], has_more
+    
+    try:
+        stocks, has_more = await db.run(query)
+        total = await count_stocks(db, market, search, tickers) if include_total else None
         
         return {
-            "stocks": [dict(stock) for stock in stocks],
+            "stocks": stocks,
             "total": total,
             "limit": limit,
-            "offset": offset
+            "offset": None if after else offset,
+            "next_cursor": stocks[-1]['ticker'] if has_more and stocks else None
         }
-        
+    except PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"종목 조회 실패: {str(e)}")
 
+@app.get("/api/stocks/suggest")
+async def suggest_stocks(q: str = "", market: Optional[str] = None, limit: int = Query(10, ge=1, le=50)):
+    """종목 자동완성 (종목코드 / 종목명 접두어·부분 문자열·초성, 메모리 검색 인덱스만 사용)"""
+    try:
+        await load_stock_index()
+    except PASSTHROUGH_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"종목 검색 인덱스 준비 실패: {str(e)}")
+    
+    return {
+        "query": q,
+        "suggestions": stock_index.search(q, market, limit)
+    }
+
 @app.get("/api/stocks/{ticker}")
-async def get_stock_detail(ticker: str):
+async def get_stock_detail(ticker: str, db: AsyncDatabase = Depends(get_db)):
     """특정 종목 상세 정보"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
+    def query(conn):
+        cursor = conn.cursor()
+        
         # 종목 기본 정보 - sectors 테이블과 JOIN
         cursor.execute("""
             SELECT s.ticker, s.name, s.market, s.listed_date, sec.sector_name
             FROM stocks s 
-            LEFT JOIN sectors sec ON s.ticker = sec.ticker
+            LEFT JOIN LATERAL (
+                SELECT sector_name FROM sectors
+                WHERE ticker = s.ticker
+                ORDER BY sector_code
+                LIMIT 1
+            ) sec ON TRUE
             WHERE s.ticker = %s
         """, (ticker,))
         
@@ -260,19 +491,17 @@ async def get_stock_detail(ticker: str):
         
         investor_trends = cursor.fetchall()
         
-        conn.close()
-        
         return {
             "stock": dict(stock),
             "recent_prices": [dict(price) for price in recent_prices],
             "investor_trends": [dict(trend) for trend in investor_trends]
         }
-        
-    except HTTPException:
-        conn.close()
+    
+    try:
+        return await db.run(query)
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"종목 상세 조회 실패: {str(e)}")
 
 @app.get("/api/stocks/{ticker}/prices")
@@ -280,13 +509,15 @@ async def get_stock_prices(
     ticker: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: AsyncDatabase = Depends(get_db)
 ):
-    """종목별 주가 데이터"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """종목별 주가 데이터 (format: json / columns / arrow, Accept 헤더로도 지정)"""
+    fmt = negotiate_format(format, accept)
     
-    try:
+    def query(conn):
         query = """
             SELECT date, open, high, low, close, volume
             FROM daily_prices 
@@ -305,31 +536,126 @@ async def get_stock_prices(
         query += " ORDER BY date DESC LIMIT %s"
         params.append(limit)
         
-        cursor.execute(query, params)
-        prices = cursor.fetchall()
-        
-        conn.close()
-        
+        return fetch_columns(conn, query, params)
+    
+    try:
+        names, columns = await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"주가 데이터 조회 실패: {str(e)}")
+    
+    if fmt == FORMAT_JSON:
         return {
             "ticker": ticker,
-            "prices": [dict(price) for price in prices]
+            "prices": to_rows(names, columns)
         }
+    return columnar_response(fmt, {"ticker": ticker}, "prices", names, columns)
+
+@app.get("/api/prices/batch")
+async def get_prices_batch(
+    tickers: Optional[str] = None,
+    sector_code: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    여러 종목 주가 데이터 한 번에 조회 (쿼리 1회)
+    tickers: 쉼표로 구분한 종목코드, sector_code: 업종 구성 종목 (둘 다 주면 합침), 최대 BATCH_MAX_TICKERS 개
+    응답: 종목별 컬럼 배열 (날짜 오름차순), format=arrow 면 ticker 컬럼이 있는 평평한 Arrow 테이블
+    """
+    fmt = negotiate_format(format, accept)
+    requested = list(dict.fromkeys(t.strip() for t in (tickers or '').split(',') if t.strip()))
+    if not requested and not sector_code:
+        raise HTTPException(status_code=400, detail="tickers 또는 sector_code 가 필요합니다")
+    if len(requested) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"종목은 한 번에 최대 {BATCH_MAX_TICKERS}개까지 조회할 수 있습니다")
+    
+    def query(conn):
+        cursor = conn.cursor()
+        symbols = list(requested)
+        
+        # 업종 구성 종목 추가
+        if sector_code:
+            cursor.execute("SELECT ticker FROM sectors WHERE sector_code = %s AND ticker IS NOT NULL ORDER BY ticker",
+                           (sector_code,))
+            symbols.extend(row['ticker'] for row in cursor.fetchall() if row['ticker'] not in symbols)
+        if len(symbols) > BATCH_MAX_TICKERS:
+            raise HTTPException(status_code=400, detail=f"종목은 한 번에 최대 {BATCH_MAX_TICKERS}개까지 조회할 수 있습니다")
+        
+        # 시작일이 없으면 최근 N 거래일 (거래일 달력이 비어 있으면 최근 N 달력일)
+        start = start_date
+        if not start:
+            cursor.execute("""
+                SELECT COALESCE(MIN(date), COALESCE(%s::date, CURRENT_DATE) - %s) AS start FROM (
+                    SELECT date FROM trading_calendar
+                    WHERE %s::date IS NULL OR date <= %s::date
+                    ORDER BY date DESC
+                    LIMIT %s
+                ) recent
+            """, (end_date, BATCH_FALLBACK_CALENDAR_DAYS, end_date, end_date, BATCH_DEFAULT_TRADING_DAYS))
+            start = cursor.fetchone()['start']
+        
+        # 종목코드 목록 전체를 한 번에 (ticker, date) 기본키 범위 조회
+        query = """
+            SELECT ticker, date, open, high, low, close, volume
+            FROM daily_prices
+            WHERE ticker = ANY(%s)
+        """
+        params = [symbols]
         
+        if start:
+            query += " AND date >= %s"
+            params.append(start)
+        
+        if end_date:
+            query += " AND date <= %s"
+            params.append(end_date)
+        
+        query += " ORDER BY ticker, date"
+        
+        names, columns = fetch_columns(conn, query, params)
+        return symbols, start, names, columns
+    
+    try:
+        symbols, start, names, columns = await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        conn.close()
-        raise HTTPException(status_code=500, detail=f"주가 데이터 조회 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"여러 종목 주가 데이터 조회 실패: {str(e)}")
+    
+    meta = {
+        "start_date": start.isoformat() if isinstance(start, date) else start,
+        "end_date": end_date
+    }
+    if fmt == FORMAT_ARROW:
+        return arrow_response({**meta, "series": "prices", "tickers": ",".join(symbols)}, names, columns)
+    
+    series = group_columns(names, columns, "ticker")
+    return json_response({
+        **meta,
+        "tickers": symbols,
+        "columns": [name for name in names if name != "ticker"],
+        "series": series,
+        "missing": [ticker for ticker in symbols if ticker not in series]
+    })
 
 @app.get("/api/stocks/{ticker}/investor-trends")
 async def get_stock_investor_trends(
     ticker: str,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: AsyncDatabase = Depends(get_db)
 ):
-    """종목별 투자자 동향 데이터"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """종목별 투자자 동향 데이터 (format: json / columns / arrow, Accept 헤더로도 지정)"""
+    fmt = negotiate_format(format, accept)
     
-    try:
+    def query(conn):
         query = """
             SELECT date, investor_type, buy_value, sell_value, net_value
             FROM investor_trends 
@@ -347,67 +673,137 @@ async def get_stock_investor_trends(
         
         query += " ORDER BY date DESC, investor_type"
         
-        cursor.execute(query, params)
-        trends = cursor.fetchall()
-        
-        conn.close()
-        
+        return fetch_columns(conn, query, params)
+    
+    try:
+        names, columns = await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"투자자 동향 조회 실패: {str(e)}")
+    
+    if fmt == FORMAT_JSON:
         return {
             "ticker": ticker,
-            "investor_trends": [dict(trend) for trend in trends]
+            "investor_trends": to_rows(names, columns)
         }
-        
-    except Exception as e:
-        conn.close()
-        raise HTTPException(status_code=500, detail=f"투자자 동향 조회 실패: {str(e)}")
+    return columnar_response(fmt, {"ticker": ticker}, "investor_trends", names, columns)
 
-@app.get("/api/sectors")
-async def get_sectors():
-    """섹터 목록 및 최신 가격"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@app.get("/api/export/{table}")
+async def export_table(
+    table: str,
+    format: str = "csv",
+    tickers: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    주가 / 투자자 동향 대량 내보내기 (format: csv / ndjson / parquet)
+    table: daily_prices / investor_trends, tickers: 쉼표로 구분한 종목코드 (없으면 전체 종목)
+    서버 측 커서에서 EXPORT_FETCH_ROWS 행씩 읽어 바로 내보내므로 기간 / 종목 수와 상관없이 메모리 사용량이 일정함
+    """
+    check_export(table, format)
+    columns = list(EXPORT_TABLES[table])
+    requested = list(dict.fromkeys(t.strip() for t in (tickers or '').split(',') if t.strip()))
+    
+    query = f"SELECT {', '.join(columns)} FROM {table} WHERE TRUE"
+    params = []
+    
+    if requested:
+        query += " AND ticker = ANY(%s)"
+        params.append(requested)
+    
+    if start_date:
+        query += " AND date >= %s"
+        params.append(start_date)
+    
+    if end_date:
+        query += " AND date <= %s"
+        params.append(end_date)
     
+    query += f" ORDER BY {EXPORT_ORDER[table]}"
+    
+    # 첫 묶음 (컬럼 이름) 까지는 응답 전에 받아서 SQL 오류 / 대기 초과를 일반 오류 응답으로 돌려줌
+    chunks = db.stream(query, params, chunk_rows=EXPORT_FETCH_ROWS, name=f"export_{table}")
     try:
-        cursor.execute("""
-            SELECT DISTINCT sector_code, sector_name
-            FROM sector_prices 
+        names = await chunks.__anext__()
+    except PASSTHROUGH_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"데이터 내보내기 실패: {str(e)}")
+    
+    async def body():
+        rows_sent = 0
+        try:
+            writer = export_writer(format, names, table)
+            yield writer.header()
+            async for rows in chunks:
+                yield writer.write(rows)
+                rows_sent += len(rows)
+            yield writer.close()
+            logger.info(f"📤 {table} 내보내기 완료: {rows_sent:,}행 ({format})")
+        except Exception as e:
+            # 응답이 이미 시작되어 상태 코드를 바꿀 수 없으므로 기록만 하고 연결을 끊음 (파일이 잘림)
+            logger.error(f"❌ {table} 내보내기 중단 ({rows_sent:,}행 전송 후): {e}")
+            raise
+        finally:
+            await chunks.aclose()
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    # 응답이 시작되기 전에 클라이언트가 끊으면 body() 가 실행되지 않으므로 응답이 끝날 때 한 번 더 닫음 (이미 닫혔으면 무시)
+    return ExportResponse(body(), on_close=chunks.aclose, media_type=media_type,
+                          headers={"Content-Disposition": f'attachment; filename="{filename}"',
+                                   "Cache-Control": "no-store"})
+
+@app.get("/api/sectors")
+async def get_sectors(db: AsyncDatabase = Depends(get_db)):
+    """섹터 목록 및 최신 가격 (전일 대비, 5/20거래일 수익률 포함)"""
+    def query(conn):
+        cursor = conn.cursor()
+        
+        # 업데이트 스크립트가 미리 계산해 둔 요약 테이블 (scripts/sector_latest.py)
+        cursor.execute(f"""
+            SELECT {SECTOR_COLUMNS}
+            FROM sector_latest
             ORDER BY sector_name
         """)
+        sector_latest = cursor.fetchall()
         
-        sectors = cursor.fetchall()
-        
-        # 각 섹터의 최신 가격 정보
-        sector_latest = []
-        for sector in sectors:
-            cursor.execute("""
-                SELECT sector_code, sector_name, date, close, volume
-                FROM sector_prices 
-                WHERE sector_code = %s 
-                ORDER BY date DESC 
-                LIMIT 1
-            """, (sector['sector_code'],))
-            
-            latest = cursor.fetchone()
-            if latest:
-                sector_latest.append(dict(latest))
-        
-        conn.close()
+        # 아직 요약 테이블이 채워지지 않았으면 같은 계산을 뷰에서 한 번에 조회
+        if not sector_latest:
+            cursor.execute(f"""
+                SELECT {SECTOR_COLUMNS}
+                FROM sector_latest_view
+                ORDER BY sector_name
+            """)
+            sector_latest = cursor.fetchall()
         
         return {
-            "sectors": sector_latest
+            "sectors": [dict(sector) for sector in sector_latest]
         }
-        
+    
+    try:
+        return await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"섹터 데이터 조회 실패: {str(e)}")
 
 @app.get("/api/dashboard")
-async def get_dashboard_data():
-    """대시보드용 요약 데이터"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
+async def get_dashboard_data(db: AsyncDatabase = Depends(get_db)):
+    """대시보드용 요약 데이터 (업데이트 스크립트가 저장한 스냅샷, 없으면 직접 계산)"""
+    def query(conn):
+        cursor = conn.cursor()
+        
+        # 데이터 업데이트 후 미리 계산된 스냅샷 (scripts/dashboard_snapshot.py)
+        cursor.execute("SELECT payload FROM dashboard_snapshot WHERE name = %s", (DASHBOARD_SNAPSHOT,))
+        snapshot = cursor.fetchone()
+        if snapshot:
+            return snapshot['payload']
+        
+        # 스냅샷이 없으면 같은 구조로 직접 계산 (scripts/dashboard_snapshot.py 의 build_dashboard_snapshot 과 동일)
         dashboard_data = {}
         
         # 주요 통계
@@ -421,77 +817,85 @@ async def get_dashboard_data():
         dashboard_data['market_stats'] = dict(cursor.fetchone())
         
         # 최근 활발한 종목 (거래량 기준)
+        cursor.execute("SELECT MAX(date) AS latest FROM daily_prices")
+        latest = cursor.fetchone()['latest']
         cursor.execute("""
             SELECT s.ticker, s.name, dp.close, dp.volume, dp.date
             FROM daily_prices dp
             JOIN stocks s ON dp.ticker = s.ticker
-            WHERE dp.date = (SELECT MAX(date) FROM daily_prices)
+            WHERE dp.date = %s
             ORDER BY dp.volume DESC
-            LIMIT 10
-        """)
+            LIMIT %s
+        """, (latest, DASHBOARD_TOP_N))
         dashboard_data['top_volume_stocks'] = [dict(row) for row in cursor.fetchall()]
         
-        # 투자자별 순매수 상위 종목
+        # 최근 N 거래일 순매수 상위 (투자자 유형별 top N, 전체 top N 은 그 안에 모두 포함됨)
         cursor.execute("""
-            SELECT 
-                it.ticker, 
-                s.name,
-                it.investor_type,
-                SUM(it.net_value) as total_net_value
-            FROM investor_trends it
-            JOIN stocks s ON it.ticker = s.ticker
-            WHERE it.date >= (SELECT MAX(date) - INTERVAL '7 days' FROM investor_trends)
-            GROUP BY it.ticker, s.name, it.investor_type
-            HAVING SUM(it.net_value) > 0
-            ORDER BY total_net_value DESC
-            LIMIT 10
-        """)
-        dashboard_data['top_net_purchases'] = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
+            WITH period AS (
+                SELECT COALESCE(
+                    -- 최근 N 거래일의 첫날 (거래일 달력이 비어 있으면 최근 7일)
+                    (SELECT MIN(date) FROM (
+                        SELECT date FROM trading_calendar
+                        WHERE date <= (SELECT MAX(date) FROM investor_trends)
+                        ORDER BY date DESC
+                        LIMIT %s
+                    ) recent),
+                    (SELECT MAX(date) - 7 FROM investor_trends)
+                ) AS start_date
+            ), totals AS (
+                SELECT ticker, investor_type, SUM(net_value)::bigint AS total_net_value
+                FROM investor_trends
+                WHERE date >= (SELECT start_date FROM period)
+                GROUP BY ticker, investor_type
+                HAVING SUM(net_value) > 0
+            ), ranked AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY investor_type ORDER BY total_net_value DESC) AS rn
+                FROM totals
+            )
+            SELECT r.ticker, s.name, r.investor_type, r.total_net_value
+            FROM ranked r
+            JOIN stocks s ON r.ticker = s.ticker
+            WHERE r.rn <= %s
+            ORDER BY r.total_net_value DESC
+        """, (DASHBOARD_TRADING_DAYS, DASHBOARD_TOP_N))
+        purchases = [dict(row) for row in cursor.fetchall()]
+        
+        by_investor = {}
+        for row in purchases:
+            by_investor.setdefault(row['investor_type'], []).append(row)
+        
+        dashboard_data['top_net_purchases'] = purchases[:DASHBOARD_TOP_N]
+        dashboard_data['top_net_purchases_by_investor'] = by_investor
+        dashboard_data['as_of'] = latest.isoformat() if latest else None
+        dashboard_data['generated_at'] = datetime.now().isoformat(timespec='seconds')
         
         return dashboard_data
-        
+    
+    try:
+        return await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"대시보드 데이터 조회 실패: {str(e)}")
 
 @app.get("/api/db-info")
-async def get_db_info():
-    """데이터베이스 테이블 정보 확인"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # 현재 데이터베이스의 모든 테이블 목록 조회
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public'
-            ORDER BY table_name
-        """)
-        tables = [row['table_name'] for row in cursor.fetchall()]
-        
-        # 각 테이블의 레코드 수 조회 (테이블이 존재하는 경우만)
-        table_counts = {}
-        for table in tables:
-            try:
-                cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
-                result = cursor.fetchone()
-                table_counts[table] = result['count']
-            except Exception as e:
-                table_counts[table] = f"Error: {str(e)}"
-        
-        conn.close()
+async def get_db_info(estimated: bool = False, db: AsyncDatabase = Depends(get_db)):
+    """데이터베이스 테이블 정보 확인 (행 수는 table_stats, 없으면 플래너 추정치)"""
+    def query(conn):
+        counts = table_counts(conn, use_counters=not estimated)
         
         return {
-            "tables": tables,
-            "table_counts": table_counts,
+            "tables": list(counts),
+            "table_counts": {table: count['rows'] for table, count in counts.items()},
+            "count_accuracy": {table: count['accuracy'] for table, count in counts.items()},
             "database_name": os.getenv('DB_NAME', 'Unknown')
         }
-        
+    
+    try:
+        return await db.run(query)
+    except PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"DB 정보 조회 실패: {str(e)}")
 
 if __name__ == "__main__":
@@ -1 +1,11 @@
-# Business logic services package 
\ No newline at end of file
+# Business logic services package 
+from .response_cache import DataGeneration, ResponseCache, ResponseCacheMiddleware
+from .search_index import StockSearchIndex
+from .table_stats import table_counts, estimate_distinct, EXACT, ESTIMATED
+from .export import (
+    EXPORT_CHUNK_ROWS, EXPORT_FORMATS, EXPORT_ORDER, EXPORT_TABLES, ExportResponse, check_export, export_writer,
+)
+from .columnar import (
+    FORMAT_ARROW, FORMAT_JSON, arrow_response, columnar_response, fetch_columns, group_columns, json_response,
+    negotiate_format, to_rows,
+)
@@ -0,0 +1,134 @@
+"""
+컬럼형 응답 (시계열 API)
+
+/api/stocks/{ticker}/prices, /investor-trends 는 행마다 RealDictCursor dict 를 만들고 다시 JSON 으로 바꾸는데,
+몇 년치 시계열이면 요청 시간과 응답 크기 대부분이 여기서 나옵니다.
+튜플 커서로 읽어서 컬럼별 배열로 묶고, 요청한 형식으로 바로 직렬화합니다.
+- json: 기존 형식 (행마다 객체)
+- columns: 컬럼별 병렬 배열 JSON {"columns": [...], "data": {"date": [...], "close": [...]}}
+- arrow: Apache Arrow IPC 스트림 (pyarrow 가 설치된 경우, 차트 / pandas·polars 에서 바로 읽음)
+형식은 ?format= 또는 Accept 헤더로 지정 (?format= 우선)
+"""
+
+import json
+from datetime import date
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psycopg2.extensions
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow 형식만 사용할 수 없음
+    pa = None
+
+# 응답 형식
+FORMAT_JSON = 'json'
+FORMAT_COLUMNS = 'columns'
+FORMAT_ARROW = 'arrow'
+FORMATS = (FORMAT_JSON, FORMAT_COLUMNS, FORMAT_ARROW)
+
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+COLUMNS_MEDIA_TYPE = 'application/vnd.kstock.columns+json'
+
+
+def negotiate_format(format: Optional[str], accept: Optional[str]) -> str:
+    """?format= 또는 Accept 헤더로 응답 형식 결정 (둘 다 없으면 json)"""
+    if format:
+        if format not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 형식: {format} (json / columns / arrow)")
+        chosen = format
+    elif accept and ARROW_MEDIA_TYPE in accept:
+        chosen = FORMAT_ARROW
+    elif accept and COLUMNS_MEDIA_TYPE in accept:
+        chosen = FORMAT_COLUMNS
+    else:
+        chosen = FORMAT_JSON
+
+    if chosen == FORMAT_ARROW and pa is None:
+        raise HTTPException(status_code=406, detail="Arrow 형식을 사용할 수 없습니다 (pyarrow 미설치)")
+    return chosen
+
+
+def fetch_columns(conn, sql: str, params: Sequence) -> Tuple[List[str], List[tuple]]:
+    """행 dict 없이 튜플 커서로 읽어서 (컬럼 이름, 컬럼별 값 튜플) 반환"""
+    with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+        cursor.execute(sql, params)
+        names = [column.name for column in cursor.description]
+        rows = cursor.fetchall()
+    columns = list(zip(*rows)) if rows else [() for _ in names]
+    return names, columns
+
+
+def _json_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"JSON 으로 바꿀 수 없는 값: {type(value).__name__}")
+
+
+def to_rows(names: List[str], columns: List[tuple]) -> List[Dict[str, Any]]:
+    """기존 json 형식 (행마다 객체)"""
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def _json_column(values) -> list:
+    """날짜 컬럼만 한 번에 문자열로 바꾸고 나머지는 배열 그대로"""
+    if values and isinstance(values[0], date):
+        return [value.isoformat() if value is not None else None for value in values]
+    return list(values)
+
+
+def group_columns(names: List[str], columns: List[tuple], key: str) -> Dict[Any, Dict[str, Any]]:
+    """
+    key 컬럼으로 정렬된 결과를 key 값별 컬럼 배열로 나눔 (행 dict 없이 구간 슬라이스)
+    반환: {key 값: {'length': n, 'data': {컬럼: [...]}}} (key 컬럼은 제외)
+    """
+    index = names.index(key)
+    if not columns or not columns[index]:
+        return {}
+
+    groups = {}
+    start = 0
+    for value, run in groupby(columns[index]):
+        end = start + sum(1 for _ in run)
+        groups[value] = {
+            'length': end - start,
+            'data': {name: _json_column(values[start:end])
+                     for i, (name, values) in enumerate(zip(names, columns)) if i != index},
+        }
+        start = end
+    return groups
+
+
+def json_response(body: Dict[str, Any]) -> Response:
+    """jsonable_encoder 없이 바로 직렬화한 JSON 응답"""
+    return Response(content=json.dumps(body, ensure_ascii=False, separators=(',', ':'), default=_json_value),
+                    media_type='application/json')
+
+
+def arrow_response(meta: Dict[str, Any], names: List[str], columns: List[tuple]) -> Response:
+    """Arrow IPC 스트림 응답 (meta 는 스키마 메타데이터)"""
+    arrays = {}
+    for name, values in zip(names, columns):
+        array = pa.array(values)
+        # 투자자 유형 / 종목코드처럼 반복되는 문자열은 사전 인코딩
+        arrays[name] = array.dictionary_encode() if pa.types.is_string(array.type) else array
+    table = pa.table(arrays)
+    table = table.replace_schema_metadata({k: str(v) for k, v in meta.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+
+def columnar_response(fmt: str, meta: Dict[str, Any], key: str,
+                      names: List[str], columns: List[tuple]) -> Response:
+    """columns / arrow 형식 응답 (meta: 종목코드 등 시계열 밖의 값, key: json 형식에서 행 목록 키)"""
+    if fmt == FORMAT_ARROW:
+        return arrow_response({**meta, 'series': key}, names, columns)
+
+    data = {name: _json_column(values) for name, values in zip(names, columns)}
+    return json_response({**meta, 'series': key, 'columns': names,
+                          'length': len(columns[0]) if columns else 0, 'data': data})
@@ -0,0 +1,180 @@
+"""
+대량 내보내기 형식 (/api/export/{table})
+
+서버 측 커서에서 받은 행 묶음을 바로 직렬화해서 스트리밍 응답으로 보냅니다.
+묶음 하나만 메모리에 있으므로 1,000행이든 테이블 전체든 메모리 사용량이 같습니다.
+- csv: UTF-8 (엑셀에서 한글이 깨지지 않도록 BOM 포함), 첫 줄은 컬럼 이름
+- ndjson: 한 줄에 JSON 객체 하나
+- parquet: 묶음마다 row group 하나, 파일 끝 (footer) 은 마지막에 전송 (pyarrow 가 설치된 경우)
+
+응답은 ExportResponse 로 보내서, 클라이언트가 응답 시작 전에 끊어도 서버 측 커서를 반드시 닫습니다.
+"""
+
+import csv
+import io
+import json
+import logging
+from datetime import date
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet 형식만 사용할 수 없음
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# 서버 측 커서에서 한 번에 읽을 행 수 (묶음 하나 = CSV / NDJSON 조각 하나 = parquet row group 하나)
+EXPORT_CHUNK_ROWS = 10000
+
+# 형식 → (Content-Type, 확장자)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# 내보낼 수 있는 테이블 → 컬럼과 Arrow 타입 (db/schema.sql 과 동일, parquet 스키마)
+EXPORT_TABLES: Dict[str, Dict[str, str]] = {
+    'daily_prices': {
+        'ticker': 'string', 'date': 'date32', 'open': 'int32', 'high': 'int32',
+        'low': 'int32', 'close': 'int32', 'volume': 'int64',
+    },
+    'investor_trends': {
+        'ticker': 'string', 'date': 'date32', 'investor_type': 'string',
+        'buy_value': 'int64', 'sell_value': 'int64', 'net_value': 'int64',
+    },
+}
+
+# 테이블 기본키 순서 (인덱스 순서로 읽어서 정렬 단계 없음)
+EXPORT_ORDER = {
+    'daily_prices': 'ticker, date',
+    'investor_trends': 'ticker, date, investor_type',
+}
+
+
+def _json_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"JSON 으로 바꿀 수 없는 값: {type(value).__name__}")
+
+
+class CsvWriter:
+    """CSV (BOM + 헤더 줄, 날짜는 YYYY-MM-DD)"""
+
+    def __init__(self, names: List[str], types: Dict[str, str]):
+        self.names = names
+
+    def header(self) -> bytes:
+        return ('\ufeff' + ','.join(self.names) + '\r\n').encode('utf-8')
+
+    def write(self, rows: List[tuple]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def close(self) -> bytes:
+        return b''
+
+
+class NdjsonWriter:
+    """NDJSON (행마다 JSON 객체 한 줄)"""
+
+    def __init__(self, names: List[str], types: Dict[str, str]):
+        self.names = names
+
+    def header(self) -> bytes:
+        return b''
+
+    def write(self, rows: List[tuple]) -> bytes:
+        names = self.names
+        lines = [json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_value) for row in rows]
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def close(self) -> bytes:
+        return b''
+
+
+class _ChunkSink(io.RawIOBase):
+    """ParquetWriter 가 쓴 바이트를 모아 두었다가 묶음마다 꺼내는 파일 객체"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+class ParquetWriter:
+    """Parquet (묶음마다 row group, 컬럼 타입은 EXPORT_TABLES 스키마)"""
+
+    def __init__(self, names: List[str], types: Dict[str, str]):
+        self.names = names
+        self.schema = pa.schema([(name, getattr(pa, types[name])()) for name in names])
+        self.sink = _ChunkSink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression='zstd')
+
+    def header(self) -> bytes:
+        return self.sink.drain()
+
+    def write(self, rows: List[tuple]) -> bytes:
+        columns = list(zip(*rows))
+        batch = pa.record_batch([pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+                                schema=self.schema)
+        self.writer.write_batch(batch)
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+WRITERS = {'csv': CsvWriter, 'ndjson': NdjsonWriter, 'parquet': ParquetWriter}
+
+
+def export_writer(fmt: str, names: List[str], table: str):
+    """형식별 직렬화 객체 (header() → write(rows) 반복 → close())"""
+    return WRITERS[fmt](names, EXPORT_TABLES[table])
+
+
+def check_export(table: str, fmt: str):
+    """테이블 / 형식 확인, 잘못되면 HTTPException"""
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"내보낼 수 없는 테이블: {table} ({', '.join(EXPORT_TABLES)})")
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식: {fmt} ({' / '.join(EXPORT_FORMATS)})")
+    if fmt == 'parquet' and pq is None:
+        raise HTTPException(status_code=406, detail="parquet 형식을 사용할 수 없습니다 (pyarrow 미설치)")
+
+
+class ExportResponse(StreamingResponse):
+    """응답이 끝나거나 중단되면 (시작 전에 끊긴 경우 포함) on_close() 를 호출하는 스트리밍 응답
+
+    본문 제너레이터가 한 번도 실행되지 않으면 그 안의 finally 도 실행되지 않아서,
+    미리 열어 둔 서버 측 커서 (연결 + 스트림 자리) 를 여기서 닫습니다. on_close 는 여러 번 불려도 안전해야 합니다.
+    """
+
+    def __init__(self, content, on_close: Callable[[], Awaitable[None]], **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.on_close()
+            except Exception as e:
+                logger.warning(f"내보내기 스트림 정리 실패: {e}")
@@ -0,0 +1,264 @@
+"""
+API 응답 캐시 (ETag / 304)
+
+데이터는 하루 한 번 data_updater.py 가 실행될 때만 바뀌는데, 같은 화면을 다시 열 때마다
+/api/stats, /api/stocks/{ticker}, /api/sectors 등이 매번 Postgres 를 조회합니다.
+응답 본문을 메모리에 저장해 두고, 데이터가 바뀌었는지는 데이터 세대 토큰으로 판단합니다.
+- 데이터 세대 토큰: 업데이트 스크립트가 끝날 때 올리는 data_generation 행 (마지막 거래일 + 세대 번호)
+  DB 는 check_interval 초마다 한 번만 확인하고, 그 사이의 요청은 메모리의 토큰을 사용
+- 캐시 키 = (토큰, 경로 + 정렬한 쿼리 문자열) → 토큰이 바뀌면 이전 응답은 더 이상 사용되지 않음
+- 최대 항목 수를 넘으면 가장 오래 안 쓴 항목부터 제거 (LRU), 항목마다 유효 시간 (TTL)
+- ETag / Cache-Control 헤더 추가, If-None-Match 가 같으면 본문 없이 304
+- Content-Length 가 없거나 (스트리밍) 너무 큰 응답, 200 이 아닌 응답은 저장하지 않음
+- 적중 / 미적중 / 304 / 제거 통계 (/api/health 에 표시)
+
+사용 예:
+    cache = ResponseCache(max_entries=512, ttl=3600)
+    generation = DataGeneration(load_token, check_interval=30)
+    app.add_middleware(ResponseCacheMiddleware, cache=cache, generation=generation, max_age=60)
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# 기본 설정
+CACHE_MAX_ENTRIES = 512             # 저장할 최대 응답 수
+CACHE_TTL = 3600.0                  # 응답 하나의 유효 시간 (초)
+CACHE_MAX_BODY_BYTES = 1_000_000    # 이보다 큰 응답은 저장하지 않음 (바이트)
+CACHE_MAX_AGE = 60                  # 브라우저가 다시 확인하지 않고 재사용할 시간 (Cache-Control max-age, 초)
+GENERATION_CHECK_INTERVAL = 30.0    # 데이터 세대 토큰을 DB 에서 다시 확인하는 간격 (초)
+
+
+class ResponseCache:
+    """크기 제한 LRU + TTL 저장소 (응답은 키 → (본문, 헤더), 종목 수 같은 작은 값도 저장 가능)"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        if max_entries < 1:
+            raise ValueError(f"잘못된 캐시 크기: {max_entries}")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: OrderedDict = OrderedDict()  # 키 → (저장 시각, 값, 크기)
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'hits': 0,            # 저장된 응답으로 답한 횟수
+            'misses': 0,          # 핸들러를 실행한 횟수
+            'not_modified': 0,    # If-None-Match 로 304 를 보낸 횟수
+            'stored': 0,          # 저장한 응답 수
+            'evicted': 0,         # 최대 항목 수를 넘어 제거한 수
+            'expired': 0,         # 유효 시간이 지나 제거한 수
+            'bypassed': 0,        # 토큰 확인 실패로 캐시 없이 처리한 횟수
+        }
+
+    def count(self, key: str, value: int = 1):
+        with self._lock:
+            self._stats[key] += value
+
+    def get(self, key) -> Optional[Any]:
+        """저장된 값 반환, 없거나 유효 시간이 지났으면 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value, _ = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._stats['expired'] += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size: int = 0):
+        """값 저장 (size: 통계용 바이트 수, 최대 항목 수를 넘으면 가장 오래 안 쓴 항목 제거)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, size)
+            self._entries.move_to_end(key)
+            self._stats['stored'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evicted'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 상태 / 누적 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            size = sum(size for _, _, size in self._entries.values())
+        stats.update({
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'bytes': size,
+            'ttl': self.ttl,
+        })
+        return stats
+
+
+class DataGeneration:
+    """데이터 세대 토큰 (check_interval 초 동안은 DB 를 다시 조회하지 않음)"""
+
+    def __init__(self, loader: Callable[[], Awaitable[str]],
+                 check_interval: float = GENERATION_CHECK_INTERVAL):
+        """loader: 현재 토큰을 DB 에서 읽는 async 함수"""
+        self.loader = loader
+        self.check_interval = check_interval
+
+        self.token: Optional[str] = None
+        self.checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def current(self) -> Optional[str]:
+        """현재 토큰 (확인 간격이 지났으면 DB 에서 다시 읽음, 읽기 실패 시 None)"""
+        if self.token is not None and time.monotonic() - self.checked_at < self.check_interval:
+            return self.token
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # 기다리는 동안 다른 요청이 이미 갱신했으면 그대로 사용
+            if self.token is not None and time.monotonic() - self.checked_at < self.check_interval:
+                return self.token
+            try:
+                token = await self.loader()
+            except Exception as e:
+                logger.warning(f"데이터 세대 토큰 확인 실패, 캐시 없이 처리합니다: {e}")
+                return None
+
+            if token != self.token:
+                logger.info(f"🔖 데이터 세대 토큰: {self.token} → {token}")
+            self.token, self.checked_at = token, time.monotonic()
+            return token
+
+    def invalidate(self):
+        """다음 요청에서 토큰을 바로 다시 확인"""
+        self.checked_at = 0.0
+
+
+def cache_key(scope, vary: Iterable[str] = ()) -> str:
+    """경로 + 정렬한 쿼리 문자열 (파라미터 순서가 달라도 같은 키) + vary 헤더 값"""
+    query = parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+    key = f"{scope['path']}?{urlencode(sorted(query))}" if query else scope['path']
+
+    headers = Headers(scope=scope)
+    for name in vary:
+        if (value := headers.get(name)) is not None:
+            key += f"|{name}={value}"
+    return key
+
+
+def make_etag(token: str, key: str) -> str:
+    """토큰 + 키로 정해지는 ETag (같은 데이터 세대의 같은 요청은 같은 본문)"""
+    digest = hashlib.sha1(f"{token}|{key}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더에 etag 가 있는지 (약한 비교, * 포함)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ResponseCacheMiddleware:
+    """GET /api/* 응답을 데이터 세대별로 저장하고 ETag / 304 로 답하는 ASGI 미들웨어"""
+
+    def __init__(self, app, cache: ResponseCache, generation: DataGeneration,
+                 max_age: int = CACHE_MAX_AGE, max_body_bytes: int = CACHE_MAX_BODY_BYTES,
+                 prefix: str = '/api/', exclude: Iterable[str] = (), vary: Iterable[str] = ('accept',)):
+        """vary: 같은 URL 이라도 값에 따라 응답이 달라지는 요청 헤더 (Accept 로 응답 형식 선택 등)"""
+        self.app = app
+        self.cache = cache
+        self.generation = generation
+        self.max_age = max_age
+        self.max_body_bytes = max_body_bytes
+        self.prefix = prefix
+        self.exclude = set(exclude)
+        self.vary = tuple(vary)
+        self._token: Optional[str] = None
+
+    def _cacheable(self, scope) -> bool:
+        return (scope['type'] == 'http' and scope['method'] == 'GET'
+                and scope['path'].startswith(self.prefix) and scope['path'] not in self.exclude)
+
+    def _cache_headers(self, etag: str) -> list:
+        headers = [
+            (b'etag', etag.encode('latin-1')),
+            (b'cache-control', f'public, max-age={self.max_age}'.encode('latin-1')),
+        ]
+        if self.vary:
+            headers.append((b'vary', ', '.join(self.vary).encode('latin-1')))
+        return headers
+
+    async def __call__(self, scope, receive, send):
+        if not self._cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        token = await self.generation.current()
+        if token is None:
+            self.cache.count('bypassed')
+            await self.app(scope, receive, send)
+            return
+        if token != self._token:
+            # 새 데이터 세대: 이전 응답은 더 이상 쓰이지 않으므로 메모리 정리
+            self.cache.clear()
+            self._token = token
+
+        key = cache_key(scope, self.vary)
+        etag = make_etag(token, key)
+
+        if etag_matches(Headers(scope=scope).get('if-none-match'), etag):
+            self.cache.count('not_modified')
+            await send({'type': 'http.response.start', 'status': 304, 'headers': self._cache_headers(etag)})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        entry = self.cache.get((token, key))
+        if entry is not None:
+            body, headers = entry
+            self.cache.count('hits')
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': headers + [(b'x-cache', b'HIT')]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        self.cache.count('misses')
+        captured = {'store': False, 'headers': None, 'chunks': []}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                length = headers.get('content-length')
+                if message['status'] == 200 and length is not None and int(length) <= self.max_body_bytes:
+                    for name, value in self._cache_headers(etag):
+                        headers[name.decode()] = value.decode()
+                    captured['store'] = True
+                    captured['headers'] = list(message['headers'])
+                headers['x-cache'] = 'MISS'
+            elif message['type'] == 'http.response.body' and captured['store']:
+                captured['chunks'].append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    body = b''.join(captured['chunks'])
+                    self.cache.set((token, key), (body, captured['headers']), size=len(body))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
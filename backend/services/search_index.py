@@ -0,0 +1,191 @@
+"""
+종목 검색 인덱스 (메모리)
+
+종목 화면은 입력할 때마다 name ILIKE '%검색어%' OR ticker ILIKE '%검색어%' 로 검색해서
+인덱스를 쓰지 못하고 stocks 전체를 읽습니다. 종목 수는 수천 개뿐이라 서버 시작 시 메모리에 올려 두고
+Postgres 없이 검색합니다.
+- 종목코드 / 종목명 접두어, 부분 문자열, 초성 (ㅅㅅㅈㅈ → 삼성전자, 섞어 쓴 삼성ㅈ 도 가능) 검색
+- 대소문자 / 공백 무시 (SK 하이닉스 = sk하이닉스)
+- 글자 → 종목 번호 역색인으로 후보를 좁힌 뒤 후보만 확인 (전체를 훑지 않음)
+- 순위: 정확히 일치 > 접두어 > 부분 문자열 (앞쪽일수록), 상장폐지 종목은 뒤로
+- 데이터 세대 토큰이 바뀌면 다시 읽음
+
+사용 예:
+    index = StockSearchIndex()
+    index.load(rows, token)    # rows: (ticker, name, market, delisted) 목록
+    index.search('ㅅㅅㅈㅈ', limit=10)
+"""
+
+import heapq
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 한글 음절 → 초성 (호환용 자모, 사용자가 입력하는 글자)
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+HANGUL_START, HANGUL_END = 0xAC00, 0xD7A3
+SYLLABLES_PER_CHOSEONG = 21 * 28
+
+# 검색 기본 설정
+SUGGEST_LIMIT = 10
+
+
+def normalize(text: str) -> str:
+    """검색용 문자열 (소문자, 공백 제거)"""
+    return ''.join(text.lower().split())
+
+
+def to_choseong(text: str) -> str:
+    """한글 음절은 초성으로, 나머지 글자는 그대로"""
+    chars = []
+    for char in text:
+        code = ord(char)
+        if HANGUL_START <= code <= HANGUL_END:
+            chars.append(CHOSEONG[(code - HANGUL_START) // SYLLABLES_PER_CHOSEONG])
+        else:
+            chars.append(char)
+    return ''.join(chars)
+
+
+def _find(name: str, initials: str, query: str, start: int = 0) -> int:
+    """초성이 섞인 검색어 위치 (검색어의 초성 글자는 같은 초성의 음절과 일치), 없으면 -1"""
+    size = len(query)
+    for i in range(start, len(name) - size + 1):
+        for j, char in enumerate(query):
+            if char != name[i + j] and char != initials[i + j]:
+                break
+        else:
+            return i
+    return -1
+
+
+class StockSearchIndex:
+    """종목코드 / 종목명 / 초성 메모리 검색 인덱스"""
+
+    def __init__(self):
+        self.token: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stocks, self._keys, self._postings = self._build([])
+
+    @staticmethod
+    def _build(rows: Iterable[Tuple[str, str, str, bool]]):
+        """(종목 목록, 검색 키 목록, 글자 → 종목 번호 역색인)"""
+        stocks, keys, postings = [], [], {}
+        for ticker, name, market, delisted in rows:
+            stock_id = len(stocks)
+            stocks.append({'ticker': ticker, 'name': name, 'market': market, 'delisted': bool(delisted)})
+
+            key_name = normalize(name or '')
+            key_ticker = normalize(ticker)
+            initials = to_choseong(key_name)
+            keys.append((key_ticker, key_name, initials))
+
+            # 종목코드 / 종목명 / 초성에 나오는 글자마다 종목 번호 (음절과 초성 자모는 서로 다른 글자)
+            for char in set(key_ticker + key_name + initials):
+                postings.setdefault(char, []).append(stock_id)
+
+        return stocks, keys, {char: frozenset(ids) for char, ids in postings.items()}
+
+    def load(self, rows: Iterable[Tuple[str, str, str, bool]], token: Optional[str] = None):
+        """종목 목록으로 인덱스 다시 만들기 (만드는 동안에도 이전 인덱스로 검색 가능)"""
+        built = self._build(rows)
+        with self._lock:
+            self._stocks, self._keys, self._postings = built
+            self.token = token
+            self.loaded_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._stocks)
+
+    @staticmethod
+    def _candidates(postings, query: str) -> Iterable[int]:
+        """검색어의 글자를 모두 포함하는 종목 번호 (드문 글자부터 교집합)"""
+        sets = []
+        for char in set(query):
+            ids = postings.get(char)
+            if not ids:
+                return ()
+            sets.append(ids)
+        sets.sort(key=len)
+        result = sets[0]
+        for ids in sets[1:]:
+            result = result & ids
+            if not result:
+                break
+        return result
+
+    @staticmethod
+    def _rank(key: Tuple[str, str, str], query: str, initials_mode: Optional[str]) -> Optional[Tuple[int, int]]:
+        """
+        (일치 종류, 위치), 일치하지 않으면 None (0: 정확히 일치, 1: 접두어, 2: 부분 문자열)
+        initials_mode: None (초성 없음) / 'only' (초성만, 초성 문자열에서 찾기) / 'mixed' (음절과 섞임)
+        """
+        key_ticker, key_name, initials = key
+        if query == key_ticker or query == key_name:
+            return 0, 0
+        if key_ticker.startswith(query) or key_name.startswith(query):
+            return 1, 0
+
+        pos = key_name.find(query)
+        if pos < 0 and initials_mode == 'only':
+            pos = initials.find(query)
+        elif pos < 0 and initials_mode == 'mixed':
+            pos = _find(key_name, initials, query)
+        if pos == 0:
+            return 1, 0
+        if pos > 0:
+            return 2, pos
+
+        pos = key_ticker.find(query)
+        if pos >= 0:
+            return 2, pos
+        return None
+
+    def _ranked(self, query: str, market: Optional[str]) -> Tuple[list, list]:
+        """(종목 목록, 일치한 종목의 (상장폐지, 순위, 이름 길이, 종목코드, 번호) 목록)"""
+        query = normalize(query)
+        if not query:
+            return [], []
+
+        with self._lock:
+            stocks, keys, postings = self._stocks, self._keys, self._postings
+        initials_mode = None
+        if any(char in CHOSEONG for char in query):
+            mixed = any(HANGUL_START <= ord(char) <= HANGUL_END for char in query)
+            initials_mode = 'mixed' if mixed else 'only'
+
+        ranked = []
+        for stock_id in self._candidates(postings, query):
+            stock = stocks[stock_id]
+            if market and stock['market'] != market:
+                continue
+            rank = self._rank(keys[stock_id], query, initials_mode)
+            if rank is not None:
+                ranked.append((stock['delisted'], rank, len(keys[stock_id][1]), stock['ticker'], stock_id))
+
+        return stocks, ranked
+
+    def matches(self, query: str, market: Optional[str] = None) -> List[Dict[str, Any]]:
+        """검색어와 일치하는 모든 종목 (순위순)"""
+        stocks, ranked = self._ranked(query, market)
+        return [stocks[item[-1]] for item in sorted(ranked)]
+
+    def search(self, query: str, market: Optional[str] = None, limit: int = SUGGEST_LIMIT) -> List[Dict[str, Any]]:
+        """자동완성 후보 상위 limit 개 (전체 정렬 없이)"""
+        stocks, ranked = self._ranked(query, market)
+        return [stocks[item[-1]] for item in heapq.nsmallest(limit, ranked)]
+
+    def tickers(self, query: str, market: Optional[str] = None) -> List[str]:
+        """검색어와 일치하는 종목코드 (종목코드 순, 목록 조회용)"""
+        stocks, ranked = self._ranked(query, market)
+        return sorted(stocks[item[-1]]['ticker'] for item in ranked)
+
+    def stats(self) -> Dict[str, Any]:
+        """인덱스 상태"""
+        return {
+            'stocks': len(self._stocks),
+            'chars': len(self._postings),
+            'token': self.token,
+            'loaded_at': self.loaded_at,
+        }
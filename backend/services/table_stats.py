@@ -0,0 +1,76 @@
+"""
+테이블 통계 조회 (/api/stats, /api/db-info)
+
+팩트 테이블에 COUNT(*) / COUNT(DISTINCT ticker) 를 실행하면 쌓인 기간만큼 느려집니다.
+데이터 수집 / 업데이트가 저장할 때 함께 올린 table_stats 테이블 (scripts/table_stats.py) 을 읽고,
+거기 없는 테이블은 플래너 추정치로 대신합니다. 데이터 크기와 상관없이 작은 카탈로그 / 통계 행만 읽습니다.
+- 정확한 값: table_stats (마지막으로 커밋된 저장 시점 기준)
+- 추정치: pg_class.reltuples (ANALYZE 전이면 pg_stat_user_tables.n_live_tup), 종목 수는 pg_stats.n_distinct
+- 값마다 'exact' / 'estimated' 표시
+"""
+
+from typing import Any, Dict, Optional
+
+# 통계 출처
+EXACT = 'exact'
+ESTIMATED = 'estimated'
+
+
+def read_counters(conn) -> Dict[str, Dict[str, Any]]:
+    """table_stats 에 저장된 정확한 통계 (테이블이 없으면 빈 dict)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('table_stats') IS NOT NULL AS exists")
+    if not cursor.fetchone()['exists']:
+        return {}
+
+    cursor.execute("""
+        SELECT table_name, row_count, distinct_tickers, min_date, max_date, updated_at
+        FROM table_stats
+    """)
+    return {row['table_name']: dict(row) for row in cursor.fetchall()}
+
+
+def read_estimates(conn) -> Dict[str, int]:
+    """public 테이블별 플래너 추정 행 수"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname AS table_name,
+               CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint
+                    ELSE COALESCE(s.n_live_tup, 0) END AS estimate
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+    """)
+    return {row['table_name']: row['estimate'] for row in cursor.fetchall()}
+
+
+def estimate_distinct(conn, table: str, column: str, rows: int) -> Optional[int]:
+    """pg_stats 의 서로 다른 값 수 추정치 (음수는 행 수 대비 비율, ANALYZE 전이면 None)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT n_distinct FROM pg_stats
+        WHERE schemaname = 'public' AND tablename = %s AND attname = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    n_distinct = row['n_distinct']
+    return int(round(-n_distinct * rows)) if n_distinct < 0 else int(n_distinct)
+
+
+def table_counts(conn, use_counters: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    public 테이블별 {'rows', 'accuracy', 'stats'}
+    use_counters=False 이면 저장된 통계 없이 플래너 추정치만 사용
+    """
+    counters = read_counters(conn) if use_counters else {}
+    estimates = read_estimates(conn)
+
+    counts = {}
+    for table in sorted(estimates):
+        if table in counters:
+            counts[table] = {'rows': counters[table]['row_count'], 'accuracy': EXACT, 'stats': counters[table]}
+        else:
+            counts[table] = {'rows': estimates[table], 'accuracy': ESTIMATED, 'stats': None}
+    return counts
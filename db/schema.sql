@@ -11,10 +11,14 @@ CREATE TABLE IF NOT EXISTS stocks (
     market TEXT NOT NULL CHECK (market IN ('KOSPI', 'KOSDAQ')),
     sector TEXT,
     listed_date DATE,
+    delisted_date DATE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 이전 스키마로 만든 DB 에 상장폐지일 컬럼 추가
+ALTER TABLE stocks ADD COLUMN IF NOT EXISTS delisted_date DATE;
+
 -- 2. 일별 시세 테이블
 CREATE TABLE IF NOT EXISTS daily_prices (
     ticker VARCHAR(6) NOT NULL,
@@ -42,6 +46,14 @@ CREATE TABLE IF NOT EXISTS investor_trends (
     FOREIGN KEY (ticker) REFERENCES stocks(ticker) ON DELETE CASCADE
 );
 
+-- 이전 버전의 투자자 유형 이름을 config.py 의 INVESTOR_TYPES 이름으로 변경 (기관 → 기관합계)
+-- 같은 (종목, 날짜) 에 새 이름 행이 이미 있으면 이전 행만 삭제
+DELETE FROM investor_trends old
+USING investor_trends new
+WHERE old.investor_type = '기관' AND new.investor_type = '기관합계'
+  AND new.ticker = old.ticker AND new.date = old.date;
+UPDATE investor_trends SET investor_type = '기관합계' WHERE investor_type = '기관';
+
 -- 4. 업종(섹터) 정의 테이블 (수정된 버전)
 CREATE TABLE IF NOT EXISTS sectors (
     id SERIAL PRIMARY KEY,
@@ -67,6 +79,92 @@ CREATE TABLE IF NOT EXISTS sector_prices (
     PRIMARY KEY (sector_code, date)
 );
 
+-- 6. 수집 진행 기록 테이블 (data_collector.py --resume)
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    stage TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    rows_written INTEGER DEFAULT 0,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (stage, unit, start_date, end_date)
+);
+
+-- 7. 거래일 달력 테이블 (저장된 시세 날짜에서 갱신, scripts/trading_calendar.py)
+CREATE TABLE IF NOT EXISTS trading_calendar (
+    date DATE PRIMARY KEY
+);
+
+-- 8. KRX 휴장일 테이블 (평일 휴장일, manual: 직접 추가)
+CREATE TABLE IF NOT EXISTS krx_holidays (
+    date DATE PRIMARY KEY,
+    name TEXT,
+    source TEXT NOT NULL DEFAULT 'manual',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 이전 버전이 시세 없는 평일에서 추정한 휴장일 제거 (수집 실패일이 휴장일로 남지 않도록)
+DELETE FROM krx_holidays WHERE source = 'inferred';
+
+-- 9. 검증 실패 데이터 격리 테이블 (팩트 테이블 대신 저장, scripts/data_validation.py)
+CREATE TABLE IF NOT EXISTS ingest_quarantine (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    date DATE,
+    reason TEXT NOT NULL,
+    detail TEXT,
+    payload JSONB,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (table_name, key, date, reason)
+);
+
+-- 10. 업종 최신 시세 요약 테이블 (업종 시세 수집 / 업데이트 후 sector_latest_view 로 교체, scripts/sector_latest.py)
+CREATE TABLE IF NOT EXISTS sector_latest (
+    sector_code VARCHAR(10) PRIMARY KEY,
+    sector_name TEXT NOT NULL,
+    date DATE NOT NULL,
+    open INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    close INTEGER NOT NULL,
+    volume BIGINT NOT NULL,
+    prev_close INTEGER,
+    change INTEGER,
+    change_rate NUMERIC(10, 2),
+    return_5d NUMERIC(10, 2),
+    return_20d NUMERIC(10, 2),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 11. 대시보드 스냅샷 테이블 (데이터 업데이트 후 다시 계산, /api/dashboard 응답 JSON, scripts/dashboard_snapshot.py)
+CREATE TABLE IF NOT EXISTS dashboard_snapshot (
+    name TEXT PRIMARY KEY,
+    payload JSONB NOT NULL,
+    as_of DATE,
+    generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 12. 데이터 세대 테이블 (데이터 수집 / 업데이트가 끝날 때 세대 번호 증가, API 응답 캐시 무효화, scripts/data_generation.py)
+CREATE TABLE IF NOT EXISTS data_generation (
+    name TEXT PRIMARY KEY,
+    generation BIGINT NOT NULL DEFAULT 0,
+    latest_date DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 13. 테이블 통계 (데이터 수집 / 업데이트 후 정확한 값으로 다시 계산, /api/stats · /api/db-info, scripts/table_stats.py)
+CREATE TABLE IF NOT EXISTS table_stats (
+    table_name TEXT PRIMARY KEY,
+    row_count BIGINT NOT NULL,
+    distinct_tickers INTEGER,
+    min_date DATE,
+    max_date DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- 인덱스 생성 (조회 성능 최적화)
 CREATE INDEX IF NOT EXISTS idx_daily_prices_date ON daily_prices(date);
 CREATE INDEX IF NOT EXISTS idx_daily_prices_ticker ON daily_prices(ticker);
@@ -93,4 +191,31 @@ CREATE OR REPLACE VIEW latest_trading_date AS
 SELECT 
     MAX(date) as latest_date,
     COUNT(DISTINCT ticker) as stocks_with_data
-FROM daily_prices; 
\ No newline at end of file
+FROM daily_prices; 
+
+-- 업종별 최신 시세 / 전일 대비 / 5·20거래일 수익률 (%) 계산 뷰 (sector_latest 테이블 갱신용)
+CREATE OR REPLACE VIEW sector_latest_view AS
+SELECT
+    sector_code,
+    MAX(sector_name) FILTER (WHERE rn = 1) AS sector_name,
+    MAX(date) AS date,
+    MAX(open) FILTER (WHERE rn = 1) AS open,
+    MAX(high) FILTER (WHERE rn = 1) AS high,
+    MAX(low) FILTER (WHERE rn = 1) AS low,
+    MAX(close) FILTER (WHERE rn = 1) AS close,
+    MAX(volume) FILTER (WHERE rn = 1) AS volume,
+    MAX(close) FILTER (WHERE rn = 2) AS prev_close,
+    MAX(close) FILTER (WHERE rn = 1) - MAX(close) FILTER (WHERE rn = 2) AS change,
+    ROUND((MAX(close) FILTER (WHERE rn = 1)::numeric
+           / NULLIF(MAX(close) FILTER (WHERE rn = 2), 0) - 1) * 100, 2) AS change_rate,
+    ROUND((MAX(close) FILTER (WHERE rn = 1)::numeric
+           / NULLIF(MAX(close) FILTER (WHERE rn = 6), 0) - 1) * 100, 2) AS return_5d,
+    ROUND((MAX(close) FILTER (WHERE rn = 1)::numeric
+           / NULLIF(MAX(close) FILTER (WHERE rn = 21), 0) - 1) * 100, 2) AS return_20d
+FROM (
+    SELECT sector_code, sector_name, date, open, high, low, close, volume,
+           ROW_NUMBER() OVER (PARTITION BY sector_code ORDER BY date DESC) AS rn
+    FROM sector_prices
+) ranked
+WHERE rn <= 21
+GROUP BY sector_code;
@@ -155,6 +155,12 @@ export const useApiStore = defineStore('api', {
       }
     },
     
+    // 종목 자동완성 (종목코드 / 종목명 / 초성, 서버 메모리 인덱스)
+    async suggestStocks(q, params = {}) {
+      const response = await api.get('/api/stocks/suggest', { params: { q, ...params } })
+      return response.data.suggestions
+    },
+    
     // 특정 종목 상세 정보
     async fetchStock(ticker) {
       this.loading.stock = true
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+K-Stock Insight 과거 데이터 병렬 백필 스크립트
+
+수년치 과거 데이터를 여러 프로세스로 나눠서 수집합니다.
+- (종목 × 기간) 공간을 샤드로 나눔: 기간은 SHARD_DAYS 일 단위, 종목은 SHARD_TICKERS 개 단위
+  - 일별 시세는 기간별로 호출 수가 적은 쪽을 골라 종목 묶음 또는 날짜 묶음으로 나눔
+  - 거래일 달력(trading_calendar)에 거래일이 없는 기간은 건너뜀
+- 워커 프로세스마다 DB 연결 1개와 API 호출 예산(API_RATE / 프로세스 수)을 따로 가짐
+  - 프로세스 안에서는 data_collector.py 와 같은 조회 → 변환 → 저장 파이프라인 사용
+- 부모 프로세스에서 전체 진행률(작업 단위 / 레코드 / 재시도 / 실패)을 하나로 표시
+- 샤드가 실패하면 아직 끝나지 않은 단위만 모아서 SHARD_RETRIES 회까지 다시 실행
+- 완료된 단위는 ingest_checkpoints 에 기록되므로 --resume 으로 이어서 실행 가능
+
+DB 연결 수는 프로세스 수 + 1 (부모) 입니다.
+
+사용법:
+    python scripts/backfill.py --start-date 20150101 --end-date 20241231
+    python scripts/backfill.py --start-date 20150101 --processes 8 --api-rate 16 --resume
+    python scripts/backfill.py --start-date 20250101 --stages daily_prices,sector_prices
+    python scripts/backfill.py --start-date 20240101 --fake 300   # 가짜 백엔드로 처리량 확인
+"""
+
+import os
+import sys
+import argparse
+import logging
+import multiprocessing
+import queue
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+from tqdm import tqdm
+
+# pykrx 모듈 import
+try:
+    from pykrx import stock
+except ImportError:
+    print("pykrx 모듈이 설치되지 않았습니다. 'pip install pykrx' 명령어로 설치해주세요.")
+    sys.exit(1)
+
+from price_fetch import (
+    MODE_AUTO, MODE_BY_DATE, MODE_BY_TICKER, choose_fetch_mode, fetch_market_frames,
+    fetch_sector_frame, fetch_ticker_frame, prices_from_market_frames, prices_from_ticker_frame,
+    sector_prices_from_frame
+)
+from db_config import DB_CONFIG
+from bulk_writer import BulkWriteResult
+from investor_fetch import fetch_investor_values, melt_investor_values
+from pipeline import IngestPipeline
+from fetch_engine import FetchEngine
+from checkpoint import CheckpointJournal
+from stock_universe import latest_list_date, sync_historical_universe, sync_stocks
+from trading_calendar import TradingCalendar
+from data_validation import BatchValidator
+from sector_latest import refresh_sector_latest
+from dashboard_snapshot import refresh_dashboard_snapshot
+from data_generation import bump_data_generation
+from table_stats import refresh_table_stats
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('backfill.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# ============================
+# 🔧 설정 변수 (쉽게 변경 가능)
+# ============================
+
+# 백필 기간 설정
+START_DATE = '20150101'
+END_DATE = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')  # 어제까지
+
+# 수집할 시장 구분
+MARKETS = ['KOSPI', 'KOSDAQ']
+
+# 백필 단계 (실행 순서)
+STAGES = ['daily_prices', 'investor_trends', 'sector_prices']
+
+# 샤드 설정
+PROCESSES = min(4, os.cpu_count() or 1)  # 워커 프로세스 수 (= DB 연결 수)
+SHARD_DAYS = 366  # 샤드 하나의 기간 (일)
+SHARD_TICKERS = 200  # 샤드 하나의 종목 / 업종 수 (날짜 묶음이면 API 호출 수가 비슷하도록 환산)
+SHARD_RETRIES = 3  # 실패한 샤드 재시도 횟수
+UNIVERSE_INTERVAL_DAYS = 30  # 대상 종목을 정할 때 종목 목록을 조회하는 간격 (일)
+
+# 처리 설정 (프로세스마다)
+COMMIT_ROWS = 50000  # 이만큼 행이 모이면 저장 후 커밋
+COMMIT_SECONDS = 5  # 저장 대기 중인 데이터가 있으면 이 시간마다 커밋 (초)
+QUEUE_SIZE = 32  # 파이프라인 단계 사이 큐 크기
+MAX_RETRIES = 3  # API 호출당 최대 재시도 횟수
+FETCH_WORKERS = 4  # 프로세스당 동시 API 호출 워커 수
+
+# API 호출 예산 (전체 프로세스 합계, 프로세스 수로 나눠서 배분)
+API_RATE = 8  # 초당 최대 API 호출 수
+API_BURST = 8  # 순간 최대 API 호출 수
+PRICE_FETCH_MODE = MODE_AUTO  # 시세 수집 모드 ('auto', 'ticker', 'date')
+
+
+class Shard:
+    """백필 작업 단위 (단계 × 기간 × 종목 / 업종 / 날짜 묶음)"""
+
+    def __init__(self, stage: str, mode: str, start_date: str, end_date: str,
+                 units: List[str], attempt: int = 0):
+        self.stage = stage
+        self.mode = mode
+        self.start_date = start_date
+        self.end_date = end_date
+        self.units = units
+        self.attempt = attempt
+
+    def retry(self, units: List[str]) -> 'Shard':
+        """남은 단위만으로 다시 실행할 샤드"""
+        return Shard(self.stage, self.mode, self.start_date, self.end_date, units, self.attempt + 1)
+
+    def __str__(self) -> str:
+        return f"{self.stage}[{self.mode}] {self.start_date}~{self.end_date} ({len(self.units)}개)"
+
+
+def _batches(items: List[str], size: int) -> List[List[str]]:
+    """size 개씩 나누기"""
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def date_chunks(calendar: TradingCalendar, start_date: str, end_date: str,
+                chunk_days: int = SHARD_DAYS) -> List[Tuple[str, str]]:
+    """기간을 chunk_days 일 단위로 나누기 (거래일이 없는 구간 제외)
+
+    체크포인트 키가 달력 갱신에 따라 바뀌지 않도록 구간 경계는 거래일로 좁히지 않습니다.
+    """
+    chunks = []
+    day = datetime.strptime(start_date, '%Y%m%d')
+    end = datetime.strptime(end_date, '%Y%m%d')
+
+    while day <= end:
+        chunk_end = min(end, day + timedelta(days=chunk_days - 1))
+        chunk = (day.strftime('%Y%m%d'), chunk_end.strftime('%Y%m%d'))
+        if calendar.trading_days(*chunk):
+            chunks.append(chunk)
+        day = chunk_end + timedelta(days=1)
+
+    return chunks
+
+
+def plan_shards(calendar: TradingCalendar, stages: List[str], tickers: List[str], sector_codes: List[str],
+                start_date: str, end_date: str, shard_days: int = SHARD_DAYS,
+                shard_tickers: int = SHARD_TICKERS, mode: str = PRICE_FETCH_MODE) -> List[Shard]:
+    """단계별 (종목 × 기간) 공간을 샤드로 나누기"""
+    shards = []
+
+    for stage in stages:
+        for chunk_start, chunk_end in date_chunks(calendar, start_date, end_date, shard_days):
+            if stage == 'daily_prices':
+                days = calendar.trading_days(chunk_start, chunk_end)
+                stage_mode = choose_fetch_mode(len(tickers), chunk_start, chunk_end, len(MARKETS), mode, days=days)
+                if stage_mode == MODE_BY_DATE:
+                    # 날짜 하나 = 시장 수만큼 호출
+                    groups = _batches(days, shard_tickers // len(MARKETS))
+                else:
+                    groups = _batches(tickers, shard_tickers)
+            elif stage == 'investor_trends':
+                stage_mode, groups = MODE_BY_TICKER, _batches(tickers, shard_tickers)
+            else:
+                stage_mode, groups = MODE_BY_TICKER, _batches(sector_codes, shard_tickers)
+
+            shards.extend(Shard(stage, stage_mode, chunk_start, chunk_end, units) for units in groups)
+
+    return shards
+
+
+def universe_dates(start_date: str, end_date: str, interval_days: int = UNIVERSE_INTERVAL_DAYS) -> List[str]:
+    """기간 중 종목 목록을 조회할 기준일 (시작일부터 interval_days 간격 + 종료일)"""
+    day = datetime.strptime(start_date, '%Y%m%d')
+    end = datetime.strptime(end_date, '%Y%m%d')
+
+    dates = []
+    while day < end:
+        dates.append(day.strftime('%Y%m%d'))
+        day += timedelta(days=interval_days)
+    dates.append(end.strftime('%Y%m%d'))
+    return dates
+
+
+def make_backend(fake: int = 0, fake_latency: float = 0.0, fake_error_rate: float = 0.0):
+    """pykrx.stock 또는 가짜 백엔드 (--fake)"""
+    if fake:
+        from fake_krx import FakeKRX
+        return FakeKRX(ticker_count=fake, latency=fake_latency, error_rate=fake_error_rate)
+    return stock
+
+
+# ----------------------------
+# 워커 프로세스
+# ----------------------------
+
+# 워커 프로세스별 상태 (_init_worker 에서 채움)
+_worker: Dict = {}
+
+
+def _init_worker(backend_args: Tuple[int, float, float], rate: float, burst: int, cache_dir: Optional[str],
+                 offline: bool, tickers: List[str], progress: multiprocessing.Queue):
+    """워커 프로세스 시작 시 1회: 자기 DB 연결 / API 엔진 생성"""
+    cache = None
+    if cache_dir:
+        from krx_cache import ResponseCache
+        cache = ResponseCache(cache_dir, offline=offline)
+
+    _worker['engine'] = FetchEngine(
+        make_backend(*backend_args), workers=FETCH_WORKERS, rate=rate,
+        burst=burst, max_retries=MAX_RETRIES, cache=cache
+    )
+    _worker['tickers'] = set(tickers)
+    _worker['progress'] = progress
+    _worker['conn'] = None
+    _connect_worker()
+
+
+def _connect_worker():
+    """워커 DB 연결 (끊어졌으면 다시 연결)"""
+    conn = _worker.get('conn')
+    if conn is not None and not conn.closed:
+        return
+
+    _worker['conn'] = psycopg2.connect(**DB_CONFIG)
+    _worker['journal'] = CheckpointJournal(_worker['conn'])
+    _worker['validator'] = BatchValidator(_worker['conn'])
+
+
+def _shard_tasks(shard: Shard, api):
+    """샤드 단계에 맞는 (fetch, transform)"""
+    start_date, end_date = shard.start_date, shard.end_date
+
+    if shard.stage == 'daily_prices' and shard.mode == MODE_BY_DATE:
+        tickers = _worker['tickers']
+        return (lambda date: fetch_market_frames(api, date, MARKETS),
+                lambda date, frames: prices_from_market_frames(date, frames, tickers))
+    if shard.stage == 'daily_prices':
+        return (lambda ticker: fetch_ticker_frame(api, ticker, start_date, end_date),
+                prices_from_ticker_frame)
+    if shard.stage == 'investor_trends':
+        return (lambda ticker: fetch_investor_values(api, ticker, start_date, end_date),
+                lambda ticker, values: melt_investor_values(ticker, *values))
+    return (lambda code: fetch_sector_frame(api, code, start_date, end_date),
+            lambda code, frame: sector_prices_from_frame(code, *frame))
+
+
+def run_shard(shard: Shard) -> Dict:
+    """샤드 하나 실행 (워커 프로세스), 결과와 아직 끝나지 않은 단위 반환"""
+    engine = _worker['engine']
+    progress = _worker['progress']
+    calls_before = engine.calls
+    result, error = BulkWriteResult(), None
+
+    try:
+        _connect_worker()
+        conn, journal = _worker['conn'], _worker['journal']
+
+        def on_saved(unit, rows):
+            journal.mark_done(shard.stage, unit, shard.start_date, shard.end_date, rows)
+            progress.put((1, rows))
+
+        pipeline = IngestPipeline(
+            engine, conn, shard.stage, queue_size=QUEUE_SIZE,
+            batch_rows=COMMIT_ROWS, batch_seconds=COMMIT_SECONDS, on_saved=on_saved,
+            validator=_worker['validator'], track_stats=False  # 끝날 때 통계 전체 다시 계산
+        )
+        fetch, transform = _shard_tasks(shard, engine.api)
+        result = pipeline.run(shard.units, fetch, transform, progress=False).result
+
+        done = journal.completed(shard.stage, shard.start_date, shard.end_date)
+        remaining = [unit for unit in shard.units if unit not in done]
+
+    except Exception as e:
+        # 연결이 끊겼을 수 있으므로 다음 샤드에서 다시 연결
+        error = str(e)
+        remaining = list(shard.units)
+        conn = _worker.get('conn')
+        if conn is not None and not conn.closed:
+            try:
+                conn.rollback()
+                done = _worker['journal'].completed(shard.stage, shard.start_date, shard.end_date)
+                remaining = [unit for unit in shard.units if unit not in done]
+            except Exception:
+                conn.close()
+
+    return {
+        'shard': shard,
+        'result': result,
+        'remaining': remaining,
+        'error': error,
+        'calls': engine.calls - calls_before,
+    }
+
+
+# ----------------------------
+# 부모 프로세스
+# ----------------------------
+
+class BackfillRunner:
+    """샤드를 워커 프로세스 풀에 나눠 실행하고 진행률 / 재시도 관리"""
+
+    def __init__(self, processes: int = PROCESSES, api_rate: float = API_RATE, api_burst: int = API_BURST,
+                 backend_args: Tuple[int, float, float] = (0, 0.0, 0.0), cache_dir: Optional[str] = None,
+                 offline: bool = False, shard_retries: int = SHARD_RETRIES):
+        self.processes = processes
+        self.backend_args = backend_args
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.shard_retries = shard_retries
+
+        # 전체 API 예산을 프로세스 수로 나눔
+        self.rate = api_rate / processes if api_rate > 0 else 0
+        self.burst = max(1, api_burst // processes)
+
+        self.results = {stage: BulkWriteResult() for stage in STAGES}
+        self.calls = 0
+        self.retried = 0
+        self.failed: List[Shard] = []
+
+    def run(self, shards: List[Shard], tickers: List[str]):
+        """샤드 전체 실행 (실패한 샤드는 남은 단위만 다시 제출)"""
+        if not shards:
+            logger.info("✅ 백필할 샤드가 없습니다")
+            return
+
+        # fork 로 부모 DB 연결이 복제되지 않도록 spawn 사용
+        context = multiprocessing.get_context('spawn')
+        progress = context.Queue()
+        finished = queue.Queue()
+
+        pool = context.Pool(
+            self.processes, initializer=_init_worker,
+            initargs=(self.backend_args, self.rate, self.burst, self.cache_dir,
+                      self.offline, tickers, progress)
+        )
+
+        def submit(shard: Shard):
+            pool.apply_async(
+                run_shard, (shard,), callback=finished.put,
+                error_callback=lambda e: finished.put({
+                    'shard': shard, 'result': BulkWriteResult(), 'remaining': shard.units,
+                    'error': str(e), 'calls': 0
+                })
+            )
+
+        for shard in shards:
+            submit(shard)
+
+        pending = len(shards)
+        rows = 0
+        pbar = tqdm(total=sum(len(shard.units) for shard in shards), desc="백필", unit="단위")
+
+        try:
+            while pending:
+                try:
+                    outcome = finished.get(timeout=0.5)
+                except queue.Empty:
+                    outcome = None
+
+                # 워커들이 보낸 단위별 진행 상황 합치기
+                while True:
+                    try:
+                        units, saved = progress.get_nowait()
+                    except queue.Empty:
+                        break
+                    pbar.update(units)
+                    rows += saved
+
+                if outcome is not None:
+                    pending -= 1
+                    pending += self._handle(outcome, submit)
+
+                pbar.set_postfix({'records': f'{rows:,}', 'retries': self.retried, 'failed': len(self.failed)})
+
+            pool.close()
+        except KeyboardInterrupt:
+            pool.terminate()
+            raise
+        finally:
+            pbar.close()
+            pool.join()
+
+    def _handle(self, outcome: Dict, submit) -> int:
+        """샤드 결과 집계, 다시 제출한 샤드 수 반환"""
+        shard = outcome['shard']
+        self.results[shard.stage] += outcome['result']
+        self.calls += outcome['calls']
+
+        remaining = outcome['remaining']
+        if not remaining:
+            return 0
+
+        reason = outcome['error'] or f"미완료 단위 {len(remaining)}개"
+        if shard.attempt < self.shard_retries:
+            retry = shard.retry(remaining)
+            logger.warning(f"🔁 샤드 재시도 {retry.attempt}/{self.shard_retries}: {retry} - {reason}")
+            self.retried += 1
+            submit(retry)
+            return 1
+
+        logger.error(f"❌ 샤드 실패: {shard} - {reason}")
+        self.failed.append(shard.retry(remaining))
+        return 0
+
+
+def filter_completed(shards: List[Shard], journal: CheckpointJournal) -> List[Shard]:
+    """--resume: 이미 완료된 단위를 빼고, 남은 단위가 없는 샤드는 제외"""
+    completed = {}
+    remaining_shards = []
+
+    for shard in shards:
+        key = (shard.stage, shard.start_date, shard.end_date)
+        if key not in completed:
+            completed[key] = journal.completed(*key)
+
+        units = [unit for unit in shard.units if unit not in completed[key]]
+        if units:
+            shard.units = units
+            remaining_shards.append(shard)
+
+    return remaining_shards
+
+
+def parse_args():
+    """명령행 인자"""
+    parser = argparse.ArgumentParser(description="K-Stock Insight 과거 데이터 병렬 백필")
+    parser.add_argument('--start-date', default=START_DATE, help="백필 시작일 (YYYYMMDD)")
+    parser.add_argument('--end-date', default=END_DATE, help="백필 종료일 (YYYYMMDD)")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"백필할 단계 (쉼표 구분, 기본: {','.join(STAGES)})")
+    parser.add_argument('--processes', type=int, default=PROCESSES, help="워커 프로세스 수 (= DB 연결 수)")
+    parser.add_argument('--api-rate', type=float, default=API_RATE, help="전체 초당 최대 API 호출 수")
+    parser.add_argument('--api-burst', type=int, default=API_BURST, help="전체 순간 최대 API 호출 수")
+    parser.add_argument('--shard-days', type=int, default=SHARD_DAYS, help="샤드 하나의 기간 (일)")
+    parser.add_argument('--shard-tickers', type=int, default=SHARD_TICKERS, help="샤드 하나의 종목 / 업종 수")
+    parser.add_argument('--shard-retries', type=int, default=SHARD_RETRIES, help="실패한 샤드 재시도 횟수")
+    parser.add_argument('--resume', action='store_true', help="이전 실행에서 완료된 단위를 건너뜀")
+    parser.add_argument('--cache-dir', help="pykrx 응답 캐시 디렉토리 (지정 시 캐시 사용)")
+    parser.add_argument('--offline', action='store_true',
+                        help="재생 모드: 네트워크 없이 --cache-dir 캐시만 사용")
+    parser.add_argument('--fake', type=int, default=0, help="가짜 백엔드 종목 수 (0 이면 pykrx 사용)")
+    parser.add_argument('--fake-latency', type=float, default=0.0, help="가짜 API 응답 지연 (초)")
+    parser.add_argument('--fake-error-rate', type=float, default=0.0, help="가짜 API 실패 확률")
+    args = parser.parse_args()
+
+    if args.offline and not args.cache_dir:
+        parser.error("--offline 은 --cache-dir 와 함께 사용해야 합니다")
+    args.stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"알 수 없는 단계: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    """메인 실행 함수"""
+    args = parse_args()
+    started = time.time()
+
+    logger.info("🚀 K-Stock Insight 병렬 백필 시작")
+    logger.info(f"📅 백필 기간: {args.start_date} ~ {args.end_date} / 단계: {', '.join(args.stages)}")
+    logger.info(f"⚙️ 프로세스 {args.processes}개 / 전체 API 예산 초당 {args.api_rate}회")
+
+    backend_args = (args.fake, args.fake_latency, args.fake_error_rate)
+    cache = None
+    if args.cache_dir:
+        from krx_cache import ResponseCache
+        cache = ResponseCache(args.cache_dir, offline=args.offline)
+        logger.info(f"💾 응답 캐시 사용: {args.cache_dir}" + (" (재생 모드)" if args.offline else ""))
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        logger.info("✅ 데이터베이스 연결 성공")
+    except Exception as e:
+        logger.error(f"❌ 데이터베이스 연결 실패: {e}")
+        sys.exit(1)
+
+    try:
+        journal = CheckpointJournal(conn)
+        calendar = TradingCalendar(conn)
+        calendar.refresh()
+
+        # 종목 목록 / 업종 목록은 부모 프로세스에서 한 번만 조회
+        engine = FetchEngine(make_backend(*backend_args), rate=args.api_rate, burst=args.api_burst,
+                             max_retries=MAX_RETRIES, cache=cache)
+        # 현재 목록으로 상장폐지 / 재상장을 먼저 반영 (과거 목록으로는 판단하지 않음)
+        counts = sync_stocks(conn, engine.api, latest_list_date(), MARKETS)
+        conn.commit()
+        logger.info(f"✅ 종목 정보 동기화 완료 (신규 {counts['inserted']} / 변경 {counts['changed']} / "
+                    f"상장폐지 {counts['delisted']} / 재상장 {counts['relisted']})")
+
+        # 기간 중 상장돼 있던 종목 전체 (기간 중 목록에 있던 종목, 이미 상장폐지된 종목도 포함해서 생존 편향 방지)
+        tickers = sync_historical_universe(conn, engine.api, universe_dates(args.start_date, args.end_date),
+                                           MARKETS)
+        conn.commit()
+        sector_codes = []
+        if 'sector_prices' in args.stages:
+            sector_codes = engine.api.get_index_ticker_list(market="KOSPI")
+        logger.info(f"📊 대상 종목 {len(tickers):,}개 / 업종 {len(sector_codes):,}개")
+
+        shards = plan_shards(calendar, args.stages, tickers, sector_codes, args.start_date, args.end_date,
+                             args.shard_days, args.shard_tickers)
+        if args.resume:
+            shards = filter_completed(shards, journal)
+        logger.info(f"🧩 샤드 {len(shards):,}개 ({sum(len(s.units) for s in shards):,}개 단위)")
+
+        runner = BackfillRunner(args.processes, args.api_rate, args.api_burst, backend_args,
+                                args.cache_dir, args.offline, args.shard_retries)
+        runner.run(shards, tickers)
+
+        calendar.refresh()
+        if 'sector_prices' in args.stages:
+            refresh_sector_latest(conn)
+        refresh_dashboard_snapshot(conn)
+        refresh_table_stats(conn)
+        bump_data_generation(conn)
+
+        for stage in args.stages:
+            logger.info(f"✅ {stage}: {runner.results[stage]}")
+        logger.info(f"🌐 API 호출 {runner.calls + engine.calls:,}회 / 샤드 재시도 {runner.retried}회 / "
+                    f"경과 {time.time() - started:.1f}초")
+
+        if runner.failed:
+            logger.error(f"❌ 실패한 샤드 {len(runner.failed)}개, --resume 옵션으로 다시 실행할 수 있습니다")
+            for shard in runner.failed:
+                logger.error(f"  {shard}")
+        else:
+            logger.info("✅ 백필 완료!")
+
+    except KeyboardInterrupt:
+        logger.info("🛑 사용자에 의해 중단되었습니다. --resume 옵션으로 이어서 실행할 수 있습니다.")
+    finally:
+        conn.close()
+        logger.info("🔚 데이터베이스 연결 종료")
+
+
+if __name__ == "__main__":
+    main()
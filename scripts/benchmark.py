@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+수집 성능 벤치마크
+
+pykrx.stock 대신 가짜 백엔드(fake_krx.FakeKRX)를 넣고 KRXDataCollector / DataUpdater 를
+로컬 PostgreSQL 에 실제로 실행해서 단계별 성능을 측정합니다.
+- 단계별 경과 시간, 저장 레코드 수, 초당 레코드 수, API 호출 수, DB 왕복 수
+- 수집(collector): 종목 정보 → 일별 시세 → 투자자 동향 → 업종 시세 (최근 N 거래일)
+- 업데이트(updater): 마지막 K 거래일을 지운 뒤 일일 업데이트 실행
+- 결과는 ingest_reports/benchmark_history.jsonl 에 누적하고, 같은 설정의 최근 결과와 비교해서 성능 저하 표시
+
+벤치마크 전용 데이터베이스(기본 k_stock_insight_bench)를 사용하며 실행할 때마다 테이블을 비웁니다.
+DB 접속 정보는 DB_HOST / DB_PORT / DB_USER / DB_PASSWORD 환경 변수를 따릅니다.
+
+사용법:
+    python scripts/benchmark.py                                  # 기본 설정 (300종목 × 60거래일)
+    python scripts/benchmark.py --tickers 2800 --days 250 --latency 0.05
+    python scripts/benchmark.py --fail-on-regression             # 성능 저하 시 종료 코드 1 (CI용)
+"""
+
+import os
+import sys
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+
+import data_collector
+import data_updater
+from db_config import DB_CONFIG
+from fake_krx import FakeKRX
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# 🔧 설정 변수
+# ============================
+
+BENCH_DB_NAME = 'k_stock_insight_bench'
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'schema.sql')
+HISTORY_FILE = os.path.join('ingest_reports', 'benchmark_history.jsonl')  # 실행 리포트와 같은 곳 (git 추적 안 함)
+
+DEFAULT_TICKERS = 300  # 가짜 종목 수
+DEFAULT_SECTORS = 40  # 가짜 업종 수
+DEFAULT_DAYS = 60  # 수집 기간 (거래일)
+DEFAULT_UPDATE_DAYS = 1  # 업데이트로 다시 채울 마지막 거래일 수
+DEFAULT_LATENCY = 0.0  # 가짜 API 응답 지연 (초)
+
+BASELINE_RUNS = 5  # 비교할 최근 결과 수 (같은 설정)
+REGRESSION_TOLERANCE = 0.2  # 초당 레코드 수가 이 비율 이상 줄거나 호출 / 왕복 수가 늘면 성능 저하
+
+# 벤치마크가 비우는 테이블 (stocks 는 CASCADE 로 팩트 테이블까지)
+RESET_TABLES = ['stocks', 'sectors', 'sector_prices', 'ingest_checkpoints', 'trading_calendar', 'krx_holidays']
+FACT_TABLES = ['daily_prices', 'investor_trends', 'sector_prices']
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """실행한 쿼리 수(DB 왕복)를 연결에 누적하는 커서"""
+
+    def execute(self, query, vars=None):
+        self.connection.round_trips += 1
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        self.connection.round_trips += len(vars_list)
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        self.connection.round_trips += 1
+        return super().copy_expert(sql, file, size)
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    """DB 왕복 수를 세는 연결 (DB_CONFIG 의 connection_factory 로 주입)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = 0
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', CountingCursor)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        self.round_trips += 1
+        return super().commit()
+
+    def rollback(self):
+        self.round_trips += 1
+        return super().rollback()
+
+
+class StageTimer:
+    """단계 하나의 경과 시간 / API 호출 / DB 왕복 / 저장 레코드 측정"""
+
+    def __init__(self, name: str, fake: FakeKRX, owner):
+        self.name = name
+        self.fake = fake
+        self.owner = owner
+
+    def __enter__(self):
+        self.calls = self.fake.call_count
+        self.round_trips = self.owner.conn.round_trips
+        self.written = self._written()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        self.calls = self.fake.call_count - self.calls
+        self.round_trips = self.owner.conn.round_trips - self.round_trips
+        self.written = {key: value - self.written[key] for key, value in self._written().items()}
+        return False
+
+    def _written(self) -> Dict[str, int]:
+        totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        for result in self.owner.write_results.values():
+            for key, value in result.as_dict().items():
+                totals[key] += value
+        return totals
+
+    def report(self, rows: Optional[int] = None) -> Dict:
+        if rows is None:
+            rows = sum(self.written.values())
+        return {
+            'stage': self.name,
+            'seconds': round(self.elapsed, 3),
+            'rows': rows,
+            'rows_per_sec': round(rows / self.elapsed, 1) if self.elapsed > 0 else 0.0,
+            'inserted': self.written['inserted'],
+            'updated': self.written['updated'],
+            'api_calls': self.calls,
+            'db_round_trips': self.round_trips,
+        }
+
+
+def prepare_database(db_name: str):
+    """벤치마크 DB 가 없으면 만들고 스키마 적용 후 테이블 비우기"""
+    admin = psycopg2.connect(**{**DB_CONFIG, 'database': 'postgres'})
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (db_name,))
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE DATABASE "{db_name}"')
+    admin.close()
+
+    conn = psycopg2.connect(**{**DB_CONFIG, 'database': db_name})
+    with conn.cursor() as cursor:
+        with open(SCHEMA_FILE, encoding='utf-8') as f:
+            cursor.execute(f.read())
+        cursor.execute("""
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = ANY(%s)
+        """, (RESET_TABLES,))
+        existing = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"TRUNCATE {', '.join(existing)} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def configure_scripts(db_name: str, workers: int, api_rate: float, start_date: str, end_date: str):
+    """수집 / 업데이트 스크립트 설정을 벤치마크용으로 변경 (DB, 동시성, 기간)"""
+    DB_CONFIG.update({'database': db_name, 'connection_factory': CountingConnection})
+    for module in (data_collector, data_updater):
+        module.FETCH_WORKERS = workers
+        module.API_RATE = api_rate
+
+    data_collector.START_DATE = start_date
+    data_collector.END_DATE = end_date
+
+
+def run_collector(fake: FakeKRX) -> List[Dict]:
+    """초기 수집 단계별 측정"""
+    collector = data_collector.KRXDataCollector(backend=fake)
+    stages = []
+
+    try:
+        with StageTimer('collector.stocks', fake, collector) as timer:
+            counts = collector.collect_stocks_info()
+        stages.append(timer.report(rows=counts.get('inserted', 0) + counts.get('changed', 0)))
+
+        tickers = collector.get_active_tickers()
+
+        with StageTimer('collector.daily_prices', fake, collector) as timer:
+            collector.collect_daily_prices(tickers)
+        stages.append(timer.report())
+
+        with StageTimer('collector.investor_trends', fake, collector) as timer:
+            collector.collect_investor_trends(tickers)
+        stages.append(timer.report())
+
+        with StageTimer('collector.sectors', fake, collector) as timer:
+            sectors = collector.collect_sectors_info()
+            collector.save_to_db(sectors, 'sectors')
+        stages.append(timer.report(rows=len(sectors)))
+
+        with StageTimer('collector.sector_prices', fake, collector) as timer:
+            collector.collect_sector_prices()
+        stages.append(timer.report())
+
+        collector.calendar.refresh()
+    finally:
+        collector.close_db()
+
+    return stages
+
+
+def drop_recent_days(db_name: str, update_days: int) -> Optional[str]:
+    """마지막 update_days 거래일 데이터를 지워서 업데이트할 거리 만들기, 지운 첫 날짜 반환"""
+    conn = psycopg2.connect(**{**DB_CONFIG, 'database': db_name})
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT MIN(date) FROM (
+                SELECT DISTINCT date FROM daily_prices ORDER BY date DESC LIMIT %s
+            ) recent
+        """, (update_days,))
+        since = cursor.fetchone()[0]
+        if since is not None:
+            for table in FACT_TABLES:
+                cursor.execute(f"DELETE FROM {table} WHERE date >= %s", (since,))
+            cursor.execute("DELETE FROM trading_calendar WHERE date >= %s", (since,))
+    conn.commit()
+    conn.close()
+    return since.strftime('%Y%m%d') if since else None
+
+
+def run_updater(fake: FakeKRX) -> List[Dict]:
+    """일일 업데이트 단계별 측정"""
+    updater = data_updater.DataUpdater(backend=fake)
+    stages = []
+
+    try:
+        with StageTimer('updater.stocks', fake, updater) as timer:
+            counts = updater.sync_stocks()
+        stages.append(timer.report(rows=counts.get('inserted', 0) + counts.get('changed', 0)))
+
+        tickers = updater.get_stock_tickers()
+
+        with StageTimer('updater.daily_prices', fake, updater) as timer:
+            updater.update_daily_prices(tickers)
+        stages.append(timer.report())
+
+        with StageTimer('updater.investor_trends', fake, updater) as timer:
+            updater.update_investor_trends(tickers)
+        stages.append(timer.report())
+
+        with StageTimer('updater.sector_prices', fake, updater) as timer:
+            updater.update_sector_prices()
+        stages.append(timer.report())
+    finally:
+        updater.close_db()
+
+    return stages
+
+
+def git_revision() -> Optional[str]:
+    """현재 커밋 (git 이 없으면 None)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: str, config: Dict) -> List[Dict]:
+    """같은 설정으로 실행한 이전 결과 (오래된 순)"""
+    if not os.path.exists(path):
+        return []
+
+    runs = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            run = json.loads(line)
+            if run.get('config') == config:
+                runs.append(run)
+    return runs
+
+
+def find_regressions(stages: List[Dict], history: List[Dict],
+                     tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """최근 BASELINE_RUNS 개 결과의 중앙값과 비교해서 성능 저하 항목 찾기"""
+    baseline_runs = history[-BASELINE_RUNS:]
+    if not baseline_runs:
+        return []
+
+    regressions = []
+    for stage in stages:
+        previous = [s for run in baseline_runs for s in run['stages'] if s['stage'] == stage['stage']]
+        if not previous:
+            continue
+
+        rate = statistics.median(s['rows_per_sec'] for s in previous)
+        if rate > 0 and stage['rows_per_sec'] < rate * (1 - tolerance):
+            regressions.append(f"{stage['stage']}: 초당 레코드 {stage['rows_per_sec']:,.0f} (기준 {rate:,.0f})")
+
+        for metric, label in (('api_calls', 'API 호출'), ('db_round_trips', 'DB 왕복')):
+            base = statistics.median(s[metric] for s in previous)
+            if stage[metric] > base * (1 + tolerance) + 1:
+                regressions.append(f"{stage['stage']}: {label} {stage[metric]:,}회 (기준 {base:,.0f}회)")
+
+    return regressions
+
+
+def print_report(stages: List[Dict], regressions: List[str]):
+    """단계별 결과 표 출력"""
+    df = pd.DataFrame(stages).set_index('stage')
+    print()
+    print(df[['seconds', 'rows', 'rows_per_sec', 'api_calls', 'db_round_trips']].to_string())
+    print()
+
+    if regressions:
+        print("⚠️ 성능 저하:")
+        for regression in regressions:
+            print(f"  {regression}")
+    else:
+        print("✅ 이전 결과 대비 성능 저하 없음")
+
+
+def parse_args():
+    """명령행 인자"""
+    parser = argparse.ArgumentParser(description="K-Stock Insight 수집 성능 벤치마크 (가짜 pykrx)")
+    parser.add_argument('--tickers', type=int, default=DEFAULT_TICKERS, help="가짜 종목 수")
+    parser.add_argument('--sectors', type=int, default=DEFAULT_SECTORS, help="가짜 업종 수")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="수집 기간 (거래일)")
+    parser.add_argument('--update-days', type=int, default=DEFAULT_UPDATE_DAYS,
+                        help="업데이트로 다시 채울 마지막 거래일 수")
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help="가짜 API 응답 지연 (초)")
+    parser.add_argument('--workers', type=int, default=data_collector.FETCH_WORKERS, help="동시 API 호출 워커 수")
+    parser.add_argument('--api-rate', type=float, default=0, help="초당 최대 API 호출 수 (0 이면 제한 없음)")
+    parser.add_argument('--db-name', default=BENCH_DB_NAME, help="벤치마크 전용 데이터베이스 이름")
+    parser.add_argument('--history', default=HISTORY_FILE, help="결과 누적 파일 (JSON Lines)")
+    parser.add_argument('--no-save', action='store_true', help="결과를 누적 파일에 저장하지 않음")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE, help="성능 저하 판단 비율")
+    parser.add_argument('--fail-on-regression', action='store_true', help="성능 저하가 있으면 종료 코드 1")
+    parser.add_argument('--verbose', action='store_true', help="수집 스크립트 로그 출력")
+    return parser.parse_args()
+
+
+def main():
+    """메인 실행 함수"""
+    args = parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    # 어제까지 최근 N 거래일 (업데이트 단계가 어제 기준이므로)
+    end_date = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+    start_date = pd.bdate_range(end=end_date, periods=args.days)[0].strftime('%Y%m%d')
+
+    config = {
+        'tickers': args.tickers,
+        'sectors': args.sectors,
+        'days': args.days,
+        'update_days': args.update_days,
+        'latency': args.latency,
+        'workers': args.workers,
+        'api_rate': args.api_rate,
+    }
+    print(f"🏁 벤치마크: {args.tickers}종목 × {args.days}거래일 ({start_date} ~ {end_date}), "
+          f"업종 {args.sectors}개, 지연 {args.latency}초, 워커 {args.workers}개")
+
+    prepare_database(args.db_name)
+    configure_scripts(args.db_name, args.workers, args.api_rate, start_date, end_date)
+
+    fake = FakeKRX(ticker_count=args.tickers, latency=args.latency, sector_count=args.sectors)
+    started = time.perf_counter()
+
+    stages = run_collector(fake)
+    drop_recent_days(args.db_name, args.update_days)
+    stages += run_updater(fake)
+
+    history = load_history(args.history, config)
+    regressions = find_regressions(stages, history, args.tolerance)
+    print_report(stages, regressions)
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'config': config,
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'stages': stages,
+        'regressions': regressions,
+    }
+    if not args.no_save:
+        directory = os.path.dirname(args.history)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run, ensure_ascii=False) + '\n')
+        print(f"💾 결과 저장: {args.history} (같은 설정 이전 결과 {len(history)}개)")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
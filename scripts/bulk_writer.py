@@ -0,0 +1,156 @@
+"""
+대량 저장 공통 모듈
+
+data_collector.py / data_updater.py 가 함께 사용하는 팩트 테이블 저장 로직입니다.
+- DataFrame을 임시 스테이징 테이블에 COPY FROM STDIN 으로 적재
+- INSERT ... SELECT ... ON CONFLICT 한 번으로 대상 테이블에 병합
+- 신규 / 변경 / 동일 레코드 수를 집계해서 반환
+
+커밋은 호출하는 쪽에서 합니다.
+"""
+
+import io
+from typing import Dict, List
+
+import pandas as pd
+
+# 테이블별 저장 컬럼 / 키 / 정수 컬럼 정의
+TABLE_SPECS = {
+    'daily_prices': {
+        'columns': ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume'],
+        'keys': ['ticker', 'date'],
+        'int_columns': ['open', 'high', 'low', 'close', 'volume'],
+    },
+    'investor_trends': {
+        'columns': ['ticker', 'date', 'investor_type', 'buy_value', 'sell_value', 'net_value'],
+        'keys': ['ticker', 'date', 'investor_type'],
+        'int_columns': ['buy_value', 'sell_value', 'net_value'],
+    },
+    'sector_prices': {
+        'columns': ['sector_code', 'sector_name', 'date', 'open', 'high', 'low', 'close', 'volume'],
+        'keys': ['sector_code', 'date'],
+        'int_columns': ['open', 'high', 'low', 'close', 'volume'],
+    },
+}
+
+# 한 번에 스테이징할 최대 행 수
+COPY_BATCH_SIZE = 50000
+
+
+class BulkWriteResult:
+    """대량 저장 결과 (신규 / 변경 / 동일 레코드 수)"""
+
+    def __init__(self, inserted: int = 0, updated: int = 0, unchanged: int = 0):
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    def __add__(self, other: 'BulkWriteResult') -> 'BulkWriteResult':
+        return BulkWriteResult(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.unchanged + other.unchanged
+        )
+
+    def as_dict(self) -> Dict[str, int]:
+        return {'inserted': self.inserted, 'updated': self.updated, 'unchanged': self.unchanged}
+
+    def __str__(self) -> str:
+        return f"신규 {self.inserted:,} / 변경 {self.updated:,} / 동일 {self.unchanged:,}"
+
+
+def _prepare_frame(df: pd.DataFrame, spec: Dict) -> pd.DataFrame:
+    """저장 컬럼만 남기고 키 중복 제거, 정수 컬럼 타입 정리"""
+    df = df[spec['columns']].drop_duplicates(subset=spec['keys'], keep='last')
+    df = df.copy()
+
+    # NaN이 섞인 정수 컬럼이 '123.0' 으로 COPY 되지 않도록 nullable 정수로 변환
+    for column in spec['int_columns']:
+        df[column] = pd.to_numeric(df[column]).round().astype('Int64')
+
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+
+    return df
+
+
+def _merge_query(table: str, stage: str, spec: Dict) -> str:
+    """스테이징 테이블 → 대상 테이블 병합 쿼리 (변경 없는 행은 UPDATE 생략)"""
+    columns = ', '.join(spec['columns'])
+    keys = ', '.join(spec['keys'])
+    values = [c for c in spec['columns'] if c not in spec['keys']]
+
+    set_clause = ', '.join(f"{c} = EXCLUDED.{c}" for c in values)
+    current = ', '.join(f"{table}.{c}" for c in values)
+    incoming = ', '.join(f"EXCLUDED.{c}" for c in values)
+
+    return f"""
+        WITH merged AS (
+            INSERT INTO {table} ({columns})
+            SELECT {columns} FROM {stage}
+            ON CONFLICT ({keys}) DO UPDATE SET {set_clause}
+            WHERE ({current}) IS DISTINCT FROM ({incoming})
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM merged
+    """
+
+
+def bulk_upsert(conn, table: str, df: pd.DataFrame,
+                batch_size: int = COPY_BATCH_SIZE) -> BulkWriteResult:
+    """DataFrame을 COPY + 스테이징 병합으로 팩트 테이블에 저장"""
+    if table not in TABLE_SPECS:
+        raise ValueError(f"대량 저장을 지원하지 않는 테이블입니다: {table}")
+
+    result = BulkWriteResult()
+    if df.empty:
+        return result
+
+    spec = TABLE_SPECS[table]
+    stage = f"_stage_{table}"
+    df = _prepare_frame(df, spec)
+    columns = ', '.join(spec['columns'])
+    merge_query = _merge_query(table, stage, spec)
+
+    cursor = conn.cursor()
+
+    # 실패해도 같은 트랜잭션의 앞선 저장분은 살리도록 세이브포인트 사용
+    cursor.execute("SAVEPOINT bulk_upsert")
+    try:
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {stage}
+            (LIKE {table} INCLUDING DEFAULTS)
+        """)
+
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+
+            buffer = io.StringIO()
+            batch.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+
+            cursor.execute(f"TRUNCATE {stage}")
+            cursor.copy_expert(f"COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+            cursor.execute(merge_query)
+            inserted, updated = cursor.fetchone()
+            result += BulkWriteResult(inserted, updated, len(batch) - inserted - updated)
+
+        cursor.execute("RELEASE SAVEPOINT bulk_upsert")
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT bulk_upsert")
+        raise
+    finally:
+        cursor.close()
+
+    return result
+
+
+def records_to_frame(records: List[Dict], table: str) -> pd.DataFrame:
+    """dict 리스트를 테이블 컬럼 순서의 DataFrame으로 변환"""
+    return pd.DataFrame.from_records(records, columns=TABLE_SPECS[table]['columns'])
@@ -0,0 +1,53 @@
+"""
+수집 진행 기록 (체크포인트 저널)
+
+완료된 작업 단위 (stage, unit, 기간)를 ingest_checkpoints 테이블에 기록합니다.
+- 데이터 저장과 같은 트랜잭션에서 기록하므로 커밋된 데이터와 기록이 항상 일치
+- --resume 실행 시 이미 끝난 단위는 건너뜀
+- 종료일을 따로 주지 않은 --resume 은 같은 시작일로 마지막에 기록된 기간을 이어 받음
+  (종료일 기본값이 "어제"라서 다음 날 이어서 실행해도 중단된 실행과 같은 기간으로 맞춤)
+
+unit 은 단계마다 다릅니다: 종목 코드, 업종 코드, 날짜 단위 수집이면 날짜(YYYYMMDD), 단계 전체면 'ALL'.
+"""
+
+from typing import Optional, Set
+
+UNIT_ALL = 'ALL'
+
+
+class CheckpointJournal:
+    """ingest_checkpoints 테이블 기반 진행 기록"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def completed(self, stage: str, start_date: str, end_date: str) -> Set[str]:
+        """해당 단계·기간에 이미 완료된 unit 목록"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT unit FROM ingest_checkpoints
+                WHERE stage = %s AND start_date = %s AND end_date = %s
+            """, (stage, start_date, end_date))
+            return {row[0] for row in cursor.fetchall()}
+
+    def last_end_date(self, start_date: str) -> Optional[str]:
+        """같은 시작일로 마지막에 기록된 실행의 종료일 (YYYYMMDD, 기록이 없으면 None)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT end_date FROM ingest_checkpoints
+                WHERE start_date = %s
+                ORDER BY completed_at DESC
+                LIMIT 1
+            """, (start_date,))
+            row = cursor.fetchone()
+            return row[0].strftime('%Y%m%d') if row else None
+
+    def mark_done(self, stage: str, unit: str, start_date: str, end_date: str, rows: int = 0):
+        """unit 완료 기록 (커밋은 데이터 저장과 함께 호출하는 쪽에서)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO ingest_checkpoints (stage, unit, start_date, end_date, rows_written)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (stage, unit, start_date, end_date) DO UPDATE SET
+                rows_written = EXCLUDED.rows_written, completed_at = CURRENT_TIMESTAMP
+            """, (stage, unit, start_date, end_date, rows))
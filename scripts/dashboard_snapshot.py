@@ -0,0 +1,137 @@
+"""
+대시보드 스냅샷 (dashboard_snapshot 테이블)
+
+/api/dashboard 가 페이지를 열 때마다 MAX(date) 서브쿼리, daily_prices × stocks 조인,
+investor_trends 최근 N 거래일 GROUP BY 를 다시 계산하지 않도록 결과를 JSON 하나로 미리 저장합니다.
+- 시장 통계 (전체 / KOSPI / KOSDAQ 종목 수)
+- 마지막 거래일 거래량 상위 종목
+- 최근 N 거래일 순매수 상위 종목 (전체 + 투자자 유형별)
+
+데이터 업데이트가 끝날 때 한 번 다시 계산하고, API 는 기본키로 한 행만 읽습니다.
+
+사용법:
+    python scripts/dashboard_snapshot.py       # 직접 다시 계산
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from psycopg2.extras import Json, RealDictCursor
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = 'dashboard'
+
+# 순매수 집계 기간 (거래일 수, trading_calendar 기준 / backend/main.py 와 동일)
+DASHBOARD_TRADING_DAYS = 5
+
+# 목록별 종목 수
+TOP_N = 10
+
+
+def build_dashboard_snapshot(conn, trading_days: int = DASHBOARD_TRADING_DAYS, top_n: int = TOP_N) -> Dict[str, Any]:
+    """대시보드 응답 계산 (/api/dashboard 와 같은 구조)"""
+    snapshot = {}
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        # 주요 통계
+        cursor.execute("""
+            SELECT
+                COUNT(*) as total_stocks,
+                COUNT(CASE WHEN market = 'KOSPI' THEN 1 END) as kospi_stocks,
+                COUNT(CASE WHEN market = 'KOSDAQ' THEN 1 END) as kosdaq_stocks
+            FROM stocks
+        """)
+        snapshot['market_stats'] = dict(cursor.fetchone())
+
+        # 마지막 거래일 거래량 상위 종목
+        cursor.execute("SELECT MAX(date) AS latest FROM daily_prices")
+        latest = cursor.fetchone()['latest']
+        cursor.execute("""
+            SELECT s.ticker, s.name, dp.close, dp.volume, dp.date
+            FROM daily_prices dp
+            JOIN stocks s ON dp.ticker = s.ticker
+            WHERE dp.date = %s
+            ORDER BY dp.volume DESC
+            LIMIT %s
+        """, (latest, top_n))
+        snapshot['top_volume_stocks'] = [dict(row) for row in cursor.fetchall()]
+
+        # 최근 N 거래일 순매수 상위 (투자자 유형별 top_n, 전체 top_n 은 그 안에 모두 포함됨)
+        cursor.execute("""
+            WITH period AS (
+                SELECT COALESCE(
+                    -- 최근 N 거래일의 첫날 (거래일 달력이 비어 있으면 최근 7일)
+                    (SELECT MIN(date) FROM (
+                        SELECT date FROM trading_calendar
+                        WHERE date <= (SELECT MAX(date) FROM investor_trends)
+                        ORDER BY date DESC
+                        LIMIT %s
+                    ) recent),
+                    (SELECT MAX(date) - 7 FROM investor_trends)
+                ) AS start_date
+            ), totals AS (
+                SELECT ticker, investor_type, SUM(net_value)::bigint AS total_net_value
+                FROM investor_trends
+                WHERE date >= (SELECT start_date FROM period)
+                GROUP BY ticker, investor_type
+                HAVING SUM(net_value) > 0
+            ), ranked AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY investor_type ORDER BY total_net_value DESC) AS rn
+                FROM totals
+            )
+            SELECT r.ticker, s.name, r.investor_type, r.total_net_value
+            FROM ranked r
+            JOIN stocks s ON r.ticker = s.ticker
+            WHERE r.rn <= %s
+            ORDER BY r.total_net_value DESC
+        """, (trading_days, top_n))
+        purchases = [dict(row) for row in cursor.fetchall()]
+
+    by_investor = {}
+    for row in purchases:
+        by_investor.setdefault(row['investor_type'], []).append(row)
+
+    snapshot['top_net_purchases'] = purchases[:top_n]
+    snapshot['top_net_purchases_by_investor'] = by_investor
+    snapshot['as_of'] = latest.isoformat() if latest else None
+    snapshot['generated_at'] = datetime.now().isoformat(timespec='seconds')
+    return snapshot
+
+
+def refresh_dashboard_snapshot(conn, trading_days: int = DASHBOARD_TRADING_DAYS,
+                               top_n: int = TOP_N) -> Dict[str, Any]:
+    """스냅샷 다시 계산 후 저장"""
+    snapshot = build_dashboard_snapshot(conn, trading_days, top_n)
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO dashboard_snapshot (name, payload, as_of, generated_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET
+            payload = EXCLUDED.payload, as_of = EXCLUDED.as_of, generated_at = EXCLUDED.generated_at
+        """, (SNAPSHOT_NAME, Json(snapshot, dumps=lambda value: json.dumps(value, default=str)),
+              snapshot['as_of']))
+    conn.commit()
+    return snapshot
+
+
+def main():
+    """스냅샷 다시 계산"""
+    from data_generation import bump_data_generation
+    from db_config import connect
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    conn = connect()
+    try:
+        snapshot = refresh_dashboard_snapshot(conn)
+        logger.info(f"📊 대시보드 스냅샷 갱신 (기준일 {snapshot['as_of']})")
+        bump_data_generation(conn)  # API 응답 캐시 무효화
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,20 +11,27 @@ pykrx를 사용해서 한국 주식 시장 데이터를 수집하고 PostgreSQL
 
 Features:
 - 진행률 실시간 표시 (tqdm)
-- 중간 저장 결과 체크
-- 배치별 커밋으로 안정성 확보
+- API 조회 / 변환 / DB 저장을 동시에 진행하는 파이프라인 (pipeline.py)
+- 행 수·시간 기준 배치 커밋으로 안정성 확보
 - 에러 처리 및 재시도
 - 설정 가능한 수집 기간
+- 중단 후 이어서 수집 (--resume)
+- 단계별 계측 리포트 (JSON, 선택적으로 Prometheus textfile)
+
+사용법:
+    python scripts/data_collector.py
+    python scripts/data_collector.py --resume
+    python scripts/data_collector.py --start-date 20240101 --end-date 20241231 --resume
+    python scripts/data_collector.py --prometheus-textfile /var/lib/node_exporter/kstock_collector.prom
 """
 
-import os
 import sys
+import argparse
 import pandas as pd
 import psycopg2
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict
 import logging
-import time
 from tqdm import tqdm
 
 # pykrx 모듈 import
@@ -34,6 +41,26 @@ except ImportError:
     print("pykrx 모듈이 설치되지 않았습니다. 'pip install pykrx' 명령어로 설치해주세요.")
     sys.exit(1)
 
+from price_fetch import (
+    MODE_AUTO, MODE_BY_DATE, choose_fetch_mode, fetch_market_frames,
+    fetch_sector_frame, fetch_ticker_frame, prices_from_market_frames, prices_from_ticker_frame,
+    sector_prices_from_frame
+)
+from db_config import DB_CONFIG
+from bulk_writer import TABLE_SPECS, BulkWriteResult
+from investor_fetch import fetch_investor_values, melt_investor_values
+from pipeline import IngestPipeline, PipelineStats
+from fetch_engine import FetchEngine
+from checkpoint import UNIT_ALL, CheckpointJournal
+from stock_universe import sync_stocks
+from trading_calendar import TradingCalendar
+from ingest_metrics import RunMetrics
+from data_validation import BatchValidator
+from sector_latest import refresh_sector_latest
+from dashboard_snapshot import refresh_dashboard_snapshot
+from data_generation import bump_data_generation
+from table_stats import refresh_table_stats
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -53,32 +80,39 @@ logger = logging.getLogger(__name__)
 START_DATE = '20250101'  # 2025년 1월 1일부터
 END_DATE = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')  # 어제까지
 
-# 데이터베이스 연결 설정
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': os.getenv('DB_PORT', '5432'),
-    'database': os.getenv('DB_NAME', 'k_stock_insight'),
-    'user': os.getenv('DB_USER', 'hhhhp'),
-    'password': os.getenv('DB_PASSWORD', '')
-}
-
 # 수집할 시장 구분
 MARKETS = ['KOSPI', 'KOSDAQ']
 
 # 처리 설정
-BATCH_SIZE = 50  # 배치 크기 (메모리 사용량 조절)
-CHECK_INTERVAL = 100  # 100개마다 저장 상태 체크
+COMMIT_ROWS = 50000  # 이만큼 행이 모이면 저장 후 커밋
+COMMIT_SECONDS = 5  # 저장 대기 중인 데이터가 있으면 이 시간마다 커밋 (초)
+QUEUE_SIZE = 32  # 파이프라인 단계 사이 큐 크기 (메모리 사용량 조절)
 MAX_RETRIES = 3  # 최대 재시도 횟수
+FETCH_WORKERS = 4  # 동시 API 호출 워커 수
+API_RATE = 2  # 초당 최대 API 호출 수 (토큰 버킷)
+API_BURST = 4  # 순간 최대 API 호출 수
+PRICE_FETCH_MODE = MODE_AUTO  # 시세 수집 모드 ('auto', 'ticker', 'date')
 
 class KRXDataCollector:
-    def __init__(self):
+    def __init__(self, backend=None, resume: bool = False, cache=None):
         self.conn = None
         self.cursor = None
+        self.resume = resume
         self.total_processed = 0
         self.total_saved = 0
         self.total_failed = 0
         self.start_time = None
+        self.write_results = {table: BulkWriteResult() for table in TABLE_SPECS}
+        self.metrics = RunMetrics('collector')
+        self.engine = FetchEngine(
+            backend or stock, workers=FETCH_WORKERS, rate=API_RATE,
+            burst=API_BURST, max_retries=MAX_RETRIES, cache=cache, metrics=self.metrics
+        )
         self.connect_db()
+        self.journal = CheckpointJournal(self.conn)
+        self.calendar = TradingCalendar(self.conn)
+        self.calendar.refresh()
+        self.validator = BatchValidator(self.conn, self.calendar)
         
     def connect_db(self):
         """PostgreSQL 데이터베이스 연결"""
@@ -96,43 +130,48 @@ class KRXDataCollector:
             self.conn.close()
             logger.info("🔚 데이터베이스 연결 종료")
     
-    def collect_stocks_info(self) -> pd.DataFrame:
-        """1. 상장 종목 정보 수집"""
-        logger.info("📊 상장 종목 정보 수집 시작...")
+    def pending_units(self, stage: str, units: List[str]) -> List[str]:
+        """--resume 실행 시 이미 완료된 단위를 제외한 목록"""
+        if not self.resume:
+            return list(units)
         
-        all_stocks = []
+        done = self.journal.completed(stage, START_DATE, END_DATE)
+        remaining = [unit for unit in units if unit not in done]
         
-        for market in MARKETS:
-            try:
-                # 종목 코드 리스트 가져오기
-                tickers = stock.get_market_ticker_list(market=market)
-                logger.info(f"{market} 종목 수: {len(tickers)}개")
-                
-                for ticker in tqdm(tickers, desc=f"{market} 종목 정보"):
-                    try:
-                        # 종목명 가져오기
-                        name = stock.get_market_ticker_name(ticker)
-                        
-                        all_stocks.append({
-                            'ticker': ticker,
-                            'name': name,
-                            'market': market,
-                            'listed_date': None  # pykrx에서 직접 제공하지 않음
-                        })
-                        
-                    except Exception as e:
-                        logger.warning(f"종목 {ticker} 정보 수집 실패: {e}")
-                        continue
-                        
-            except Exception as e:
-                logger.error(f"{market} 종목 리스트 수집 실패: {e}")
-                continue
-        
-        df = pd.DataFrame(all_stocks)
-        logger.info(f"총 {len(df)}개 종목 정보 수집 완료")
-        return df
+        if len(remaining) < len(units):
+            logger.info(f"⏭️ {stage}: 이미 완료된 {len(units) - len(remaining):,}개 단위 건너뜀")
+        return remaining
+    
+    def collect_stocks_info(self) -> Dict[str, int]:
+        """1. 상장 종목 정보 동기화 (시장별 1회 호출, 바뀐 종목만 저장)"""
+        logger.info("📊 상장 종목 정보 동기화 시작...")
+        
+        try:
+            counts = sync_stocks(self.conn, self.engine.api, END_DATE, MARKETS)
+            self.journal.mark_done('stocks', UNIT_ALL, START_DATE, END_DATE,
+                                   counts['inserted'] + counts['changed'])
+            self.conn.commit()
+            self.metrics.record_rows(
+                units=1, fetched=counts['inserted'] + counts['changed'] + counts['unchanged'],
+                inserted=counts['inserted'], updated=counts['changed'] + counts['delisted'] + counts['relisted'],
+                unchanged=counts['unchanged']
+            )
+            logger.info(f"✅ 종목 정보 동기화 완료 (신규 {counts['inserted']} / 변경 {counts['changed']} / "
+                        f"상장폐지 {counts['delisted']} / 재상장 {counts['relisted']} / 동일 {counts['unchanged']})")
+            return counts
+            
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure(UNIT_ALL, e)
+            logger.error(f"❌ 종목 정보 동기화 실패: {e}")
+            return {}
     
-    def collect_daily_prices(self, tickers: List[str]) -> int:
+    def get_active_tickers(self) -> List[str]:
+        """상장 중인 종목 리스트 (상장폐지 종목 제외)"""
+        self.cursor.execute("SELECT ticker FROM stocks WHERE delisted_date IS NULL ORDER BY ticker")
+        return [row[0] for row in self.cursor.fetchall()]
+    
+    def collect_daily_prices(self, tickers: List[str], mode: str = PRICE_FETCH_MODE) -> int:
         """2. 일별 시세 데이터 수집 (전체 종목)"""
         logger.info("📈 일별 시세 데이터 수집 시작...")
         
@@ -143,122 +182,55 @@ class KRXDataCollector:
         
         logger.info(f"📅 수집 기간: {START_DATE} ~ {END_DATE} ({period_days}일)")
         
-        self.start_time = time.time()
-        total_saved_records = 0
-        processed_count = 0
-        batch_saved = 0
+        # 종목 수와 기간으로 수집 모드 결정
+        mode = choose_fetch_mode(len(tickers), START_DATE, END_DATE, len(MARKETS), mode,
+                                 days=self.calendar.trading_days(START_DATE, END_DATE))
+        logger.info(f"🧭 시세 수집 모드: {mode}")
         
-        # 진행률 표시를 위한 tqdm 사용
-        pbar = tqdm(tickers, desc="시세 데이터 수집", unit="종목")
+        if mode == MODE_BY_DATE:
+            return self.collect_daily_prices_by_date(tickers)
         
-        for ticker in pbar:
-            try:
-                # 종목별 OHLCV 데이터 수집
-                df = stock.get_market_ohlcv_by_date(START_DATE, END_DATE, ticker)
-                
-                if not df.empty:
-                    df = df.reset_index()
-                    df['ticker'] = ticker
-                    
-                    # 컬럼명 매핑
-                    df.rename(columns={
-                        '날짜': 'date',
-                        '시가': 'open',
-                        '고가': 'high', 
-                        '저가': 'low',
-                        '종가': 'close',
-                        '거래량': 'volume'
-                    }, inplace=True)
-                    
-                    # DB 저장
-                    saved_count = 0
-                    for _, row in df.iterrows():
-                        query = """
-                        INSERT INTO daily_prices (ticker, date, open, high, low, close, volume) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s) 
-                        ON CONFLICT (ticker, date) DO UPDATE SET 
-                        open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low, 
-                        close = EXCLUDED.close, volume = EXCLUDED.volume
-                        """
-                        
-                        self.cursor.execute(query, (
-                            row['ticker'], row['date'], row['open'], 
-                            row['high'], row['low'], row['close'], row['volume']
-                        ))
-                        saved_count += 1
-                    
-                    total_saved_records += saved_count
-                    batch_saved += saved_count
-                    
-                    # tqdm 설명 업데이트
-                    pbar.set_postfix({
-                        'records': f'{total_saved_records:,}',
-                        'failed': self.total_failed
-                    })
-                    
-                else:
-                    self.total_failed += 1
-                
-                processed_count += 1
-                
-                # 배치마다 커밋
-                if processed_count % BATCH_SIZE == 0:
-                    self.conn.commit()
-                    logger.info(f"💾 배치 커밋: {batch_saved}개 레코드 저장")
-                    batch_saved = 0
-                
-                # 주기적 진행 상황 체크
-                if processed_count % CHECK_INTERVAL == 0:
-                    self.check_progress(processed_count, len(tickers), total_saved_records)
-                    
-            except Exception as e:
-                self.total_failed += 1
-                logger.warning(f"종목 {ticker} 시세 수집 실패: {e}")
-                continue
-        
-        # 최종 커밋
-        self.conn.commit()
+        tickers = self.pending_units('daily_prices', tickers)
         
-        logger.info(f"✅ 총 {total_saved_records:,}개 시세 데이터 저장 완료!")
-        return total_saved_records
+        # 종목별 OHLCV 조회 → 변환 → 저장 파이프라인
+        stats = self.run_pipeline(
+            'daily_prices', tickers,
+            fetch=lambda ticker: fetch_ticker_frame(self.engine.api, ticker, START_DATE, END_DATE),
+            transform=prices_from_ticker_frame,
+            desc="시세 데이터 수집", unit="종목"
+        )
+        return stats.rows
     
-    def check_progress(self, processed: int, total: int, saved_records: int):
-        """진행률 및 저장 상태 체크"""
-        elapsed_time = time.time() - self.start_time
-        progress_percent = (processed / total) * 100
-        
-        # 예상 완료 시간 계산
-        if processed > 0:
-            avg_time_per_ticker = elapsed_time / processed
-            remaining_tickers = total - processed
-            estimated_remaining = remaining_tickers * avg_time_per_ticker
-            
-            logger.info(f"📈 진행률: {processed}/{total} ({progress_percent:.1f}%)")
-            logger.info(f"⏱️ 경과 시간: {elapsed_time/60:.1f}분")
-            logger.info(f"🕐 예상 남은 시간: {estimated_remaining/60:.1f}분")
-            logger.info(f"💾 저장된 레코드: {saved_records:,}개")
-            logger.info(f"❌ 실패한 종목: {self.total_failed}개")
-        
-        # 현재 DB 상태 확인
-        self.cursor.execute("SELECT COUNT(*) FROM daily_prices")
-        total_db_records = self.cursor.fetchone()[0]
-        
-        # 최근 저장된 종목들
-        self.cursor.execute("""
-            SELECT ticker, COUNT(*) as records, MAX(date) as latest_date
-            FROM daily_prices 
-            GROUP BY ticker 
-            ORDER BY MAX(created_at) DESC 
-            LIMIT 5
-        """)
-        
-        recent_data = self.cursor.fetchall()
-        logger.info(f"🗄️ DB 총 레코드: {total_db_records:,}개")
-        logger.info("📅 최근 저장된 종목들:")
-        for ticker, records, latest_date in recent_data:
-            logger.info(f"  - {ticker}: {records}개, 최신일 {latest_date}")
-        
-        logger.info("-" * 50)
+    def collect_daily_prices_by_date(self, tickers: List[str]) -> int:
+        """2-1. 날짜 단위 시세 수집 (날짜·시장별 1회 호출로 전 종목 조회)"""
+        dates = self.pending_units('daily_prices', self.calendar.trading_days(START_DATE, END_DATE))
+        ticker_set = set(tickers)
+        
+        # 휴장일은 빈 결과로 저장 없이 완료 처리
+        stats = self.run_pipeline(
+            'daily_prices', dates,
+            fetch=lambda date: fetch_market_frames(self.engine.api, date, MARKETS),
+            transform=lambda date, frames: prices_from_market_frames(date, frames, ticker_set),
+            desc="시세 데이터 수집 (날짜별)", unit="일"
+        )
+        return stats.rows
+    
+    def run_pipeline(self, table_name: str, units: List[str], fetch, transform,
+                     desc: str, unit: str) -> PipelineStats:
+        """조회 → 변환 → 저장 파이프라인 실행 (저장한 단위는 같은 트랜잭션에 체크포인트 기록)"""
+        pipeline = IngestPipeline(
+            self.engine, self.conn, table_name, queue_size=QUEUE_SIZE,
+            batch_rows=COMMIT_ROWS, batch_seconds=COMMIT_SECONDS,
+            on_saved=lambda done, rows: self.journal.mark_done(table_name, done, START_DATE, END_DATE, rows),
+            validator=self.validator
+        )
+        stats = pipeline.run(units, fetch, transform, desc=desc, unit=unit)
+        
+        self.write_results[table_name] += stats.result
+        self.metrics.record_pipeline(stats)
+        self.total_failed += stats.failed
+        logger.info(f"✅ {table_name} 저장 완료: {stats}")
+        return stats
     
     def collect_investor_trends(self, tickers: List[str]) -> int:
         """3. 투자자 동향 데이터 수집"""
@@ -271,160 +243,60 @@ class KRXDataCollector:
         
         logger.info(f"📅 수집 기간: {START_DATE} ~ {END_DATE} ({period_days}일)")
         
-        total_saved_records = 0
-        processed_count = 0
-        batch_saved = 0
-        
-        # 진행률 표시를 위한 tqdm 사용
-        pbar = tqdm(tickers, desc="투자자 동향 수집", unit="종목")
-        
-        for ticker in pbar:
-            try:
-                # 투자자별 거래 데이터 수집
-                df = stock.get_market_net_purchases_of_equities_by_ticker(START_DATE, END_DATE, ticker)
-                
-                if not df.empty:
-                    df = df.reset_index()
-                    df['ticker'] = ticker
-                    
-                    # 컬럼명 확인 및 매핑
-                    logger.debug(f"투자자 동향 데이터 컬럼: {list(df.columns)}")
-                    
-                    # pykrx 컬럼명을 DB 컬럼명으로 매핑
-                    column_mapping = {
-                        '날짜': 'date',
-                        '기관계': 'institution_net',
-                        '기타법인': 'other_corp_net', 
-                        '개인': 'individual_net',
-                        '외국인계': 'foreign_net',
-                        '전체': 'total_net'
-                    }
-                    
-                    # 실제 존재하는 컬럼만 매핑
-                    existing_mapping = {k: v for k, v in column_mapping.items() if k in df.columns}
-                    df.rename(columns=existing_mapping, inplace=True)
-                    
-                    # DB 저장
-                    saved_count = 0
-                    for _, row in df.iterrows():
-                        # 기본값 설정
-                        data_dict = {
-                            'ticker': row['ticker'],
-                            'date': row.get('date', row.name if 'date' not in row else None),
-                            'foreign_buy': 0,
-                            'foreign_sell': 0,
-                            'foreign_net': row.get('foreign_net', 0),
-                            'institution_buy': 0,
-                            'institution_sell': 0, 
-                            'institution_net': row.get('institution_net', 0),
-                            'individual_buy': 0,
-                            'individual_sell': 0,
-                            'individual_net': row.get('individual_net', 0)
-                        }
-                        
-                        query = """
-                        INSERT INTO investor_trends 
-                        (ticker, date, foreign_buy, foreign_sell, foreign_net, 
-                         institution_buy, institution_sell, institution_net,
-                         individual_buy, individual_sell, individual_net) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
-                        ON CONFLICT (ticker, date) DO UPDATE SET 
-                        foreign_net = EXCLUDED.foreign_net,
-                        institution_net = EXCLUDED.institution_net,
-                        individual_net = EXCLUDED.individual_net
-                        """
-                        
-                        try:
-                            self.cursor.execute(query, (
-                                data_dict['ticker'], data_dict['date'],
-                                data_dict['foreign_buy'], data_dict['foreign_sell'], data_dict['foreign_net'],
-                                data_dict['institution_buy'], data_dict['institution_sell'], data_dict['institution_net'],
-                                data_dict['individual_buy'], data_dict['individual_sell'], data_dict['individual_net']
-                            ))
-                            saved_count += 1
-                        except Exception as e:
-                            logger.warning(f"종목 {ticker} 날짜 {data_dict['date']} 저장 실패: {e}")
-                            continue
-                    
-                    total_saved_records += saved_count
-                    batch_saved += saved_count
-                    
-                    # tqdm 설명 업데이트
-                    pbar.set_postfix({
-                        'records': f'{total_saved_records:,}',
-                        'failed': self.total_failed
-                    })
-                    
-                else:
-                    self.total_failed += 1
-                
-                processed_count += 1
-                
-                # 배치마다 커밋
-                if processed_count % BATCH_SIZE == 0:
-                    self.conn.commit()
-                    logger.info(f"💾 투자자 동향 배치 커밋: {batch_saved}개 레코드 저장")
-                    batch_saved = 0
-                
-                # 주기적 진행 상황 체크
-                if processed_count % CHECK_INTERVAL == 0:
-                    self.check_investor_progress(processed_count, len(tickers), total_saved_records)
-                    
-            except Exception as e:
-                self.total_failed += 1
-                logger.warning(f"종목 {ticker} 투자자 동향 수집 실패: {e}")
-                continue
-        
-        # 최종 커밋
-        self.conn.commit()
+        tickers = self.pending_units('investor_trends', tickers)
         
-        logger.info(f"✅ 총 {total_saved_records:,}개 투자자 동향 데이터 저장 완료!")
-        return total_saved_records
-    
-    def check_investor_progress(self, processed: int, total: int, saved_records: int):
-        """투자자 동향 수집 진행률 체크"""
-        progress_percent = (processed / total) * 100
-        
-        logger.info(f"👥 투자자 동향 진행률: {processed}/{total} ({progress_percent:.1f}%)")
-        logger.info(f"💾 저장된 투자자 동향 레코드: {saved_records:,}개")
-        
-        # 현재 DB 상태 확인
-        self.cursor.execute("SELECT COUNT(*) FROM investor_trends")
-        total_db_records = self.cursor.fetchone()[0]
-        
-        logger.info(f"🗄️ 투자자 동향 DB 총 레코드: {total_db_records:,}개")
-        logger.info("-" * 50)
+        # 투자자별 매수 / 매도 조회 → 긴 표로 변환 → 저장 파이프라인
+        stats = self.run_pipeline(
+            'investor_trends', tickers,
+            fetch=lambda ticker: fetch_investor_values(self.engine.api, ticker, START_DATE, END_DATE),
+            transform=lambda ticker, values: melt_investor_values(ticker, *values),
+            desc="투자자 동향 수집", unit="종목"
+        )
+        return stats.rows
     
     def collect_sectors_info(self) -> pd.DataFrame:
-        """4. 섹터(업종) 정보 수집"""
+        """4. 섹터(업종) 정보 + 구성 종목 수집"""
         logger.info("🏢 섹터 정보 수집 시작...")
         
         all_sectors = []
         
         try:
             # 업종 지수 리스트 가져오기
-            sector_codes = stock.get_index_ticker_list(market="KOSPI")
+            sector_codes = self.engine.api.get_index_ticker_list(market="KOSPI")
             
-            for sector_code in tqdm(sector_codes, desc="섹터 정보 수집"):
-                try:
-                    # 섹터명 가져오기
-                    sector_name = stock.get_index_ticker_name(sector_code)
-                    
-                    all_sectors.append({
-                        'sector_code': sector_code,
-                        'sector_name': sector_name,
-                        'ticker': None  # 구성종목은 별도 처리
-                    })
-                        
-                except Exception as e:
-                    logger.warning(f"섹터 {sector_code} 정보 수집 실패: {e}")
+            # 섹터명 / 구성 종목 가져오기 (stocks 테이블에 있는 종목만, 외래키 보호)
+            api = self.engine.api
+            results = self.engine.map(
+                lambda code: (api.get_index_ticker_name(code), api.get_index_portfolio_deposit_file(code)),
+                sector_codes
+            )
+            self.cursor.execute("SELECT ticker FROM stocks")
+            known = {row[0] for row in self.cursor.fetchall()}
+            
+            for sector_code, info, error in tqdm(results, total=len(sector_codes), desc="섹터 정보 수집"):
+                if error:
+                    self.metrics.record_failure(sector_code, error)
+                    logger.warning(f"섹터 {sector_code} 정보 수집 실패: {error}")
                     continue
+                
+                sector_name, constituents = info
+                all_sectors.append({
+                    'sector_code': sector_code,
+                    'sector_name': sector_name,
+                    'ticker': None  # 업종 자체 (구성 종목이 없어도 이름은 남김)
+                })
+                all_sectors.extend(
+                    {'sector_code': sector_code, 'sector_name': sector_name, 'ticker': ticker}
+                    for ticker in sorted(set(constituents) & known)
+                )
                     
         except Exception as e:
+            self.metrics.record_failure(UNIT_ALL, e)
             logger.error(f"섹터 리스트 수집 실패: {e}")
         
         df = pd.DataFrame(all_sectors)
-        logger.info(f"총 {len(df)}개 섹터 데이터 수집 완료")
+        if not df.empty:
+            logger.info(f"총 {df['sector_code'].nunique()}개 섹터 / 구성 종목 {df['ticker'].notna().sum():,}개 수집 완료")
         return df
     
     def collect_sector_prices(self) -> int:
@@ -437,74 +309,69 @@ class KRXDataCollector:
         
         logger.info(f"📅 수집 기간: {START_DATE} ~ {END_DATE} ({period_days}일)")
         
-        total_saved_records = 0
-        
         try:
             # 업종 지수 리스트 가져오기
-            sector_codes = stock.get_index_ticker_list(market="KOSPI")
+            sector_codes = self.engine.api.get_index_ticker_list(market="KOSPI")
             logger.info(f"📊 대상 업종 수: {len(sector_codes)}개")
+            sector_codes = self.pending_units('sector_prices', sector_codes)
             
-            pbar = tqdm(sector_codes, desc="업종 시세 수집", unit="업종")
-            
-            for sector_code in pbar:
-                try:
-                    # 업종명 가져오기
-                    sector_name = stock.get_index_ticker_name(sector_code)
-                    
-                    # 업종별 OHLCV 데이터 수집
-                    df = stock.get_index_ohlcv_by_date(START_DATE, END_DATE, sector_code)
-                    
-                    if not df.empty:
-                        df = df.reset_index()
-                        
-                        # 각 날짜별로 저장
-                        for _, row in df.iterrows():
-                            date_val = row['날짜'] if '날짜' in row else row.name
-                            
-                            query = """
-                            INSERT INTO sector_prices 
-                            (sector_code, sector_name, date, open, high, low, close, volume) 
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s) 
-                            ON CONFLICT (sector_code, date) DO UPDATE SET 
-                            sector_name = EXCLUDED.sector_name,
-                            open = EXCLUDED.open, high = EXCLUDED.high, 
-                            low = EXCLUDED.low, close = EXCLUDED.close, 
-                            volume = EXCLUDED.volume
-                            """
-                            
-                            # 컬럼명 매핑
-                            open_val = row['시가'] if '시가' in row else row.get('open', 0)
-                            high_val = row['고가'] if '고가' in row else row.get('high', 0)
-                            low_val = row['저가'] if '저가' in row else row.get('low', 0)
-                            close_val = row['종가'] if '종가' in row else row.get('close', 0)
-                            volume_val = row['거래량'] if '거래량' in row else row.get('volume', 0)
-                            
-                            self.cursor.execute(query, (
-                                sector_code, sector_name, date_val,
-                                int(open_val), int(high_val), int(low_val), 
-                                int(close_val), int(volume_val)
-                            ))
-                            total_saved_records += 1
-                        
-                        # 진행률 업데이트
-                        pbar.set_postfix({'records': f'{total_saved_records:,}'})
-                        
-                        # 주기적 커밋
-                        if total_saved_records % 1000 == 0:
-                            self.conn.commit()
-                            
-                except Exception as e:
-                    logger.warning(f"업종 {sector_code} 시세 수집 실패: {e}")
-                    continue
-            
-            # 최종 커밋
-            self.conn.commit()
-            logger.info(f"✅ 총 {total_saved_records:,}개 업종 시세 레코드 저장 완료!")
+            # 업종별 OHLCV 조회 → 변환 → 저장 파이프라인
+            stats = self.run_pipeline(
+                'sector_prices', sector_codes,
+                fetch=lambda code: fetch_sector_frame(self.engine.api, code, START_DATE, END_DATE),
+                transform=lambda code, frame: sector_prices_from_frame(code, *frame),
+                desc="업종 시세 수집", unit="업종"
+            )
+            self.refresh_sector_latest()
+            return stats.rows
             
         except Exception as e:
+            self.metrics.record_failure(UNIT_ALL, e)
             logger.error(f"업종 시세 수집 중 오류: {e}")
-            
-        return total_saved_records
+            return 0
+    
+    def refresh_sector_latest(self):
+        """업종 최신 시세 / 수익률 요약 테이블 갱신 (/api/sectors)"""
+        try:
+            count = refresh_sector_latest(self.conn)
+            logger.info(f"🏢 업종 최신 시세 요약 {count:,}개 업종 갱신")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('sector_latest', e)
+            logger.error(f"업종 최신 시세 요약 갱신 실패: {e}")
+    
+    def refresh_dashboard_snapshot(self):
+        """대시보드 스냅샷 갱신 (/api/dashboard)"""
+        try:
+            snapshot = refresh_dashboard_snapshot(self.conn)
+            logger.info(f"📊 대시보드 스냅샷 갱신 (기준일 {snapshot['as_of']})")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('dashboard_snapshot', e)
+            logger.error(f"대시보드 스냅샷 갱신 실패: {e}")
+    
+    def refresh_table_stats(self):
+        """테이블 행 수 / 종목 수 / 날짜 범위 통계 갱신 (/api/stats, /api/db-info)
+
+        팩트 테이블은 저장할 때 카운터를 올렸으므로 작은 테이블만 (처음 실행이면 전부) 다시 계산
+        """
+        try:
+            results = refresh_table_stats(self.conn, full=False)
+            logger.info(f"📊 테이블 통계 {len(results)}개 테이블 다시 계산")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('table_stats', e)
+            logger.error(f"테이블 통계 갱신 실패: {e}")
+    
+    def bump_data_generation(self):
+        """데이터 세대 번호 올리기 (API 응답 캐시 무효화)"""
+        try:
+            state = bump_data_generation(self.conn)
+            logger.info(f"🔖 데이터 세대 {state['generation']} (마지막 거래일 {state['latest_date']})")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('data_generation', e)
+            logger.error(f"데이터 세대 갱신 실패: {e}")
     
     def save_to_db(self, df: pd.DataFrame, table_name: str):
         """데이터프레임을 PostgreSQL 테이블에 저장"""
@@ -516,17 +383,10 @@ class KRXDataCollector:
             cursor = self.conn.cursor()
             
             # 테이블별 INSERT 쿼리 생성
-            if table_name == 'stocks':
-                query = """
-                INSERT INTO stocks (ticker, name, market, listed_date) 
-                VALUES (%s, %s, %s, %s) 
-                ON CONFLICT (ticker) DO UPDATE SET 
-                name = EXCLUDED.name, market = EXCLUDED.market
-                """
-                data = [(row['ticker'], row['name'], row['market'], row['listed_date']) 
-                       for _, row in df.iterrows()]
-                
-            elif table_name == 'sectors':
+            if table_name == 'sectors':
+                # 구성 종목이 바뀌므로 수집한 업종은 통째로 교체 (같은 트랜잭션)
+                cursor.execute("DELETE FROM sectors WHERE sector_code = ANY(%s)",
+                               (df['sector_code'].unique().tolist(),))
                 query = """
                 INSERT INTO sectors (sector_code, sector_name, ticker) 
                 VALUES (%s, %s, %s) 
@@ -540,11 +400,16 @@ class KRXDataCollector:
                 return
             
             cursor.executemany(query, data)
+            inserted = max(cursor.rowcount, 0)
+            self.journal.mark_done(table_name, UNIT_ALL, START_DATE, END_DATE, len(data))
             self.conn.commit()
+            self.metrics.record_rows(units=1, fetched=len(data), inserted=inserted,
+                                     unchanged=len(data) - inserted)
             logger.info(f"✅ {table_name} 테이블에 {len(data)}개 레코드 저장 완료")
             
         except Exception as e:
             logger.error(f"❌ {table_name} 테이블 저장 실패: {e}")
+            self.metrics.record_failure(UNIT_ALL, e)
             self.conn.rollback()
     
     def final_database_check(self):
@@ -624,9 +489,58 @@ class KRXDataCollector:
             logger.info("\n🏢 업종별 시세 상위 5개:")
             for sector_code, sector_name, records, start_date, end_date in top_sectors:
                 logger.info(f"  {sector_code} ({sector_name}): {records:,}개 ({start_date} ~ {end_date})")
+        
+        # 검증에 걸려 격리된 행
+        self.cursor.execute("""
+            SELECT table_name, reason, COUNT(*)
+            FROM ingest_quarantine
+            GROUP BY table_name, reason
+            ORDER BY COUNT(*) DESC
+        """)
+        
+        quarantined = self.cursor.fetchall()
+        if quarantined:
+            logger.info("\n🚧 격리된 데이터 (ingest_quarantine):")
+            for table_name, reason, count in quarantined:
+                logger.info(f"  {table_name} {reason}: {count:,}개")
+
+def parse_args():
+    """명령행 인자"""
+    parser = argparse.ArgumentParser(description="K-Stock Insight 데이터 수집")
+    parser.add_argument('--resume', action='store_true',
+                        help="같은 기간의 이전 실행에서 완료된 단위를 건너뛰고 이어서 수집")
+    parser.add_argument('--start-date', default=START_DATE, help="수집 시작일 (YYYYMMDD)")
+    parser.add_argument('--end-date', help="수집 종료일 (YYYYMMDD, 기본: 어제, "
+                                           "--resume 이면 같은 시작일로 중단된 실행의 종료일)")
+    parser.add_argument('--cache-dir', help="pykrx 응답 캐시 디렉토리 (지정 시 캐시 사용)")
+    parser.add_argument('--offline', action='store_true',
+                        help="재생 모드: 네트워크 없이 --cache-dir 캐시만 사용")
+    parser.add_argument('--report', help="JSON 실행 리포트 경로 (기본: ingest_reports/<job>_<시각>.json)")
+    parser.add_argument('--prometheus-textfile', help="Prometheus textfile 경로 (지정 시 함께 저장)")
+    args = parser.parse_args()
+    if args.offline and not args.cache_dir:
+        parser.error("--offline 은 --cache-dir 와 함께 사용해야 합니다")
+    return args
 
 def main():
     """메인 실행 함수"""
+    global START_DATE, END_DATE
+    
+    args = parse_args()
+    START_DATE, END_DATE = args.start_date, args.end_date or END_DATE
+    
+    cache = None
+    if args.cache_dir:
+        from krx_cache import ResponseCache
+        cache = ResponseCache(args.cache_dir, offline=args.offline)
+        logger.info(f"💾 응답 캐시 사용: {args.cache_dir}" + (" (재생 모드)" if args.offline else ""))
+    
+    collector = KRXDataCollector(resume=args.resume, cache=cache)
+    
+    # 종료일을 주지 않은 --resume 은 중단된 실행의 기간을 그대로 이어 받음 (기본 종료일 "어제"는 날마다 바뀜)
+    if args.resume and not args.end_date:
+        END_DATE = collector.journal.last_end_date(START_DATE) or END_DATE
+    
     # 수집 기간 계산
     start_dt = datetime.strptime(START_DATE, '%Y%m%d')
     end_dt = datetime.strptime(END_DATE, '%Y%m%d')
@@ -634,51 +548,73 @@ def main():
     
     logger.info("🚀 K-Stock Insight 데이터 수집 시작")
     logger.info(f"📅 수집 기간: {START_DATE} ~ {END_DATE} ({period_days}일)")
-    
-    collector = KRXDataCollector()
+    if args.resume:
+        logger.info("⏯️ 이어서 수집 모드: 완료된 단위는 건너뜁니다")
     
     try:
-        # 1. 종목 정보 수집 (처음에만 필요)
-        stocks_df = collector.collect_stocks_info()
-        if not stocks_df.empty:
-            collector.save_to_db(stocks_df, 'stocks')
-            tickers = stocks_df['ticker'].tolist()
-        else:
-            # 이미 저장된 종목 리스트 사용
-            collector.cursor.execute("SELECT ticker FROM stocks ORDER BY ticker")
-            tickers = [row[0] for row in collector.cursor.fetchall()]
-            logger.info(f"기존 저장된 {len(tickers)}개 종목 사용")
+        metrics = collector.metrics
+        
+        # 1. 종목 정보 동기화 (바뀐 종목만 저장)
+        with metrics.stage('stocks'):
+            if collector.pending_units('stocks', [UNIT_ALL]):
+                collector.collect_stocks_info()
+        
+        tickers = collector.get_active_tickers()
+        logger.info(f"📊 대상 종목 수: {len(tickers)}개")
         
         if not tickers:
             logger.error("❌ 종목 정보를 가져올 수 없습니다.")
             return
         
         # 2. 일별 시세 수집 (메인 작업)
-        total_saved = collector.collect_daily_prices(tickers)
+        with metrics.stage('daily_prices'):
+            prices_saved = collector.collect_daily_prices(tickers)
         
         # 3. 투자자 동향 수집
-        investor_saved = collector.collect_investor_trends(tickers)
+        with metrics.stage('investor_trends'):
+            investor_saved = collector.collect_investor_trends(tickers)
         
         # 4. 섹터 정보 수집
-        sectors_df = collector.collect_sectors_info()
-        if not sectors_df.empty:
-            collector.save_to_db(sectors_df, 'sectors')
+        with metrics.stage('sectors'):
+            if collector.pending_units('sectors', [UNIT_ALL]):
+                sectors_df = collector.collect_sectors_info()
+                if not sectors_df.empty:
+                    collector.save_to_db(sectors_df, 'sectors')
         
         # 5. 업종별 시세 수집
-        sector_saved = collector.collect_sector_prices()
-        
-        # 6. 최종 상태 확인
+        with metrics.stage('sector_prices'):
+            sector_saved = collector.collect_sector_prices()
+        
+        # 6. 거래일 달력 / 대시보드 스냅샷 / 테이블 통계 / 데이터 세대 갱신 및 최종 상태 확인
+        collector.calendar.refresh()
+        collector.refresh_dashboard_snapshot()
+        collector.refresh_table_stats()
+        collector.bump_data_generation()
         collector.final_database_check()
         
+        total_saved = prices_saved + investor_saved + sector_saved
         logger.info("✅ 모든 데이터 수집 완료!")
+        logger.info(f"📊 총 저장: {total_saved:,}개 레코드")
+        logger.info(f"🌐 API 호출 통계: {collector.engine.stats()}")
         
     except KeyboardInterrupt:
-        logger.info("🛑 사용자에 의해 중단되었습니다.")
+        logger.info("🛑 사용자에 의해 중단되었습니다. --resume 옵션으로 이어서 수집할 수 있습니다.")
     except Exception as e:
         logger.error(f"❌ 데이터 수집 중 오류 발생: {e}")
         
     finally:
         collector.close_db()
+        write_report(collector.metrics, args)
+
+def write_report(metrics: RunMetrics, args):
+    """단계별 계측 요약 로그 + JSON 리포트 (+ Prometheus textfile) 저장"""
+    for line in metrics.summary():
+        logger.info(f"📏 {line}")
+    try:
+        path = metrics.save(args.report, args.prometheus_textfile)
+        logger.info(f"🧾 실행 리포트 저장: {path}")
+    except OSError as e:
+        logger.error(f"❌ 실행 리포트 저장 실패: {e}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+데이터 세대 토큰 (data_generation 테이블)
+
+백엔드 API 는 응답을 메모리에 캐시하고, 이 테이블의 (마지막 거래일, 세대 번호) 가 바뀌었을 때만
+데이터를 다시 조회합니다 (backend/services/response_cache.py).
+데이터 수집 / 업데이트 / 백필이 끝날 때 세대 번호를 올려서 캐시된 응답을 무효화합니다.
+
+사용법:
+    python scripts/data_generation.py       # 직접 세대 번호 올리기 (DB 를 손으로 고친 뒤 등)
+"""
+
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+GENERATION_NAME = 'api'
+
+
+def bump_data_generation(conn, name: str = GENERATION_NAME) -> Dict[str, Any]:
+    """세대 번호 +1, 마지막 거래일 (trading_calendar 기준) 기록 후 반환"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO data_generation (name, generation, latest_date, updated_at)
+            VALUES (%s, 1, (SELECT MAX(date) FROM trading_calendar), CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET
+            generation = data_generation.generation + 1,
+            latest_date = EXCLUDED.latest_date,
+            updated_at = EXCLUDED.updated_at
+            RETURNING generation, latest_date
+        """, (name,))
+        generation, latest_date = cursor.fetchone()
+    conn.commit()
+    return {'generation': generation, 'latest_date': latest_date}
+
+
+def main():
+    """세대 번호 올리기"""
+    from db_config import connect
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    conn = connect()
+    try:
+        state = bump_data_generation(conn)
+        logger.info(f"🔖 데이터 세대 {state['generation']} (마지막 거래일 {state['latest_date']})")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,24 +2,26 @@
 """
 K-Stock Insight 데이터 업데이트 스크립트
 
-각 테이블의 마지막 날짜부터 어제까지의 데이터를 수집하여 업데이트합니다.
+각 테이블의 종목(업종)별 마지막 날짜부터 어제까지의 데이터를 수집하여 업데이트합니다.
 - 일별 자동 실행에 최적화
-- 효율적인 증분 업데이트
-- 누락 데이터 자동 보완
+- 효율적인 증분 업데이트 (종목별 워터마크, 같은 기간의 종목은 묶어서 조회)
+- 누락 데이터 자동 보완 (신규 상장 종목, 이전 실행에서 실패한 종목, 최근 REPAIR_LOOKBACK_DAYS 일 안에서 빠진 거래일)
+- 단계별 계측 리포트 (JSON, 선택적으로 Prometheus textfile)
 
 사용법:
     python scripts/data_updater.py
+    python scripts/data_updater.py --cache-dir .krx_cache
+    python scripts/data_updater.py --prometheus-textfile /var/lib/node_exporter/kstock_updater.prom
 """
 
-import os
 import sys
-import pandas as pd
+import argparse
 import psycopg2
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 import time
-from tqdm import tqdm
+from collections import defaultdict
 
 # pykrx 모듈 import
 try:
@@ -28,6 +30,25 @@ except ImportError:
     print("pykrx 모듈이 설치되지 않았습니다. 'pip install pykrx' 명령어로 설치해주세요.")
     sys.exit(1)
 
+from price_fetch import (
+    MODE_AUTO, MODE_BY_DATE, choose_fetch_mode, fetch_market_frames,
+    fetch_sector_frame, fetch_ticker_frame, prices_from_market_frames, prices_from_ticker_frame,
+    sector_prices_from_frame
+)
+from db_config import DB_CONFIG
+from bulk_writer import TABLE_SPECS, BulkWriteResult
+from investor_fetch import fetch_investor_values, melt_investor_values
+from pipeline import IngestPipeline, PipelineStats
+from fetch_engine import FetchEngine
+from stock_universe import sync_stocks
+from trading_calendar import TradingCalendar
+from ingest_metrics import RunMetrics
+from data_validation import BatchValidator
+from sector_latest import refresh_sector_latest
+from dashboard_snapshot import refresh_dashboard_snapshot
+from data_generation import bump_data_generation
+from table_stats import refresh_table_stats
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -39,26 +60,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 데이터베이스 연결 설정
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': os.getenv('DB_PORT', '5432'),
-    'database': os.getenv('DB_NAME', 'k_stock_insight'),
-    'user': os.getenv('DB_USER', 'hhhhp'),
-    'password': os.getenv('DB_PASSWORD', '')
-}
+# 수집할 시장 구분
+MARKETS = ['KOSPI', 'KOSDAQ']
 
 # 처리 설정
-BATCH_SIZE = 100  # 업데이트용으로 배치 크기 증가
-MAX_RETRIES = 3
-API_DELAY = 1  # API 호출 간격 (초)
+COMMIT_ROWS = 50000  # 이만큼 행이 모이면 저장 후 커밋
+COMMIT_SECONDS = 5  # 저장 대기 중인 데이터가 있으면 이 시간마다 커밋 (초)
+QUEUE_SIZE = 32  # 파이프라인 단계 사이 큐 크기 (메모리 사용량 조절)
+MAX_RETRIES = 3  # API 호출당 최대 재시도 횟수
+FETCH_WORKERS = 4  # 동시 API 호출 워커 수
+API_RATE = 2  # 초당 최대 API 호출 수 (토큰 버킷)
+API_BURST = 4  # 순간 최대 API 호출 수
+PRICE_FETCH_MODE = MODE_AUTO  # 시세 수집 모드 ('auto', 'ticker', 'date')
+INITIAL_LOOKBACK_DAYS = 30  # 데이터가 없는 종목/업종의 최초 수집 기간 (일)
+REPAIR_LOOKBACK_DAYS = 30  # 마지막 날짜 이전에 빠진 거래일을 다시 확인하는 기간 (일)
 
 class DataUpdater:
-    def __init__(self):
+    def __init__(self, backend=None, cache=None):
         self.conn = None
         self.cursor = None
         self.yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+        self.write_results = {table: BulkWriteResult() for table in TABLE_SPECS}
+        self.metrics = RunMetrics('updater')
+        self.engine = FetchEngine(
+            backend or stock, workers=FETCH_WORKERS, rate=API_RATE,
+            burst=API_BURST, max_retries=MAX_RETRIES, cache=cache, metrics=self.metrics
+        )
         self.connect_db()
+        self.calendar = TradingCalendar(self.conn)
+        self.calendar.refresh()
+        self.validator = BatchValidator(self.conn, self.calendar)
         
     def connect_db(self):
         """PostgreSQL 데이터베이스 연결"""
@@ -93,268 +124,265 @@ class DataUpdater:
             logger.error(f"{table_name} 테이블 마지막 날짜 조회 실패: {e}")
             return None
     
-    def get_update_period(self, table_name: str) -> tuple:
-        """업데이트할 기간 계산"""
-        last_date = self.get_last_date(table_name)
-        
-        if not last_date:
-            # 테이블이 비어있으면 최근 30일간 데이터 수집
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
-            logger.info(f"{table_name}: 테이블이 비어있어 최근 30일 데이터 수집")
-        else:
-            # 마지막 날짜 다음날부터
-            last_dt = datetime.strptime(last_date, '%Y%m%d')
-            start_date = (last_dt + timedelta(days=1)).strftime('%Y%m%d')
-        
+    def get_watermarks(self, table_name: str, keys: List[str], key_column: str = 'ticker') -> Dict[str, str]:
+        """종목(업종)별 마지막 날짜 조회
+
+        키마다 기본키 인덱스로 MAX(date)를 찾는 쿼리 1회로 조회합니다 (전체 테이블 GROUP BY 보다 빠름).
+        데이터가 없는 키는 결과에서 빠집니다.
+        """
+        self.cursor.execute(f"""
+            SELECT k.key, (SELECT MAX(date) FROM {table_name} WHERE {key_column} = k.key)
+            FROM unnest(%s::text[]) AS k(key)
+        """, (list(keys),))
+        return {key: last.strftime('%Y%m%d') for key, last in self.cursor.fetchall() if last}
+    
+    def get_gaps(self, table_name: str, keys: List[str], since: str, key_column: str = 'ticker') -> Dict[str, str]:
+        """종목(업종)별 since 이후 처음 빠진 거래일 조회
+
+        trading_calendar 의 거래일 중 (키, 날짜) 행이 없는 날을 찾습니다 (실패한 샤드, 격리된 날 등).
+        키의 첫 데이터보다 이전 날짜(신규 상장 전)는 빠진 날로 보지 않습니다.
+        """
+        self.cursor.execute(f"""
+            SELECT k.key, MIN(c.date)
+            FROM unnest(%s::text[]) AS k(key)
+            JOIN trading_calendar c ON c.date BETWEEN %s AND %s
+            WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE t.{key_column} = k.key AND t.date = c.date)
+              AND EXISTS (SELECT 1 FROM {table_name} t WHERE t.{key_column} = k.key AND t.date < c.date)
+            GROUP BY k.key
+        """, (list(keys), since, self.yesterday))
+        return {key: first.strftime('%Y%m%d') for key, first in self.cursor.fetchall()}
+    
+    def plan_update_ranges(self, table_name: str, keys: List[str],
+                           key_column: str = 'ticker') -> Dict[Tuple[str, str], List[str]]:
+        """키별 누락 기간 계산 후 같은 기간끼리 묶기 {(시작일, 종료일): [키, ...]}"""
+        watermarks = self.get_watermarks(table_name, keys, key_column)
         end_date = self.yesterday
+        default_start = (datetime.now() - timedelta(days=INITIAL_LOOKBACK_DAYS)).strftime('%Y%m%d')
+        repair_start = (datetime.now() - timedelta(days=REPAIR_LOOKBACK_DAYS)).strftime('%Y%m%d')
+        gaps = self.get_gaps(table_name, keys, repair_start, key_column)
+        
+        ranges = defaultdict(list)
+        trading_ranges = {}
+        repaired = 0
+        for key in keys:
+            last_date = watermarks.get(key)
+            if last_date:
+                # 마지막 날짜 다음날부터
+                start_date = (datetime.strptime(last_date, '%Y%m%d') + timedelta(days=1)).strftime('%Y%m%d')
+            else:
+                # 데이터가 없는 키(신규 상장 등)는 최근 INITIAL_LOOKBACK_DAYS일
+                start_date = default_start
+            
+            # 마지막 날짜 이전에 빠진 거래일이 있으면 그날부터 다시 수집
+            if key in gaps and gaps[key] < start_date:
+                start_date = gaps[key]
+                repaired += 1
+            
+            # 기간을 거래일로 좁히고, 거래일이 없으면(주말 / 휴장일만 남은 경우) 건너뜀
+            if start_date not in trading_ranges:
+                days = self.calendar.trading_days(start_date, end_date) if start_date <= end_date else []
+                trading_ranges[start_date] = (days[0], days[-1]) if days else None
+            
+            if trading_ranges[start_date]:
+                ranges[trading_ranges[start_date]].append(key)
         
-        # 업데이트할 데이터가 있는지 확인
-        if start_date > end_date:
-            logger.info(f"{table_name}: 업데이트할 데이터가 없습니다 (마지막: {last_date}, 어제: {end_date})")
-            return None, None
+        pending = sum(len(group) for group in ranges.values())
+        new_keys = sum(1 for key in keys if key not in watermarks)
+        if not ranges:
+            logger.info(f"{table_name}: 업데이트할 거래일이 없습니다 (어제: {end_date})")
+        else:
+            logger.info(f"{table_name}: 대상 {pending:,}/{len(keys):,}개 "
+                        f"(신규 {new_keys:,}개, 빠진 거래일 보완 {repaired:,}개, 기간 {len(ranges)}종류)")
         
-        return start_date, end_date
+        return dict(ranges)
+    
+    def sync_stocks(self) -> Dict[str, int]:
+        """상장 종목 정보 동기화 (신규 상장 / 종목명 변경 / 상장폐지만 저장)"""
+        logger.info("📊 상장 종목 정보 동기화 시작...")
+        
+        try:
+            counts = sync_stocks(self.conn, self.engine.api, self.yesterday, MARKETS)
+            self.conn.commit()
+            self.metrics.record_rows(
+                units=1, fetched=counts['inserted'] + counts['changed'] + counts['unchanged'],
+                inserted=counts['inserted'], updated=counts['changed'] + counts['delisted'] + counts['relisted'],
+                unchanged=counts['unchanged']
+            )
+            logger.info(f"✅ 종목 정보 동기화 완료 (신규 {counts['inserted']} / 변경 {counts['changed']} / "
+                        f"상장폐지 {counts['delisted']} / 재상장 {counts['relisted']} / 동일 {counts['unchanged']})")
+            return counts
+            
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('stocks', e)
+            logger.error(f"❌ 종목 정보 동기화 실패: {e}")
+            return {}
     
     def get_stock_tickers(self) -> List[str]:
-        """기존 종목 리스트 가져오기"""
-        self.cursor.execute("SELECT ticker FROM stocks ORDER BY ticker")
+        """상장 중인 종목 리스트 가져오기 (상장폐지 종목 제외)"""
+        self.cursor.execute("SELECT ticker FROM stocks WHERE delisted_date IS NULL ORDER BY ticker")
         tickers = [row[0] for row in self.cursor.fetchall()]
         logger.info(f"📊 대상 종목 수: {len(tickers)}개")
         return tickers
     
-    def update_daily_prices(self, tickers: List[str]) -> int:
+    def update_daily_prices(self, tickers: List[str], mode: str = PRICE_FETCH_MODE) -> int:
         """일별 시세 데이터 업데이트"""
         logger.info("📈 일별 시세 데이터 업데이트 시작...")
         
-        start_date, end_date = self.get_update_period('daily_prices')
-        if not start_date:
+        ranges = self.plan_update_ranges('daily_prices', tickers)
+        if not ranges:
             return 0
         
-        logger.info(f"📅 업데이트 기간: {start_date} ~ {end_date}")
-        
         total_saved = 0
-        processed_count = 0
+        ticker_ranges = {}
         
-        pbar = tqdm(tickers, desc="시세 업데이트", unit="종목")
+        # 기간이 같은 종목 묶음마다 수집 모드 결정 (일일 업데이트의 대부분 종목은 날짜 단위)
+        for (start_date, end_date), group in ranges.items():
+            group_mode = choose_fetch_mode(len(group), start_date, end_date, len(MARKETS), mode,
+                                           days=self.calendar.trading_days(start_date, end_date))
+            logger.info(f"📅 {start_date} ~ {end_date}: {len(group):,}개 종목 ({group_mode} 모드)")
+            
+            if group_mode == MODE_BY_DATE:
+                total_saved += self.update_daily_prices_by_date(group, start_date, end_date)
+            else:
+                ticker_ranges.update({ticker: (start_date, end_date) for ticker in group})
         
-        for ticker in pbar:
-            try:
-                df = stock.get_market_ohlcv_by_date(start_date, end_date, ticker)
-                
-                if not df.empty:
-                    df = df.reset_index()
-                    df['ticker'] = ticker
-                    
-                    # 컬럼명 매핑
-                    df.rename(columns={
-                        '날짜': 'date',
-                        '시가': 'open',
-                        '고가': 'high', 
-                        '저가': 'low',
-                        '종가': 'close',
-                        '거래량': 'volume'
-                    }, inplace=True)
-                    
-                    # DB 저장
-                    for _, row in df.iterrows():
-                        query = """
-                        INSERT INTO daily_prices (ticker, date, open, high, low, close, volume) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s) 
-                        ON CONFLICT (ticker, date) DO UPDATE SET 
-                        open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low, 
-                        close = EXCLUDED.close, volume = EXCLUDED.volume
-                        """
-                        
-                        self.cursor.execute(query, (
-                            row['ticker'], row['date'], row['open'], 
-                            row['high'], row['low'], row['close'], row['volume']
-                        ))
-                        total_saved += 1
-                    
-                    pbar.set_postfix({'records': f'{total_saved:,}'})
-                
-                processed_count += 1
-                
-                # 배치마다 커밋
-                if processed_count % BATCH_SIZE == 0:
-                    self.conn.commit()
-                
-                # API 호출 간격
-                time.sleep(API_DELAY)
-                    
-            except Exception as e:
-                logger.warning(f"종목 {ticker} 시세 업데이트 실패: {e}")
-                continue
+        # 종목 단위 묶음은 한 번에 워커 풀로 조회
+        if ticker_ranges:
+            total_saved += self.update_daily_prices_by_ticker(ticker_ranges)
         
-        # 최종 커밋
-        self.conn.commit()
-        logger.info(f"✅ 일별 시세 {total_saved:,}개 레코드 업데이트 완료!")
+        logger.info(f"✅ 일별 시세 {total_saved:,}개 레코드 업데이트 완료! ({self.write_results['daily_prices']})")
         return total_saved
     
+    def update_daily_prices_by_ticker(self, ticker_ranges: Dict[str, Tuple[str, str]]) -> int:
+        """종목 단위 시세 업데이트 (종목마다 자신의 누락 기간 조회)"""
+        stats = self.run_pipeline(
+            'daily_prices', list(ticker_ranges),
+            fetch=lambda ticker: fetch_ticker_frame(self.engine.api, ticker, *ticker_ranges[ticker]),
+            transform=prices_from_ticker_frame,
+            desc="시세 업데이트", unit="종목"
+        )
+        return stats.rows
+    
+    def update_daily_prices_by_date(self, tickers: List[str], start_date: str, end_date: str) -> int:
+        """날짜 단위 시세 업데이트 (날짜·시장별 1회 호출로 전 종목 조회)"""
+        ticker_set = set(tickers)
+        stats = self.run_pipeline(
+            'daily_prices', self.calendar.trading_days(start_date, end_date),
+            fetch=lambda date: fetch_market_frames(self.engine.api, date, MARKETS),
+            transform=lambda date, frames: prices_from_market_frames(date, frames, ticker_set),
+            desc="시세 업데이트 (날짜별)", unit="일"
+        )
+        return stats.rows
+    
+    def run_pipeline(self, table_name: str, units: List[str], fetch, transform,
+                     desc: str, unit: str) -> PipelineStats:
+        """조회 → 변환 → 저장 파이프라인 실행 후 저장 결과 누적"""
+        pipeline = IngestPipeline(
+            self.engine, self.conn, table_name, queue_size=QUEUE_SIZE,
+            batch_rows=COMMIT_ROWS, batch_seconds=COMMIT_SECONDS, validator=self.validator
+        )
+        stats = pipeline.run(units, fetch, transform, desc=desc, unit=unit)
+        
+        self.write_results[table_name] += stats.result
+        self.metrics.record_pipeline(stats)
+        logger.info(f"💾 {table_name}: {stats}")
+        return stats
+    
     def update_investor_trends(self, tickers: List[str]) -> int:
         """투자자 동향 데이터 업데이트"""
         logger.info("👥 투자자 동향 데이터 업데이트 시작...")
         
-        start_date, end_date = self.get_update_period('investor_trends')
-        if not start_date:
+        ranges = self.plan_update_ranges('investor_trends', tickers)
+        if not ranges:
             return 0
         
-        logger.info(f"📅 업데이트 기간: {start_date} ~ {end_date}")
+        # 종목별 API 라서 종목마다 자신의 누락 기간만 조회
+        ticker_ranges = {ticker: period for period, group in ranges.items() for ticker in group}
         
-        total_saved = 0
-        processed_count = 0
-        
-        pbar = tqdm(tickers, desc="투자자 동향 업데이트", unit="종목")
+        stats = self.run_pipeline(
+            'investor_trends', list(ticker_ranges),
+            fetch=lambda ticker: fetch_investor_values(self.engine.api, ticker, *ticker_ranges[ticker]),
+            transform=lambda ticker, values: melt_investor_values(ticker, *values),
+            desc="투자자 동향 업데이트", unit="종목"
+        )
         
-        for ticker in pbar:
-            try:
-                df = stock.get_market_net_purchases_of_equities_by_ticker(start_date, end_date, ticker)
-                
-                if not df.empty:
-                    df = df.reset_index()
-                    
-                    # 각 날짜별로 처리
-                    for _, row in df.iterrows():
-                        date_val = row['날짜'] if '날짜' in row else row.name
-                        
-                        # 투자자 유형별 데이터 추출 및 저장
-                        investor_data = []
-                        
-                        # 외국인
-                        if '외국인계' in row:
-                            investor_data.append({
-                                'investor_type': '외국인',
-                                'net_value': int(row['외국인계']) if pd.notna(row['외국인계']) else 0
-                            })
-                        
-                        # 기관
-                        if '기관계' in row:
-                            investor_data.append({
-                                'investor_type': '기관',
-                                'net_value': int(row['기관계']) if pd.notna(row['기관계']) else 0
-                            })
-                        
-                        # 개인
-                        if '개인' in row:
-                            investor_data.append({
-                                'investor_type': '개인',
-                                'net_value': int(row['개인']) if pd.notna(row['개인']) else 0
-                            })
-                        
-                        # 기타법인
-                        if '기타법인' in row:
-                            investor_data.append({
-                                'investor_type': '기타법인',
-                                'net_value': int(row['기타법인']) if pd.notna(row['기타법인']) else 0
-                            })
-                        
-                        # DB에 저장
-                        for investor in investor_data:
-                            query = """
-                            INSERT INTO investor_trends 
-                            (ticker, date, investor_type, buy_value, sell_value, net_value) 
-                            VALUES (%s, %s, %s, %s, %s, %s) 
-                            ON CONFLICT (ticker, date, investor_type) DO UPDATE SET 
-                            net_value = EXCLUDED.net_value
-                            """
-                            
-                            self.cursor.execute(query, (
-                                ticker, date_val, investor['investor_type'],
-                                0, 0, investor['net_value']  # buy/sell은 0으로 설정
-                            ))
-                            total_saved += 1
-                
-                processed_count += 1
-                pbar.set_postfix({'records': f'{total_saved:,}'})
-                
-                # 배치마다 커밋
-                if processed_count % BATCH_SIZE == 0:
-                    self.conn.commit()
-                
-                # API 호출 간격
-                time.sleep(API_DELAY)
-                    
-            except Exception as e:
-                logger.warning(f"종목 {ticker} 투자자 동향 업데이트 실패: {e}")
-                continue
-        
-        # 최종 커밋
-        self.conn.commit()
-        logger.info(f"✅ 투자자 동향 {total_saved:,}개 레코드 업데이트 완료!")
-        return total_saved
+        logger.info(f"✅ 투자자 동향 {stats.rows:,}개 레코드 업데이트 완료! ({self.write_results['investor_trends']})")
+        return stats.rows
     
     def update_sector_prices(self) -> int:
         """업종별 시세 데이터 업데이트"""
         logger.info("🏢 업종별 시세 데이터 업데이트 시작...")
         
-        start_date, end_date = self.get_update_period('sector_prices')
-        if not start_date:
-            return 0
-        
-        logger.info(f"📅 업데이트 기간: {start_date} ~ {end_date}")
-        
         total_saved = 0
         
         try:
-            sector_codes = stock.get_index_ticker_list(market="KOSPI")
+            sector_codes = self.engine.api.get_index_ticker_list(market="KOSPI")
             logger.info(f"📊 대상 업종 수: {len(sector_codes)}개")
             
-            pbar = tqdm(sector_codes, desc="업종 시세 업데이트", unit="업종")
+            ranges = self.plan_update_ranges('sector_prices', sector_codes, key_column='sector_code')
+            sector_ranges = {code: period for period, group in ranges.items() for code in group}
             
-            for sector_code in pbar:
-                try:
-                    sector_name = stock.get_index_ticker_name(sector_code)
-                    df = stock.get_index_ohlcv_by_date(start_date, end_date, sector_code)
-                    
-                    if not df.empty:
-                        df = df.reset_index()
-                        
-                        for _, row in df.iterrows():
-                            date_val = row['날짜'] if '날짜' in row else row.name
-                            
-                            query = """
-                            INSERT INTO sector_prices 
-                            (sector_code, sector_name, date, open, high, low, close, volume) 
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s) 
-                            ON CONFLICT (sector_code, date) DO UPDATE SET 
-                            sector_name = EXCLUDED.sector_name,
-                            open = EXCLUDED.open, high = EXCLUDED.high, 
-                            low = EXCLUDED.low, close = EXCLUDED.close, 
-                            volume = EXCLUDED.volume
-                            """
-                            
-                            # 컬럼명 매핑
-                            open_val = row['시가'] if '시가' in row else row.get('open', 0)
-                            high_val = row['고가'] if '고가' in row else row.get('high', 0)
-                            low_val = row['저가'] if '저가' in row else row.get('low', 0)
-                            close_val = row['종가'] if '종가' in row else row.get('close', 0)
-                            volume_val = row['거래량'] if '거래량' in row else row.get('volume', 0)
-                            
-                            self.cursor.execute(query, (
-                                sector_code, sector_name, date_val,
-                                int(open_val), int(high_val), int(low_val), 
-                                int(close_val), int(volume_val)
-                            ))
-                            total_saved += 1
-                        
-                        pbar.set_postfix({'records': f'{total_saved:,}'})
-                    
-                    # API 호출 간격
-                    time.sleep(API_DELAY)
-                            
-                except Exception as e:
-                    logger.warning(f"업종 {sector_code} 시세 업데이트 실패: {e}")
-                    continue
-            
-            # 최종 커밋
-            self.conn.commit()
-            logger.info(f"✅ 업종별 시세 {total_saved:,}개 레코드 업데이트 완료!")
+            if sector_ranges:
+                stats = self.run_pipeline(
+                    'sector_prices', list(sector_ranges),
+                    fetch=lambda code: fetch_sector_frame(self.engine.api, code, *sector_ranges[code]),
+                    transform=lambda code, frame: sector_prices_from_frame(code, *frame),
+                    desc="업종 시세 업데이트", unit="업종"
+                )
+                total_saved = stats.rows
+                logger.info(f"✅ 업종별 시세 {total_saved:,}개 레코드 업데이트 완료! ({self.write_results['sector_prices']})")
             
         except Exception as e:
+            self.metrics.record_failure('sector_prices', e)
             logger.error(f"업종 시세 업데이트 중 오류: {e}")
-            
+        
+        self.refresh_sector_latest()
         return total_saved
     
+    def refresh_sector_latest(self):
+        """업종 최신 시세 / 수익률 요약 테이블 갱신 (/api/sectors)"""
+        try:
+            count = refresh_sector_latest(self.conn)
+            logger.info(f"🏢 업종 최신 시세 요약 {count:,}개 업종 갱신")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('sector_latest', e)
+            logger.error(f"업종 최신 시세 요약 갱신 실패: {e}")
+    
+    def refresh_dashboard_snapshot(self):
+        """대시보드 스냅샷 갱신 (/api/dashboard)"""
+        try:
+            snapshot = refresh_dashboard_snapshot(self.conn)
+            logger.info(f"📊 대시보드 스냅샷 갱신 (기준일 {snapshot['as_of']})")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('dashboard_snapshot', e)
+            logger.error(f"대시보드 스냅샷 갱신 실패: {e}")
+    
+    def refresh_table_stats(self):
+        """테이블 행 수 / 종목 수 / 날짜 범위 통계 갱신 (/api/stats, /api/db-info)
+
+        팩트 테이블은 저장할 때 카운터를 올렸으므로 작은 테이블만 (처음 실행이면 전부) 다시 계산
+        """
+        try:
+            results = refresh_table_stats(self.conn, full=False)
+            logger.info(f"📊 테이블 통계 {len(results)}개 테이블 다시 계산")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('table_stats', e)
+            logger.error(f"테이블 통계 갱신 실패: {e}")
+    
+    def bump_data_generation(self):
+        """데이터 세대 번호 올리기 (API 응답 캐시 무효화)"""
+        try:
+            state = bump_data_generation(self.conn)
+            logger.info(f"🔖 데이터 세대 {state['generation']} (마지막 거래일 {state['latest_date']})")
+        except Exception as e:
+            self.conn.rollback()
+            self.metrics.record_failure('data_generation', e)
+            logger.error(f"데이터 세대 갱신 실패: {e}")
+    
     def update_status_summary(self):
         """업데이트 상태 요약"""
         logger.info("\n📋 업데이트 완료 상태:")
@@ -382,15 +410,40 @@ class DataUpdater:
             except Exception as e:
                 logger.error(f"{table} 상태 확인 실패: {e}")
 
+def parse_args():
+    """명령행 인자"""
+    parser = argparse.ArgumentParser(description="K-Stock Insight 데이터 업데이트")
+    parser.add_argument('--cache-dir', help="pykrx 응답 캐시 디렉토리 (지정 시 캐시 사용)")
+    parser.add_argument('--offline', action='store_true',
+                        help="재생 모드: 네트워크 없이 --cache-dir 캐시만 사용")
+    parser.add_argument('--report', help="JSON 실행 리포트 경로 (기본: ingest_reports/<job>_<시각>.json)")
+    parser.add_argument('--prometheus-textfile', help="Prometheus textfile 경로 (지정 시 함께 저장)")
+    args = parser.parse_args()
+    if args.offline and not args.cache_dir:
+        parser.error("--offline 은 --cache-dir 와 함께 사용해야 합니다")
+    return args
+
 def main():
     """메인 실행 함수"""
+    args = parse_args()
+    
     logger.info("🔄 K-Stock Insight 데이터 업데이트 시작")
     logger.info(f"📅 업데이트 대상: ~ {(datetime.now() - timedelta(days=1)).strftime('%Y%m%d')} (어제)")
     
-    updater = DataUpdater()
+    cache = None
+    if args.cache_dir:
+        from krx_cache import ResponseCache
+        cache = ResponseCache(args.cache_dir, offline=args.offline)
+        logger.info(f"💾 응답 캐시 사용: {args.cache_dir}" + (" (재생 모드)" if args.offline else ""))
+    
+    updater = DataUpdater(cache=cache)
     
     try:
-        # 종목 리스트 가져오기
+        metrics = updater.metrics
+        
+        # 종목 정보 동기화 후 종목 리스트 가져오기
+        with metrics.stage('stocks'):
+            updater.sync_stocks()
         tickers = updater.get_stock_tickers()
         
         if not tickers:
@@ -401,26 +454,38 @@ def main():
         
         # 1. 일별 시세 업데이트
         logger.info("=" * 50)
-        prices_updated = updater.update_daily_prices(tickers)
+        with metrics.stage('daily_prices'):
+            prices_updated = updater.update_daily_prices(tickers)
         
         # 2. 투자자 동향 업데이트  
         logger.info("=" * 50)
-        trends_updated = updater.update_investor_trends(tickers)
+        with metrics.stage('investor_trends'):
+            trends_updated = updater.update_investor_trends(tickers)
         
         # 3. 업종별 시세 업데이트
         logger.info("=" * 50)
-        sectors_updated = updater.update_sector_prices()
+        with metrics.stage('sector_prices'):
+            sectors_updated = updater.update_sector_prices()
         
         # 4. 업데이트 상태 요약
         logger.info("=" * 50)
         updater.update_status_summary()
+        updater.calendar.refresh()
+        
+        # 5. 대시보드 스냅샷 갱신 (달력 갱신 후 최근 N 거래일 기준)
+        updater.refresh_dashboard_snapshot()
+        
+        # 6. 테이블 통계 갱신 후 데이터 세대 번호 올리기 (API 응답 캐시 무효화, 모든 갱신이 끝난 뒤)
+        updater.refresh_table_stats()
+        updater.bump_data_generation()
         
         elapsed_time = time.time() - start_time
         total_updated = prices_updated + trends_updated + sectors_updated
         
-        logger.info(f"✅ 업데이트 완료!")
+        logger.info("✅ 업데이트 완료!")
         logger.info(f"📊 총 업데이트: {total_updated:,}개 레코드")
         logger.info(f"⏱️ 소요 시간: {elapsed_time/60:.1f}분")
+        logger.info(f"🌐 API 호출 통계: {updater.engine.stats()}")
         
     except KeyboardInterrupt:
         logger.info("🛑 사용자에 의해 중단되었습니다.")
@@ -429,6 +494,17 @@ def main():
         
     finally:
         updater.close_db()
+        write_report(updater.metrics, args)
+
+def write_report(metrics: RunMetrics, args):
+    """단계별 계측 요약 로그 + JSON 리포트 (+ Prometheus textfile) 저장"""
+    for line in metrics.summary():
+        logger.info(f"📏 {line}")
+    try:
+        path = metrics.save(args.report, args.prometheus_textfile)
+        logger.info(f"🧾 실행 리포트 저장: {path}")
+    except OSError as e:
+        logger.error(f"❌ 실행 리포트 저장 실패: {e}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
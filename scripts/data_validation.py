@@ -0,0 +1,309 @@
+"""
+저장 전 데이터 검증 / 격리 공통 모듈
+
+IngestPipeline 이 배치를 저장하기 직전에 배치 전체를 한 번에 검사합니다 (행 단위 반복 없음).
+- 컬럼 누락 (상위 응답의 컬럼 이름이 바뀌어 값이 통째로 비어 있는 경우)
+- 빈 값 (NaN 종가 등), 같은 키에 값이 다른 중복 행
+- 시세: 거래량 0 (거래정지), 시가·고가·저가·종가 관계 오류 (low > high 등)
+- 일별 시세: 전일 종가 대비 KRX 가격제한폭(±30%)을 넘는 변동 (기록만, 저장은 그대로)
+- 투자자 동향: 음수 거래대금, 순매수 ≠ 매수 - 매도, 모든 투자자 유형이 0 인 날짜
+- 거래일 달력 대비 빠진 날짜 (종목별 첫 날짜 ~ 마지막 날짜 사이)
+
+검사에 걸린 행은 팩트 테이블 대신 ingest_quarantine 테이블에 저장하고, 빠진 날짜는 같은 테이블에 기록만 합니다.
+가격제한폭 초과는 경고 검사입니다. 수정 전 가격 기준이라 액면분할·감자 등으로 기준가가 바뀐 날에도 걸리는데,
+그날을 격리하면 다음 날부터 저장되면서 종목별 워터마크가 빠진 날을 넘어가 다시 수집되지 않기 때문에
+격리 테이블에 기록만 하고 팩트 테이블에도 저장합니다.
+전일 종가는 배치당 쿼리 1회로 가져오므로 저장 처리량에 주는 영향은 작습니다.
+"""
+
+import bisect
+import json
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import Json, execute_values
+
+from bulk_writer import TABLE_SPECS
+
+# KRX 가격제한폭 (전일 종가 대비), 호가 단위 반올림 여유
+PRICE_LIMIT = 0.30
+PRICE_LIMIT_TOLERANCE = 0.005
+
+# 테이블별 종목 / 업종 키 컬럼
+KEY_COLUMNS = {
+    'daily_prices': 'ticker',
+    'investor_trends': 'ticker',
+    'sector_prices': 'sector_code',
+}
+
+OHLC_COLUMNS = ['open', 'high', 'low', 'close']
+QUARANTINE_FIELDS = ['key', 'date', 'reason', 'detail', 'payload']
+
+# 검사 이름 (한 행이 여러 검사에 걸리면 앞의 것 하나만 기록)
+MISSING_COLUMN = 'missing_column'
+MISSING_VALUE = 'missing_value'
+DUPLICATE_KEY = 'duplicate_key'
+ZERO_VOLUME = 'zero_volume'
+OHLC_INCONSISTENT = 'ohlc_inconsistent'
+PRICE_LIMIT_EXCEEDED = 'price_limit'
+NEGATIVE_VALUE = 'negative_value'
+NET_MISMATCH = 'net_mismatch'
+EMPTY_INVESTOR_VALUES = 'empty_investor_values'
+MISSING_DATE = 'missing_date'
+
+# 기록만 하고 저장은 하는 검사
+WARNING_CHECKS = [PRICE_LIMIT_EXCEEDED]
+
+
+class ValidationResult:
+    """검증 결과 (저장할 행 / 격리할 행 / 빠진 날짜 / 저장하면서 기록만 할 경고 행)"""
+
+    def __init__(self, valid: pd.DataFrame, rejected: pd.DataFrame, gaps: pd.DataFrame,
+                 warnings: pd.DataFrame = None):
+        self.valid = valid
+        self.rejected = rejected
+        self.gaps = gaps
+        self.warnings = warnings if warnings is not None else _empty_quarantine()
+
+    @property
+    def quarantine(self) -> pd.DataFrame:
+        """격리 테이블에 기록할 전체 (걸린 행 + 빠진 날짜 + 경고 행)"""
+        frames = [df for df in (self.rejected, self.gaps, self.warnings) if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=QUARANTINE_FIELDS)
+        return pd.concat(frames, ignore_index=True)
+
+    def reasons(self) -> Dict[str, int]:
+        """검사별 건수"""
+        return self.quarantine['reason'].value_counts().to_dict()
+
+
+def _empty_quarantine() -> pd.DataFrame:
+    return pd.DataFrame(columns=QUARANTINE_FIELDS)
+
+
+class BatchValidator:
+    """팩트 테이블 배치 검증기 (IngestPipeline 의 validator)"""
+
+    def __init__(self, conn=None, calendar=None, price_limit: float = PRICE_LIMIT):
+        """
+        conn: 전일 종가 조회용 (없으면 배치 안의 전일 종가만 비교)
+        calendar: trading_calendar.TradingCalendar (없으면 배치에 있는 날짜만 거래일로 간주)
+        """
+        self.conn = conn
+        self.calendar = calendar
+        self.price_limit = price_limit
+
+    def validate(self, table: str, df: pd.DataFrame) -> ValidationResult:
+        """배치 전체 검사 → 저장할 행 / 격리할 행"""
+        if table not in TABLE_SPECS or df.empty:
+            return ValidationResult(df, _empty_quarantine(), _empty_quarantine())
+
+        spec = TABLE_SPECS[table]
+        key = KEY_COLUMNS[table]
+        df = df.reset_index(drop=True)
+
+        # 컬럼이 없거나 통째로 비어 있으면 배치 전체 격리
+        missing = [c for c in spec['columns'] if c not in df.columns or df[c].isna().all()]
+        if missing:
+            frame = df.reindex(columns=spec['columns'])
+            reasons = np.full(len(frame), MISSING_COLUMN, dtype=object)
+            rejected = self._rejected(frame, key, reasons, pd.Series(', '.join(missing), index=frame.index))
+            return ValidationResult(frame.iloc[0:0], rejected, _empty_quarantine())
+
+        df = df[spec['columns']]
+        dates = pd.to_datetime(df['date'])
+        checks = self._checks(table, df, dates, spec, key)
+
+        names = [name for name, _, _ in checks]
+        masks = [mask.to_numpy(dtype=bool) for _, mask, _ in checks]
+        reasons = np.select(masks, names, default='')
+        warned = np.isin(reasons, WARNING_CHECKS)
+        bad = (reasons != '') & ~warned
+
+        details = pd.Series('', index=df.index, dtype=object)
+        for name, mask, detail in checks:
+            if detail is not None:
+                rows = mask & (reasons == name)
+                if rows.any():
+                    details[rows] = detail(rows)
+
+        rejected = self._rejected(df[bad], key, reasons[bad], details[bad]) if bad.any() else _empty_quarantine()
+        warnings = self._rejected(df[warned], key, reasons[warned], details[warned]) if warned.any() else None
+        return ValidationResult(df[~bad], rejected, self._gaps(table, df, dates, key), warnings)
+
+    # ----------------------------
+    # 검사
+    # ----------------------------
+
+    def _checks(self, table: str, df: pd.DataFrame, dates: pd.Series, spec: Dict, key: str) -> List:
+        """(검사 이름, 걸린 행 마스크, 상세 설명 함수) 목록 (우선순위 순)"""
+        checks = [
+            (MISSING_VALUE, df.isna().any(axis=1),
+             lambda rows: df.loc[rows].isna().apply(lambda r: ', '.join(r.index[r]), axis=1)),
+            (DUPLICATE_KEY, self._conflicting_duplicates(df, spec['keys']), None),
+        ]
+
+        if table in ('daily_prices', 'sector_prices'):
+            ohlc = df[OHLC_COLUMNS]
+            inconsistent = (
+                (df['low'] > df['high'])
+                | (df['low'] > ohlc[['open', 'close']].min(axis=1))
+                | (df['high'] < ohlc[['open', 'close']].max(axis=1))
+                | (ohlc <= 0).any(axis=1)
+            )
+            if table == 'daily_prices':
+                checks.append((ZERO_VOLUME, df['volume'] == 0, None))
+            checks.append((OHLC_INCONSISTENT, inconsistent, lambda rows: self._ohlc_detail(df.loc[rows])))
+
+        if table == 'daily_prices':
+            jump, previous = self._price_jumps(df, dates)
+            checks.append((PRICE_LIMIT_EXCEEDED, jump.abs() > self.price_limit + PRICE_LIMIT_TOLERANCE,
+                           lambda rows: (previous[rows].astype('int64').astype(str) + ' → '
+                                         + df.loc[rows, 'close'].astype('int64').astype(str)
+                                         + ' (' + (jump[rows] * 100).round(1).astype(str) + '%)')))
+
+        if table == 'investor_trends':
+            values = df[['buy_value', 'sell_value']]
+            total = (values.abs().sum(axis=1)).groupby([df['ticker'], df['date']]).transform('sum')
+            checks += [
+                (NEGATIVE_VALUE, (values < 0).any(axis=1), None),
+                (NET_MISMATCH, df['net_value'] != df['buy_value'] - df['sell_value'], None),
+                (EMPTY_INVESTOR_VALUES, total == 0, None),
+            ]
+
+        return checks
+
+    @staticmethod
+    def _conflicting_duplicates(df: pd.DataFrame, keys: List[str]) -> pd.Series:
+        """같은 키인데 값이 다른 행 (완전히 같은 중복은 저장 시 하나로 합쳐지므로 제외)"""
+        duplicated = df.duplicated(keys, keep=False)
+        if not duplicated.any():
+            return duplicated
+
+        distinct = df[duplicated].drop_duplicates()
+        conflicting = distinct[distinct.duplicated(keys, keep=False)]
+        index = pd.MultiIndex.from_frame(df[keys])
+        return pd.Series(index.isin(pd.MultiIndex.from_frame(conflicting[keys])), index=df.index)
+
+    @staticmethod
+    def _ohlc_detail(rows: pd.DataFrame) -> pd.Series:
+        o, h, l, c = (rows[col].astype('int64').astype(str) for col in OHLC_COLUMNS)
+        return 'O ' + o + ' / H ' + h + ' / L ' + l + ' / C ' + c
+
+    def _price_jumps(self, df: pd.DataFrame, dates: pd.Series):
+        """종목별 전일 종가 대비 변동률 (배치 첫 날짜는 DB 의 직전 종가와 비교)
+
+        하루만 튄 잘못된 종가 다음 날은 튀기 전 종가와 비교해서, 정상인 다음 날까지 걸리지 않게 합니다.
+        """
+        order = np.lexsort((dates.to_numpy(), df['ticker'].to_numpy()))
+        ordered = df.iloc[order]
+        limit = self.price_limit + PRICE_LIMIT_TOLERANCE
+
+        tickers = ordered['ticker']
+        previous = ordered.groupby('ticker')['close'].shift()
+        first = ~tickers.duplicated()
+        if self.conn is not None:
+            reference = self._previous_closes(tickers[first], dates.iloc[order][first])
+            previous[first] = tickers[first].map(reference)
+        before_previous = previous.groupby(tickers).shift()
+
+        jump = (ordered['close'] / previous - 1).where(previous > 0).fillna(0.0)
+        spiked = (jump.abs() > limit).groupby(tickers).shift(fill_value=False)
+        recovered = spiked & ((ordered['close'] / before_previous - 1).abs() <= limit)
+        previous[recovered] = before_previous[recovered]
+        jump[recovered] = ordered['close'][recovered] / previous[recovered] - 1
+
+        return jump.reindex(df.index), previous.reindex(df.index)
+
+    def _previous_closes(self, tickers: pd.Series, first_dates: pd.Series) -> Dict[str, float]:
+        """종목별 기준 날짜 직전의 저장된 종가 (쿼리 1회)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT k.ticker, (
+                    SELECT p.close FROM daily_prices p
+                    WHERE p.ticker = k.ticker AND p.date < k.first_date
+                    ORDER BY p.date DESC LIMIT 1
+                )
+                FROM unnest(%s::text[], %s::date[]) AS k(ticker, first_date)
+            """, (tickers.tolist(), first_dates.dt.date.tolist()))
+            return {ticker: close for ticker, close in cursor.fetchall() if close is not None}
+
+    def _gaps(self, table: str, df: pd.DataFrame, dates: pd.Series, key: str) -> pd.DataFrame:
+        """종목별 첫 날짜 ~ 마지막 날짜 사이에서 빠진 거래일
+
+        거래일은 배치에 있는 날짜 + 달력에 저장된 거래일 (배치 기간 안) 입니다.
+        """
+        days = dates.to_numpy().astype('datetime64[D]')
+        pairs = pd.DataFrame({key: df[key].to_numpy(), 'day': days}).drop_duplicates()
+        days = pairs['day'].to_numpy().astype('datetime64[D]')
+        expected = np.unique(days)
+
+        if self.calendar is not None and self.calendar.trading_days_known:
+            known = self.calendar.trading_days_known
+            start = bisect.bisect_left(known, expected[0].astype(object))
+            end = bisect.bisect_right(known, expected[-1].astype(object))
+            if end > start:
+                expected = np.union1d(expected, np.array(known[start:end], dtype='datetime64[D]'))
+
+        position = np.searchsorted(expected, days)
+        spans = pd.DataFrame({key: pairs[key].to_numpy(), 'position': position}).groupby(key)['position']
+        summary = spans.agg(['min', 'max', 'count'])
+        gapped = summary[summary['max'] - summary['min'] + 1 > summary['count']]
+        if gapped.empty:
+            return _empty_quarantine()
+
+        # 빠진 날짜가 있는 종목만 (드묾) 날짜 집합 비교
+        rows = []
+        positions = spans.apply(set)
+        for code, span in gapped.iterrows():
+            for missing in sorted(set(range(span['min'], span['max'] + 1)) - positions[code]):
+                rows.append({'key': str(code), 'date': pd.Timestamp(expected[missing]).date(),
+                             'reason': MISSING_DATE, 'detail': table, 'payload': None})
+        return pd.DataFrame(rows, columns=QUARANTINE_FIELDS)
+
+    @staticmethod
+    def _rejected(rows: pd.DataFrame, key: str, reasons, details: pd.Series) -> pd.DataFrame:
+        """걸린 행 → 격리 테이블 행 (원래 값은 payload 로 보관)"""
+        payload = json.loads(rows.to_json(orient='records', date_format='iso', force_ascii=False))
+        dates = pd.to_datetime(rows['date'], errors='coerce')
+        return pd.DataFrame({
+            'key': rows[key].fillna('').astype(str).to_numpy(),
+            'date': [d.date() if pd.notna(d) else None for d in dates],
+            'reason': np.asarray(reasons, dtype=object),
+            'detail': details.to_numpy(),
+            'payload': payload,
+        }, columns=QUARANTINE_FIELDS)
+
+
+def write_quarantine(conn, table: str, quarantine: pd.DataFrame) -> int:
+    """격리 행 저장 (같은 키·날짜·사유는 횟수만 늘림, 커밋은 호출하는 쪽에서)"""
+    if quarantine.empty:
+        return 0
+
+    quarantine = quarantine.drop_duplicates(['key', 'date', 'reason'], keep='last')
+    values = [
+        (table, row.key, row.date, row.reason, row.detail or None,
+         Json(row.payload) if row.payload is not None else None)
+        for row in quarantine.itertuples(index=False)
+    ]
+
+    cursor = conn.cursor()
+    cursor.execute("SAVEPOINT write_quarantine")
+    try:
+        execute_values(cursor, """
+            INSERT INTO ingest_quarantine (table_name, key, date, reason, detail, payload)
+            VALUES %s
+            ON CONFLICT (table_name, key, date, reason) DO UPDATE SET
+            detail = EXCLUDED.detail, payload = EXCLUDED.payload,
+            occurrences = ingest_quarantine.occurrences + 1, last_seen = CURRENT_TIMESTAMP
+        """, values)
+        cursor.execute("RELEASE SAVEPOINT write_quarantine")
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT write_quarantine")
+        raise
+    finally:
+        cursor.close()
+
+    return len(values)
@@ -0,0 +1,24 @@
+"""
+수집 스크립트 공통 데이터베이스 연결 설정
+
+테이블 / 뷰는 db/schema.sql 로 만듭니다 (스크립트는 테이블을 만들지 않음).
+스키마가 바뀐 뒤에는 schema.sql 을 다시 적용하세요 (이미 있는 테이블은 그대로 둠).
+"""
+
+import os
+
+import psycopg2
+
+# 데이터베이스 연결 설정
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'k_stock_insight'),
+    'user': os.getenv('DB_USER', 'hhhhp'),
+    'password': os.getenv('DB_PASSWORD', '')
+}
+
+
+def connect():
+    """DB_CONFIG 로 연결"""
+    return psycopg2.connect(**DB_CONFIG)
@@ -0,0 +1,207 @@
+"""
+오프라인용 가짜 pykrx 백엔드
+
+FetchEngine 에 pykrx.stock 대신 넣어서 네트워크 없이 수집 로직과 처리량을 확인할 때 사용합니다.
+- 같은 (종목, 날짜)에는 항상 같은 값을 돌려주는 결정적 데이터
+- 호출당 응답 지연과 실패 확률 설정 가능
+- pykrx 와 같은 한글 컬럼명 / 인덱스 이름 사용
+"""
+
+import random
+import threading
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+MARKET_PREFIX = {'KOSPI': 0, 'KOSDAQ': 1}
+
+
+def _unit_noise(keys: np.ndarray, salt: int) -> np.ndarray:
+    """정수 키 배열 → [0, 1) 균등 분포 값 (결정적 해시)"""
+    x = (keys.astype(np.uint64) * np.uint64(2654435761) + np.uint64(salt * 40503)) % np.uint64(2 ** 32)
+    x = (x ^ (x >> np.uint64(13))) * np.uint64(1274126177) % np.uint64(2 ** 32)
+    return x.astype(np.float64) / 2 ** 32
+
+
+class FakeKRX:
+    """pykrx.stock 과 같은 함수 이름을 제공하는 가짜 백엔드"""
+
+    def __init__(self, ticker_count: int = 2800, latency: float = 0.0, error_rate: float = 0.0,
+                 sector_count: int = 40, seed: int = 42):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+        # KOSPI 약 1/3, KOSDAQ 약 2/3
+        kospi = ticker_count // 3
+        self.tickers = {
+            'KOSPI': [f"{i:06d}" for i in range(10, 10 + kospi * 10, 10)],
+            'KOSDAQ': [f"{i:06d}" for i in range(100005, 100005 + (ticker_count - kospi) * 10, 10)],
+        }
+        self.sector_codes = [str(1001 + i) for i in range(sector_count)]
+
+    # ----------------------------
+    # 내부 유틸
+    # ----------------------------
+
+    def _call(self):
+        """호출 1회: 지연 + 확률적 실패"""
+        with self._lock:
+            self.call_count += 1
+            fail = self.random.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("FakeKRX: 가짜 네트워크 오류")
+
+    @staticmethod
+    def _ohlcv(codes: np.ndarray, days: np.ndarray) -> pd.DataFrame:
+        """(코드, 날짜) 배열로 OHLCV 생성 (같은 입력 → 같은 값)"""
+        base = 1000 + (_unit_noise(codes, 1) * 99000).round(-1)
+        keys = codes * 100000 + days
+        # 하루 변동이 KRX 가격제한폭(±30%) 안에 들도록 기준가 ±10% 범위
+        close = (base * (0.9 + 0.2 * _unit_noise(keys, 2))).round(-1)
+        open_ = (close * (0.97 + 0.06 * _unit_noise(keys, 3))).round(-1)
+        high = np.maximum(open_, close) * (1 + 0.03 * _unit_noise(keys, 4))
+        low = np.minimum(open_, close) * (1 - 0.03 * _unit_noise(keys, 5))
+        volume = (100 + _unit_noise(keys, 6) ** 3 * 5_000_000).astype(np.int64)  # 거래정지(0) 없음
+
+        return pd.DataFrame({
+            '시가': open_.astype(np.int64),
+            '고가': high.round(-1).astype(np.int64),
+            '저가': low.round(-1).astype(np.int64),
+            '종가': close.astype(np.int64),
+            '거래량': volume,
+            '거래대금': (volume * close).astype(np.int64),
+            '등락률': ((close / base - 1) * 100).round(2),
+        })
+
+    @staticmethod
+    def _days(dates: pd.DatetimeIndex) -> np.ndarray:
+        return (dates.values.astype('datetime64[D]').astype(np.int64))
+
+    # ----------------------------
+    # 종목 정보
+    # ----------------------------
+
+    def get_market_ticker_list(self, date: str = None, market: str = 'KOSPI') -> List[str]:
+        self._call()
+        if market == 'ALL':
+            return self.tickers['KOSPI'] + self.tickers['KOSDAQ']
+        return list(self.tickers.get(market, []))
+
+    def get_market_ticker_name(self, ticker: str) -> str:
+        self._call()
+        return f"가짜종목{ticker}"
+
+    def get_market_price_change_by_ticker(self, fromdate: str, todate: str,
+                                          market: str = 'KOSPI') -> pd.DataFrame:
+        self._call()
+        tickers = self.tickers.get(market, [])
+        if pd.Timestamp(todate).weekday() >= 5:
+            return pd.DataFrame()
+
+        codes = np.array([int(t) for t in tickers], dtype=np.int64)
+        start = self._ohlcv(codes, np.full(len(codes), self._days(pd.DatetimeIndex([fromdate]))[0]))
+        end = self._ohlcv(codes, np.full(len(codes), self._days(pd.DatetimeIndex([todate]))[0]))
+
+        df = pd.DataFrame({
+            '종목명': [f"가짜종목{t}" for t in tickers],
+            '시가': start['시가'].values,
+            '종가': end['종가'].values,
+            '변동폭': (end['종가'] - start['시가']).values,
+            '등락률': ((end['종가'] / start['시가'] - 1) * 100).round(2).values,
+            '거래량': end['거래량'].values,
+            '거래대금': end['거래대금'].values,
+        }, index=pd.Index(tickers, name='티커'))
+        return df
+
+    # ----------------------------
+    # 시세
+    # ----------------------------
+
+    def get_market_ohlcv_by_date(self, fromdate: str, todate: str, ticker: str, freq: str = 'd',
+                                 adjusted: bool = True) -> pd.DataFrame:
+        self._call()
+        dates = pd.bdate_range(fromdate, todate, name='날짜')
+        codes = np.full(len(dates), int(ticker))
+        df = self._ohlcv(codes, self._days(dates))
+        df.index = dates
+        return df
+
+    def get_market_ohlcv_by_ticker(self, date: str, market: str = 'KOSPI') -> pd.DataFrame:
+        self._call()
+        tickers = self.tickers.get(market, [])
+        if pd.Timestamp(date).weekday() >= 5:
+            return pd.DataFrame()
+
+        codes = np.array([int(t) for t in tickers], dtype=np.int64)
+        days = np.full(len(codes), self._days(pd.DatetimeIndex([date]))[0])
+        df = self._ohlcv(codes, days)
+        df.index = pd.Index(tickers, name='티커')
+        return df
+
+    # ----------------------------
+    # 업종 지수
+    # ----------------------------
+
+    def get_index_ticker_list(self, date: str = None, market: str = 'KOSPI') -> List[str]:
+        self._call()
+        return list(self.sector_codes)
+
+    def get_index_ticker_name(self, ticker: str) -> str:
+        self._call()
+        return f"가짜업종{ticker}"
+
+    def get_index_portfolio_deposit_file(self, ticker: str, date: str = None) -> List[str]:
+        self._call()
+        # 업종마다 전체 종목을 번갈아 나눠 가짐
+        offset = self.sector_codes.index(ticker) if ticker in self.sector_codes else 0
+        return (self.tickers['KOSPI'] + self.tickers['KOSDAQ'])[offset::len(self.sector_codes)]
+
+    def get_index_ohlcv_by_date(self, fromdate: str, todate: str, ticker: str) -> pd.DataFrame:
+        self._call()
+        dates = pd.bdate_range(fromdate, todate, name='날짜')
+        codes = np.full(len(dates), int(ticker) + 900000)
+        df = self._ohlcv(codes, self._days(dates)).drop(columns=['등락률'])
+        df.index = dates
+        return df
+
+    # ----------------------------
+    # 투자자 동향
+    # ----------------------------
+
+    def get_market_trading_value_by_date(self, fromdate: str, todate: str, ticker: str,
+                                         on: str = '순매수', detail: bool = False) -> pd.DataFrame:
+        """투자자 유형별 매수 / 매도 / 순매수 거래대금 (순매수 = 매수 - 매도)"""
+        self._call()
+        dates = pd.bdate_range(fromdate, todate, name='날짜')
+        keys = int(ticker) * 100000 + self._days(dates)
+
+        detail_columns = ['금융투자', '보험', '투신', '사모', '은행', '기타금융', '연기금',
+                          '기타법인', '개인', '외국인', '기타외국인']
+        buy, sell = {}, {}
+        for salt, column in enumerate(detail_columns, start=10):
+            buy[column] = (_unit_noise(keys, salt) * 1e9).astype(np.int64)
+            sell[column] = (_unit_noise(keys, salt + 50) * 1e9).astype(np.int64)
+
+        values = {'매수': buy, '매도': sell}.get(on)
+        if values is None:
+            values = {column: buy[column] - sell[column] for column in detail_columns}
+
+        df = pd.DataFrame(values, index=dates)
+        if not detail:
+            institution = df[detail_columns[:7]].sum(axis=1)
+            df = pd.DataFrame({
+                '기관합계': institution,
+                '기타법인': df['기타법인'],
+                '개인': df['개인'],
+                '외국인합계': df['외국인'] + df['기타외국인'],
+            }, index=dates)
+        df['전체'] = df.sum(axis=1)
+        return df
@@ -0,0 +1,231 @@
+"""
+API 호출 엔진
+
+data_collector.py / data_updater.py 가 함께 사용하는 pykrx 호출 계층입니다.
+- 고정 크기 워커 풀로 동시 호출
+- 토큰 버킷으로 초당 호출 수 제한 (호출마다 sleep 하지 않음)
+- 실패한 호출은 지터가 섞인 지수 백오프로 재시도
+- 백엔드 교체 가능 (기본 pykrx.stock, 오프라인 테스트용 FakeKRX 등)
+- 응답 캐시 연결 가능 (krx_cache.ResponseCache, 캐시 적중 시 속도 제한 없이 바로 반환)
+- 계측 연결 가능 (ingest_metrics.RunMetrics, 시도마다 지연 / 재시도 / 실패 기록)
+
+오프라인 처리량 확인:
+    python scripts/fetch_engine.py --calls 500 --rate 50 --workers 8 --latency 0.05
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+# 기본 설정
+DEFAULT_WORKERS = 4       # 동시 호출 워커 수
+DEFAULT_RATE = 5.0        # 초당 최대 호출 수 (0 이하면 제한 없음)
+DEFAULT_BURST = 5         # 순간 최대 호출 수
+DEFAULT_RETRIES = 3       # 호출당 최대 재시도 횟수
+BACKOFF_BASE = 0.5        # 백오프 시작 대기 (초)
+BACKOFF_MAX = 10.0        # 백오프 최대 대기 (초)
+
+# 캐시에 없음을 나타내는 표식 (None 도 정상 응답일 수 있으므로)
+MISS = object()
+
+
+class NonRetryableError(Exception):
+    """재시도해도 결과가 같은 오류 (바로 실패 처리)"""
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷 (rate: 초당 토큰, capacity: 최대 보유 토큰)"""
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """토큰 1개를 얻을 때까지 대기, 대기한 시간(초) 반환"""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+class _RateLimitedAPI:
+    """백엔드 함수 호출을 FetchEngine.call 로 감싸는 프록시 (engine.api.get_xxx(...))"""
+
+    def __init__(self, engine: 'FetchEngine'):
+        self._engine = engine
+
+    def __getattr__(self, name: str) -> Callable:
+        def method(*args, **kwargs):
+            return self._engine.call(name, *args, **kwargs)
+        method.__name__ = name
+        return method
+
+
+class FetchEngine:
+    """워커 풀 + 토큰 버킷 + 재시도를 묶은 API 호출 엔진"""
+
+    def __init__(self, backend: Any = None, workers: int = DEFAULT_WORKERS,
+                 rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_retries: int = DEFAULT_RETRIES, cache: Any = None, metrics: Any = None):
+        if backend is None:
+            from pykrx import stock as backend
+
+        self.backend = backend
+        self.cache = cache
+        self.metrics = metrics
+        self.workers = workers
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate, burst)
+        self.api = _RateLimitedAPI(self)
+
+        # 호출 통계
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def call(self, func_name: str, *args, **kwargs) -> Any:
+        """백엔드 함수 1회 호출 (캐시 → 속도 제한 + 재시도)"""
+        if self.cache is not None:
+            cached = self.cache.get(func_name, args, kwargs)
+            if cached is not MISS:
+                return cached
+
+        func = getattr(self.backend, func_name)
+
+        for attempt in range(self.max_retries + 1):
+            waited = self.bucket.acquire()
+            with self._stats_lock:
+                self.calls += 1
+                self.throttled_seconds += waited
+
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except NonRetryableError:
+                with self._stats_lock:
+                    self.failures += 1
+                self._record(func_name, started, waited, failed=True)
+                raise
+            except Exception:
+                if attempt >= self.max_retries:
+                    with self._stats_lock:
+                        self.failures += 1
+                    self._record(func_name, started, waited, failed=True)
+                    raise
+
+                with self._stats_lock:
+                    self.retries += 1
+                self._record(func_name, started, waited, retried=True)
+
+                # full jitter 백오프
+                time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))))
+                continue
+
+            self._record(func_name, started, waited)
+            if self.cache is not None:
+                self.cache.put(func_name, args, kwargs, result)
+            return result
+
+    def _record(self, func_name: str, started: float, waited: float,
+                retried: bool = False, failed: bool = False):
+        """계측이 연결되어 있으면 시도 1회 기록"""
+        if self.metrics is not None:
+            self.metrics.record_call(func_name, time.perf_counter() - started, waited, retried, failed)
+
+    def map(self, func: Callable, items: Iterable) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+        """items 각각에 func 을 워커 풀에서 실행, 완료 순서대로 (item, 결과, 에러) 반환
+
+        동시에 대기 중인 작업은 워커 수의 2배로 제한해서 메모리 사용량을 일정하게 유지합니다.
+        """
+        items = iter(items)
+        max_pending = self.workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+
+            def submit_next() -> bool:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return False
+                pending[executor.submit(func, item)] = item
+                return True
+
+            while len(pending) < max_pending and submit_next():
+                pass
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    yield item, (None if error else future.result()), error
+                    submit_next()
+
+    def stats(self) -> dict:
+        """호출 통계"""
+        with self._stats_lock:
+            stats = {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'throttled_seconds': round(self.throttled_seconds, 3)
+            }
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        return stats
+
+
+def main():
+    """가짜 백엔드로 오프라인 처리량 측정"""
+    import argparse
+    from fake_krx import FakeKRX
+
+    parser = argparse.ArgumentParser(description="FetchEngine 오프라인 처리량 측정")
+    parser.add_argument('--calls', type=int, default=200, help="호출 수")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="워커 수")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="초당 최대 호출 수")
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help="순간 최대 호출 수")
+    parser.add_argument('--latency', type=float, default=0.05, help="가짜 API 응답 지연 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="가짜 API 실패 확률")
+    args = parser.parse_args()
+
+    backend = FakeKRX(ticker_count=args.calls, latency=args.latency, error_rate=args.error_rate)
+    engine = FetchEngine(backend, workers=args.workers, rate=args.rate, burst=args.burst)
+    tickers = backend.get_market_ticker_list(market='ALL')[:args.calls]
+
+    start = time.time()
+    failed = 0
+    for _, _, error in engine.map(
+        lambda t: engine.api.get_market_ohlcv_by_date('20250102', '20250131', t), tickers
+    ):
+        failed += error is not None
+
+    elapsed = time.time() - start
+    print(f"{len(tickers)}건 / {elapsed:.2f}초 ({len(tickers) / elapsed:.1f}건/초), 실패 {failed}건")
+    print(engine.stats())
+
+
+if __name__ == "__main__":
+    main()
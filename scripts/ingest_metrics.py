@@ -0,0 +1,335 @@
+"""
+수집 계측 / 실행 리포트
+
+data_collector.py / data_updater.py 가 함께 사용하는 단계별 계측 모듈입니다.
+- 단계(stocks, daily_prices, investor_trends, sectors, sector_prices)별로 따로 집계
+  - API 호출 지연 히스토그램, 호출 / 재시도 / 실패 수, 속도 제한 대기 시간
+  - 조회한 행 수와 저장 결과(신규 / 변경 / 동일), 검증에 걸려 격리한 행 수(사유별), 커밋 시간 히스토그램
+  - 변환 / 저장 시간, 실패한 종목(업종, 날짜)과 에러 목록
+- 실행마다 JSON 리포트 저장, 원하면 Prometheus textfile(node_exporter textfile collector) 형식으로도 저장
+
+느린 날의 원인을 나눠 보는 기준:
+- API 지연(api.latency.sum) 이 크면 KRX 쪽, 커밋 / 저장 시간(write_seconds) 이 크면 DB 쪽,
+  변환 시간(transform_seconds) 이나 나머지 시간이 크면 수집 코드 쪽
+
+사용 예:
+    metrics = RunMetrics('collector')
+    engine = FetchEngine(stock, metrics=metrics)
+    with metrics.stage('daily_prices'):
+        stats = pipeline.run(...)
+        metrics.record_pipeline(stats)
+    metrics.save(prometheus_path='/var/lib/node_exporter/kstock_collector.prom')
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+# API 호출 지연 / 커밋 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COMMIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# 리포트에 남길 실패 목록 최대 길이 (단계별)
+MAX_FAILURES = 1000
+
+# Prometheus 지표 이름 앞부분
+METRIC_PREFIX = 'kstock_ingest'
+
+# 단계 밖에서 들어온 API 호출을 모으는 단계 이름
+NO_STAGE = 'other'
+
+
+class Histogram:
+    """누적 구간 히스토그램 (Prometheus 와 같은 le 구간)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """le 구간별 누적 개수 (+Inf 포함)"""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [str(b) for b in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': dict(zip(labels, self.cumulative())),
+        }
+
+
+class StageMetrics:
+    """단계 하나의 계측값"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 'pending'
+        self.error = None
+        self.started = None
+        self.elapsed = 0.0
+
+        self.api_latency = Histogram(LATENCY_BUCKETS)
+        self.api_calls = 0
+        self.api_retries = 0
+        self.api_failures = 0
+        self.api_throttled_seconds = 0.0
+        self.api_functions: Dict[str, int] = {}
+
+        self.units = 0
+        self.rows_fetched = 0
+        self.rows_written = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.rows_quarantined: Dict[str, int] = {}
+        self.commit_latency = Histogram(COMMIT_BUCKETS)
+        self.transform_seconds = 0.0
+        self.write_seconds = 0.0
+        self.failures: List[Dict[str, str]] = []
+        self.failure_count = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'status': self.status,
+            'error': self.error,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'api': {
+                'calls': self.api_calls,
+                'retries': self.api_retries,
+                'failures': self.api_failures,
+                'throttled_seconds': round(self.api_throttled_seconds, 3),
+                'functions': dict(self.api_functions),
+                'latency': self.api_latency.as_dict(),
+            },
+            'units': self.units,
+            'rows_fetched': self.rows_fetched,
+            'rows_written': dict(self.rows_written),
+            'rows_quarantined': dict(self.rows_quarantined),
+            'commits': self.commit_latency.as_dict(),
+            'transform_seconds': round(self.transform_seconds, 3),
+            'write_seconds': round(self.write_seconds, 3),
+            'failure_count': self.failure_count,
+            'failures': list(self.failures),
+        }
+
+
+class RunMetrics:
+    """실행 한 번(collector / updater)의 단계별 계측"""
+
+    def __init__(self, job: str):
+        self.job = job
+        self.started_at = datetime.now()
+        self.stages: Dict[str, StageMetrics] = {}
+        self.current: Optional[StageMetrics] = None
+        self.lock = threading.Lock()
+
+    def _stage(self, name: str) -> StageMetrics:
+        if name not in self.stages:
+            self.stages[name] = StageMetrics(name)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str):
+        """with 블록 동안의 API 호출 / 저장 결과를 name 단계로 집계"""
+        stage = self._stage(name)
+        stage.status = 'running'
+        stage.started = time.perf_counter()
+        previous, self.current = self.current, stage
+
+        try:
+            yield stage
+            stage.status = 'failed' if stage.failure_count else 'ok'
+        except BaseException as e:
+            stage.status = 'error'
+            stage.error = str(e) or type(e).__name__
+            raise
+        finally:
+            stage.elapsed += time.perf_counter() - stage.started
+            self.current = previous
+
+    def _active(self) -> StageMetrics:
+        return self.current or self._stage(NO_STAGE)
+
+    # ----------------------------
+    # 기록 (FetchEngine / 수집 스크립트에서 호출)
+    # ----------------------------
+
+    def record_call(self, func_name: str, seconds: float, waited: float = 0.0,
+                    retried: bool = False, failed: bool = False):
+        """백엔드 호출 1회 (재시도 포함 각 시도마다)"""
+        with self.lock:
+            stage = self._active()
+            stage.api_latency.observe(seconds)
+            stage.api_calls += 1
+            stage.api_throttled_seconds += waited
+            stage.api_functions[func_name] = stage.api_functions.get(func_name, 0) + 1
+            stage.api_retries += retried
+            stage.api_failures += failed
+
+    def record_rows(self, units: int = 0, fetched: int = 0, inserted: int = 0,
+                    updated: int = 0, unchanged: int = 0):
+        """파이프라인을 거치지 않는 단계의 행 수 (종목 정보, 섹터 정보)"""
+        with self.lock:
+            stage = self._active()
+            stage.units += units
+            stage.rows_fetched += fetched
+            stage.rows_written['inserted'] += inserted
+            stage.rows_written['updated'] += updated
+            stage.rows_written['unchanged'] += unchanged
+
+    def record_failure(self, unit: Any, error: Any):
+        """실패한 작업 단위 (종목 / 업종 / 날짜)"""
+        with self.lock:
+            stage = self._active()
+            stage.failure_count += 1
+            if len(stage.failures) < MAX_FAILURES:
+                stage.failures.append({'unit': str(unit), 'error': str(error)})
+
+    def record_pipeline(self, stats):
+        """pipeline.PipelineStats 합치기"""
+        for unit, error in stats.failures:
+            self.record_failure(unit, error)
+
+        with self.lock:
+            stage = self._active()
+            stage.units += stats.items
+            stage.rows_fetched += stats.rows_fetched
+            for key, value in stats.result.as_dict().items():
+                stage.rows_written[key] += value
+            for reason, count in stats.quarantined.items():
+                stage.rows_quarantined[reason] = stage.rows_quarantined.get(reason, 0) + count
+            for seconds in stats.commit_seconds:
+                stage.commit_latency.observe(seconds)
+            stage.transform_seconds += stats.transform_seconds
+            stage.write_seconds += stats.write_seconds
+
+    # ----------------------------
+    # 리포트
+    # ----------------------------
+
+    def as_dict(self) -> Dict[str, Any]:
+        stages = [stage.as_dict() for stage in self.stages.values()]
+        return {
+            'job': self.job,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_seconds': round(sum(s['elapsed_seconds'] for s in stages), 3),
+            'stages': stages,
+        }
+
+    def write_json(self, path: str) -> str:
+        """JSON 리포트 저장"""
+        _atomic_write(path, json.dumps(self.as_dict(), ensure_ascii=False, indent=2))
+        return path
+
+    def prometheus_lines(self) -> List[str]:
+        """Prometheus 텍스트 형식"""
+        p = METRIC_PREFIX
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+
+        def labels(stage: StageMetrics, **extra) -> str:
+            pairs = {'job': self.job, 'stage': stage.name, **extra}
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs.items()) + '}'
+
+        def histogram(name: str, attr: str, help_text: str):
+            metric(name, 'histogram', help_text)
+            for stage in self.stages.values():
+                hist = getattr(stage, attr)
+                bounds = [str(b) for b in hist.buckets] + ['+Inf']
+                for bound, count in zip(bounds, hist.cumulative()):
+                    lines.append(f"{p}_{name}_bucket{labels(stage, le=bound)} {count}")
+                lines.append(f"{p}_{name}_sum{labels(stage)} {hist.sum:.6f}")
+                lines.append(f"{p}_{name}_count{labels(stage)} {hist.count}")
+
+        def gauge(name: str, help_text: str, value_of):
+            metric(name, 'gauge', help_text)
+            for stage in self.stages.values():
+                lines.append(f"{p}_{name}{labels(stage)} {value_of(stage)}")
+
+        gauge('stage_duration_seconds', "단계 경과 시간 (초)", lambda s: f"{s.elapsed:.3f}")
+        gauge('stage_success', "단계가 오류 없이 끝나면 1", lambda s: int(s.status == 'ok'))
+        histogram('api_call_duration_seconds', 'api_latency', "API 호출 지연 (초)")
+        gauge('api_retries', "API 재시도 수", lambda s: s.api_retries)
+        gauge('api_failures', "재시도 후에도 실패한 API 호출 수", lambda s: s.api_failures)
+        gauge('api_throttled_seconds', "속도 제한 대기 시간 (초)",
+              lambda s: f"{s.api_throttled_seconds:.3f}")
+        gauge('rows_fetched', "조회한 행 수", lambda s: s.rows_fetched)
+
+        metric('rows_written', 'gauge', "저장 결과별 행 수 (inserted / updated / unchanged)")
+        for stage in self.stages.values():
+            for result, count in stage.rows_written.items():
+                lines.append(f"{p}_rows_written{labels(stage, result=result)} {count}")
+
+        metric('rows_quarantined', 'gauge', "검증에 걸려 격리한 행 수 (사유별)")
+        for stage in self.stages.values():
+            for reason, count in stage.rows_quarantined.items():
+                lines.append(f"{p}_rows_quarantined{labels(stage, reason=reason)} {count}")
+
+        histogram('commit_duration_seconds', 'commit_latency', "DB 커밋 시간 (초)")
+        gauge('transform_seconds', "응답 변환 시간 (초)", lambda s: f"{s.transform_seconds:.3f}")
+        gauge('write_seconds', "DB 저장 시간 (초)", lambda s: f"{s.write_seconds:.3f}")
+        gauge('unit_failures', "실패한 작업 단위 수 (종목 / 업종 / 날짜)", lambda s: s.failure_count)
+
+        metric('last_run_timestamp_seconds', 'gauge', "마지막 실행 시작 시각 (unix time)")
+        lines.append(f'{p}_last_run_timestamp_seconds{{job="{self.job}"}} {self.started_at.timestamp():.0f}')
+        return lines
+
+    def write_prometheus(self, path: str) -> str:
+        """Prometheus textfile 저장 (수집기가 쓰다 만 파일을 읽지 않도록 교체 방식)"""
+        _atomic_write(path, '\n'.join(self.prometheus_lines()) + '\n')
+        return path
+
+    def save(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> str:
+        """JSON 리포트(경로가 없으면 기본 경로)와 Prometheus textfile(경로가 있을 때만) 저장, JSON 경로 반환"""
+        json_path = self.write_json(json_path or default_report_path(self.job))
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+        return json_path
+
+    def summary(self) -> List[str]:
+        """로그용 단계별 한 줄 요약"""
+        lines = []
+        for s in self.stages.values():
+            written = s.rows_written['inserted'] + s.rows_written['updated']
+            lines.append(
+                f"{s.name}: {s.status} {s.elapsed:.1f}초 / API {s.api_calls:,}회 "
+                f"(지연 합계 {s.api_latency.sum:.1f}초, 재시도 {s.api_retries}, 실패 {s.api_failures}) / "
+                f"조회 {s.rows_fetched:,}행 → 저장 {written:,}행 (격리 {sum(s.rows_quarantined.values()):,}) / 커밋 {s.commit_latency.count}회 "
+                f"{s.commit_latency.sum:.1f}초 / 실패 단위 {s.failure_count}"
+            )
+        return lines
+
+
+def default_report_path(job: str, directory: str = 'ingest_reports') -> str:
+    """기본 리포트 경로 (실행 시각별 파일)"""
+    return os.path.join(directory, f"{job}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+
+def _atomic_write(path: str, text: str):
+    """임시 파일에 쓰고 교체"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
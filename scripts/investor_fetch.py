@@ -0,0 +1,69 @@
+"""
+투자자 동향 수집 공통 모듈
+
+data_collector.py / data_updater.py 가 함께 사용하는 투자자 동향 수집 로직입니다.
+- 종목 하나의 기간 매수 / 매도 거래대금을 투자자 유형별(상세)로 조회
+- pykrx 의 넓은 표(날짜 × 투자자 유형)를 investor_trends 의 긴 표
+  (종목, 날짜, 투자자 유형, 매수, 매도, 순매수)로 한 번에 변환 (행 단위 반복 없음)
+- 투자자 유형은 config.py 의 INVESTOR_TYPES 12종 (기관합계는 기관 세부 유형의 합)
+
+api 인자(첫 번째)에는 pykrx.stock 또는 같은 함수를 가진 객체(FetchEngine.api, FakeKRX 등)를 넘깁니다.
+"""
+
+import os
+import sys
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# 프로젝트 루트의 config.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import INVESTOR_TYPES  # noqa: E402
+
+INVESTOR_TREND_FIELDS = ['ticker', 'date', 'investor_type', 'buy_value', 'sell_value', 'net_value']
+
+# 기관합계를 구성하는 기관 세부 유형 (pykrx detail=True 결과에는 기관합계 컬럼이 없음)
+INSTITUTION_TYPES = ['금융투자', '보험', '투신', '사모', '은행', '기타금융', '연기금']
+INSTITUTION_TOTAL = '기관합계'
+
+
+def _investor_matrix(df: pd.DataFrame, dates: pd.Index) -> np.ndarray:
+    """넓은 표 → (날짜 수 × 투자자 유형 수) 정수 행렬 (INVESTOR_TYPES 순서)"""
+    df = df.reindex(index=dates).fillna(0)
+    if INSTITUTION_TOTAL not in df.columns:
+        df[INSTITUTION_TOTAL] = df.reindex(columns=INSTITUTION_TYPES, fill_value=0).sum(axis=1)
+    return df.reindex(columns=list(INVESTOR_TYPES), fill_value=0).to_numpy(dtype=np.int64)
+
+
+def melt_investor_values(ticker: str, buy: pd.DataFrame, sell: pd.DataFrame) -> pd.DataFrame:
+    """매수 / 매도 넓은 표(날짜 × 투자자 유형)를 investor_trends 긴 표로 변환"""
+    if buy.empty and sell.empty:
+        return pd.DataFrame(columns=INVESTOR_TREND_FIELDS)
+
+    dates = buy.index.union(sell.index)
+    buy_values = _investor_matrix(buy, dates)
+    sell_values = _investor_matrix(sell, dates)
+    type_count = len(INVESTOR_TYPES)
+
+    df = pd.DataFrame({
+        'ticker': ticker,
+        'date': np.repeat(dates.to_numpy(), type_count),
+        'investor_type': np.tile(list(INVESTOR_TYPES), len(dates)),
+        'buy_value': buy_values.ravel(),
+        'sell_value': sell_values.ravel(),
+    })
+    df['net_value'] = df['buy_value'] - df['sell_value']
+    return df[INVESTOR_TREND_FIELDS]
+
+
+def fetch_investor_values(api, ticker: str, start_date: str, end_date: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """종목 하나의 기간 투자자 유형별 매수 / 매도 거래대금 조회 (pykrx 응답 그대로)"""
+    buy = api.get_market_trading_value_by_date(start_date, end_date, ticker, on='매수', detail=True)
+    sell = api.get_market_trading_value_by_date(start_date, end_date, ticker, on='매도', detail=True)
+    return buy, sell
+
+
+def fetch_investor_trends(api, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """종목 하나의 기간 투자자 동향 조회 (매수 / 매도 2회 호출, 순매수는 차이로 계산)"""
+    return melt_investor_values(ticker, *fetch_investor_values(api, ticker, start_date, end_date))
@@ -0,0 +1,131 @@
+"""
+pykrx 응답 디스크 캐시
+
+FetchEngine 에 연결해서 pykrx 호출 결과를 로컬 디스크에 저장하고 재사용합니다.
+- 캐시 키: 함수 이름 + 인자
+- DataFrame 은 Parquet (컬럼 기반 압축), 목록/문자열 등은 JSON 으로 저장
+- 만료 정책: 인자의 날짜가 모두 저장 시각보다 과거면 만료 없음, 조회 날짜 당일 이후에 저장했거나 날짜 없는 호출은 TODAY_TTL 후 만료
+- 재생(offline) 모드: 네트워크를 전혀 쓰지 않고 캐시만 사용 (만료 무시, 없으면 CacheMissError)
+
+사용법:
+    python scripts/data_collector.py --cache-dir .krx_cache
+    python scripts/data_collector.py --cache-dir .krx_cache --offline
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - DataFrame.to_parquet / read_parquet 엔진
+except ImportError:
+    print("pyarrow 모듈이 설치되지 않았습니다. 'pip install pyarrow' 명령어로 설치해주세요.")
+    sys.exit(1)
+
+from fetch_engine import MISS, NonRetryableError
+
+TODAY_TTL = 10 * 60  # 오늘 데이터 / 날짜 없는 호출 캐시 유지 시간 (초)
+
+_DATE_PATTERN = re.compile(r'^\d{8}$')
+
+
+class CacheMissError(NonRetryableError):
+    """재생 모드에서 캐시에 없는 호출"""
+
+
+def _latest_date(args: tuple, kwargs: dict) -> Optional[str]:
+    """인자 중 YYYYMMDD 형식 날짜의 최댓값"""
+    dates = []
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, str) and _DATE_PATTERN.match(value):
+            try:
+                datetime.strptime(value, '%Y%m%d')
+                dates.append(value)
+            except ValueError:
+                continue
+    return max(dates) if dates else None
+
+
+class ResponseCache:
+    """함수 이름 + 인자 단위 응답 캐시"""
+
+    def __init__(self, cache_dir: str, offline: bool = False, today_ttl: int = TODAY_TTL):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.today_ttl = today_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, func_name: str, args: tuple, kwargs: dict) -> str:
+        key = json.dumps([func_name, list(args), sorted(kwargs.items())], default=str, ensure_ascii=False)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, func_name, digest)
+
+    def _is_fresh(self, path: str, args: tuple, kwargs: dict) -> bool:
+        """만료 여부 확인 (조회한 날짜가 지난 뒤에 저장한 응답만 만료 없음)"""
+        if self.offline:
+            return True
+
+        # 조회 날짜 당일에 저장한 응답은 장중 / 정산 전 데이터일 수 있으므로 다음 날에도 TTL 적용
+        mtime = os.path.getmtime(path)
+        latest = _latest_date(args, kwargs)
+        if latest and latest < datetime.fromtimestamp(mtime).strftime('%Y%m%d'):
+            return True
+
+        return time.time() - mtime < self.today_ttl
+
+    def get(self, func_name: str, args: tuple, kwargs: dict) -> Any:
+        """캐시 조회 (없거나 만료면 MISS, 재생 모드에서 없으면 CacheMissError)"""
+        base = self._path(func_name, args, kwargs)
+
+        for suffix, loader in (('.parquet', pd.read_parquet), ('.json', self._read_json)):
+            path = base + suffix
+            if os.path.exists(path) and self._is_fresh(path, args, kwargs):
+                with self._lock:
+                    self.hits += 1
+                return loader(path)
+
+        with self._lock:
+            self.misses += 1
+        if self.offline:
+            raise CacheMissError(f"캐시에 없는 호출입니다 (재생 모드): {func_name}{args}")
+        return MISS
+
+    def put(self, func_name: str, args: tuple, kwargs: dict, value: Any):
+        """응답 저장 (DataFrame / JSON 직렬화 가능한 값만)"""
+        base = self._path(func_name, args, kwargs)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+
+        # 동시 쓰기 중 깨진 파일을 읽지 않도록 임시 파일에 쓰고 교체
+        tmp = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if isinstance(value, pd.DataFrame):
+            path = base + '.parquet'
+            value.to_parquet(tmp)
+        else:
+            try:
+                payload = json.dumps(value, ensure_ascii=False)
+            except TypeError:
+                return
+            path = base + '.json'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(payload)
+
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read_json(path: str) -> Any:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def stats(self) -> dict:
+        return {'cache_hits': self.hits, 'cache_misses': self.misses}
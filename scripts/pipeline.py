@@ -0,0 +1,317 @@
+"""
+수집 파이프라인 (fetch → transform → write)
+
+data_collector.py / data_updater.py 가 함께 사용하는 3단계 스트리밍 파이프라인입니다.
+- fetch: FetchEngine 워커 풀에서 API 동시 호출
+- transform: 별도 스레드에서 pykrx 응답을 테이블 컬럼 구조로 변환
+- write: DB 연결을 가진 호출 스레드 하나가 모아서 검증(validator) 후 bulk_upsert, 행 수 또는 시간 기준으로 커밋
+  - 검증에 걸린 행은 같은 트랜잭션에서 ingest_quarantine 에 격리 (data_validation.py)
+  - 같은 트랜잭션에서 table_stats 카운터도 올림 (table_stats.py)
+- 단계 사이는 크기 제한 큐로 연결 (뒤 단계가 밀리면 앞 단계가 기다리므로 메모리 사용량 일정)
+
+API 호출, 변환, DB 저장이 동시에 진행되어서 전체 시간이 각 단계 시간의 합이 아니라
+가장 느린 단계의 시간에 가까워집니다.
+
+사용 예:
+    pipeline = IngestPipeline(engine, conn, 'daily_prices', on_saved=mark_done)
+    stats = pipeline.run(tickers, fetch=lambda t: ..., transform=lambda t, raw: ...)
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from bulk_writer import BulkWriteResult, bulk_upsert
+from data_validation import write_quarantine
+from table_stats import count_new_tickers, record_write
+
+logger = logging.getLogger(__name__)
+
+# 기본 설정
+QUEUE_SIZE = 32          # 단계 사이 큐 최대 길이 (작업 단위 수)
+BATCH_ROWS = 50000       # 이만큼 행이 모이면 저장 후 커밋
+BATCH_SECONDS = 5.0      # 첫 작업이 들어온 뒤 이 시간이 지나면 저장 후 커밋 (초)
+
+# 큐 종료 표식
+_DONE = object()
+
+
+class PipelineStats:
+    """파이프라인 실행 결과"""
+
+    def __init__(self):
+        self.items = 0                 # 저장까지 끝난 작업 단위 수 (빈 결과 포함)
+        self.empty = 0                 # 데이터가 없던 작업 단위 수
+        self.failed = 0                # 조회 / 변환 / 저장에 실패한 작업 단위 수
+        self.failures = []             # 실패한 (작업 단위, 에러 메시지)
+        self.batches = 0               # 커밋 횟수
+        self.rows_fetched = 0          # 변환까지 끝난 행 수 (저장 전)
+        self.quarantined = {}          # 검증에 걸려 격리한 행 수 (사유별, 빠진 날짜 포함)
+        self.result = BulkWriteResult()
+        self.commit_seconds = []       # 커밋별 소요 시간
+        self.transform_seconds = 0.0   # 변환 단계 실제 작업 시간
+        self.validate_seconds = 0.0    # 저장 전 검증 시간 (저장 단계 시간에 포함)
+        self.write_seconds = 0.0       # 저장 단계 실제 작업 시간
+        self.elapsed = 0.0             # 전체 경과 시간
+
+    @property
+    def rows(self) -> int:
+        return self.result.total
+
+    @property
+    def quarantined_rows(self) -> int:
+        return sum(self.quarantined.values())
+
+    def __str__(self) -> str:
+        return (f"{self.items:,}개 단위 / {self.rows:,}행 ({self.result}) / 실패 {self.failed:,} / "
+                f"격리 {self.quarantined_rows:,} / "
+                f"커밋 {self.batches:,}회 / 경과 {self.elapsed:.1f}초 "
+                f"(변환 {self.transform_seconds:.1f}초, 저장 {self.write_seconds:.1f}초)")
+
+
+class IngestPipeline:
+    """fetch → transform → write 스트리밍 파이프라인 (테이블 하나)"""
+
+    def __init__(self, engine, conn, table: str, queue_size: int = QUEUE_SIZE,
+                 batch_rows: int = BATCH_ROWS, batch_seconds: float = BATCH_SECONDS,
+                 on_saved: Optional[Callable[[Any, int], None]] = None, validator=None,
+                 track_stats: bool = True):
+        """
+        on_saved(item, rows): 작업 단위 저장 직후, 커밋 전에 같은 트랜잭션에서 호출 (체크포인트 기록 등)
+        validator: data_validation.BatchValidator (없으면 검증 없이 저장)
+        track_stats: 저장할 때 table_stats 카운터 올리기 (끝날 때 통계를 전체 다시 계산하는 백필은 False)
+        """
+        self.engine = engine
+        self.conn = conn
+        self.table = table
+        self.queue_size = queue_size
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.on_saved = on_saved
+        self.validator = validator
+        self.track_stats = track_stats
+
+    # ----------------------------
+    # 1단계: fetch
+    # ----------------------------
+
+    def _fetch_stage(self, items: Iterable, fetch: Callable, out: queue.Queue, stop: threading.Event):
+        try:
+            for item, raw, error in self.engine.map(fetch, items):
+                if not self._put(out, (item, raw, error), stop):
+                    return
+        except Exception as e:
+            logger.error(f"❌ {self.table} 조회 단계 오류: {e}")
+        finally:
+            self._put(out, _DONE, stop)
+
+    # ----------------------------
+    # 2단계: transform
+    # ----------------------------
+
+    def _transform_stage(self, transform: Optional[Callable], source: queue.Queue, out: queue.Queue,
+                         stop: threading.Event, stats: PipelineStats):
+        while not stop.is_set():
+            try:
+                message = source.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if message is _DONE:
+                break
+
+            item, raw, error = message
+            if error is None and transform is not None:
+                started = time.perf_counter()
+                try:
+                    raw = transform(item, raw)
+                except Exception as e:
+                    raw, error = None, e
+                stats.transform_seconds += time.perf_counter() - started
+
+            if not self._put(out, (item, raw, error), stop):
+                return
+
+        self._put(out, _DONE, stop)
+
+    @staticmethod
+    def _put(target: queue.Queue, message: Any, stop: threading.Event) -> bool:
+        """큐가 비기를 기다리며 넣기 (중단 요청 시 False)"""
+        while not stop.is_set():
+            try:
+                target.put(message, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # ----------------------------
+    # 3단계: write
+    # ----------------------------
+
+    def _validated(self, df: pd.DataFrame, stats: PipelineStats) -> pd.DataFrame:
+        """검증 후 저장할 행만 반환, 걸린 행은 같은 트랜잭션에서 격리 테이블에 기록"""
+        if self.validator is None or df.empty:
+            return df
+
+        started = time.perf_counter()
+        result = self.validator.validate(self.table, df)
+        if not result.quarantine.empty:
+            write_quarantine(self.conn, self.table, result.quarantine)
+            for reason, count in result.reasons().items():
+                stats.quarantined[reason] = stats.quarantined.get(reason, 0) + count
+        stats.validate_seconds += time.perf_counter() - started
+        return result.valid
+
+    def _write(self, df: pd.DataFrame) -> BulkWriteResult:
+        """bulk_upsert 후 같은 트랜잭션에서 table_stats 카운터 올리기"""
+        if not self.track_stats:
+            return bulk_upsert(self.conn, self.table, df)
+
+        new_tickers = count_new_tickers(self.conn, self.table, df)
+        result = bulk_upsert(self.conn, self.table, df)
+        record_write(self.conn, self.table, df, result.inserted, new_tickers)
+        return result
+
+    @staticmethod
+    def _saved_rows(pending: List[Tuple[Any, pd.DataFrame]], batch: pd.DataFrame) -> List[int]:
+        """검증을 통과한 행 수 (작업 단위별)
+
+        batch 는 pending 의 DataFrame 을 순서대로 이어 붙인 뒤 검증한 결과라서 인덱스로 작업 단위를 찾습니다.
+        """
+        bounds = np.cumsum([len(df) for _, df in pending])
+        owners = np.searchsorted(bounds, batch.index.to_numpy(), side='right')
+        return np.bincount(owners, minlength=len(pending)).tolist()
+
+    def _flush(self, pending: List[Tuple[Any, pd.DataFrame]], stats: PipelineStats):
+        """모인 작업 단위를 한 번에 검증 / 저장 후 커밋 (실패하면 단위별로 다시 저장)"""
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        frames = [df for _, df in pending if not df.empty]
+        quarantined = dict(stats.quarantined)
+
+        try:
+            rows = [0] * len(pending)
+            if frames:
+                batch = self._validated(pd.concat(frames, ignore_index=True), stats)
+                stats.result += self._write(batch)
+                rows = self._saved_rows(pending, batch)
+            saved = [(item, count) for (item, _), count in zip(pending, rows)]
+        except Exception as e:
+            logger.warning(f"{self.table} 배치 저장 실패, 단위별로 다시 저장합니다: {e}")
+            self.conn.rollback()
+            stats.quarantined = quarantined
+            saved = []
+            for item, df in pending:
+                try:
+                    valid = self._validated(df, stats)
+                    stats.result += self._write(valid)
+                    saved.append((item, len(valid)))
+                except Exception as item_error:
+                    stats.failed += 1
+                    stats.failures.append((item, str(item_error)))
+                    logger.warning(f"{self.table} {item} 저장 실패: {item_error}")
+
+        try:
+            if self.on_saved:
+                for item, rows in saved:
+                    self.on_saved(item, rows)
+            commit_started = time.perf_counter()
+            self.conn.commit()
+            stats.commit_seconds.append(time.perf_counter() - commit_started)
+            stats.items += len(saved)
+            stats.batches += 1
+        except Exception as e:
+            self.conn.rollback()
+            stats.failed += len(saved)
+            stats.failures.extend((item, f"커밋 실패: {e}") for item, _ in saved)
+            logger.warning(f"{self.table} 커밋 실패: {e}")
+
+        stats.write_seconds += time.perf_counter() - started
+
+    def run(self, items: Iterable, fetch: Callable, transform: Optional[Callable] = None,
+            total: Optional[int] = None, desc: str = None, unit: str = 'it',
+            progress: bool = True) -> PipelineStats:
+        """items 각각을 fetch(item) → transform(item, raw) → 저장
+
+        transform 은 DataFrame 을 돌려줘야 합니다 (None 또는 빈 DataFrame 이면 데이터 없음으로 처리).
+        progress=False 면 진행률 표시줄을 띄우지 않습니다 (여러 프로세스가 동시에 실행할 때 등).
+        """
+        stats = PipelineStats()
+        started = time.perf_counter()
+        if total is None and hasattr(items, '__len__'):
+            total = len(items)
+
+        fetched = queue.Queue(maxsize=self.queue_size)
+        transformed = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        fetcher = threading.Thread(target=self._fetch_stage, args=(items, fetch, fetched, stop), daemon=True)
+        transformer = threading.Thread(
+            target=self._transform_stage, args=(transform, fetched, transformed, stop, stats), daemon=True
+        )
+        fetcher.start()
+        transformer.start()
+
+        pending = []
+        pending_rows = 0
+        batch_started = None
+        pbar = tqdm(total=total, desc=desc or self.table, unit=unit, disable=not progress)
+
+        try:
+            while True:
+                # 배치 마감 시간까지만 기다려서 시간 기준 커밋이 늦어지지 않게 함
+                timeout = None
+                if batch_started is not None:
+                    timeout = max(0.0, batch_started + self.batch_seconds - time.monotonic())
+
+                try:
+                    message = transformed.get(timeout=timeout)
+                except queue.Empty:
+                    message = None
+
+                if message is _DONE:
+                    break
+
+                if message is not None:
+                    item, df, error = message
+                    pbar.update(1)
+
+                    if error is not None:
+                        stats.failed += 1
+                        stats.failures.append((item, str(error)))
+                        logger.warning(f"{self.table} {item} 수집 실패: {error}")
+                    else:
+                        if df is None or df.empty:
+                            stats.empty += 1
+                            df = pd.DataFrame()
+                        pending.append((item, df))
+                        pending_rows += len(df)
+                        stats.rows_fetched += len(df)
+                        if batch_started is None:
+                            batch_started = time.monotonic()
+
+                if pending and (pending_rows >= self.batch_rows
+                                or time.monotonic() - batch_started >= self.batch_seconds):
+                    self._flush(pending, stats)
+                    pbar.set_postfix({'records': f'{stats.rows:,}', 'failed': stats.failed})
+                    pending, pending_rows, batch_started = [], 0, None
+
+            self._flush(pending, stats)
+
+        finally:
+            # 중단(KeyboardInterrupt 등) 시 앞 단계 스레드가 큐에서 기다리지 않고 끝나도록
+            stop.set()
+            pbar.close()
+            fetcher.join(timeout=5)
+            transformer.join(timeout=5)
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
@@ -0,0 +1,156 @@
+"""
+일별 시세 수집 공통 모듈
+
+data_collector.py / data_updater.py 가 함께 사용하는 시세 수집 로직입니다.
+- 종목 단위 수집 (ticker-major): 종목마다 기간 전체를 한 번에 조회
+- 날짜 단위 수집 (date-major): 날짜·시장마다 전 종목 시세를 한 번에 조회
+- 종목 수와 기간을 보고 API 호출 수가 적은 쪽을 자동 선택
+- 업종 지수 시세 조회
+- 조회(fetch_*)와 변환(*_from_*)을 나눠 두어서 파이프라인의 각 단계에서 따로 실행 가능
+
+api 인자(첫 번째)에는 pykrx.stock 또는 같은 함수를 가진 객체(FetchEngine.api, FakeKRX 등)를 넘깁니다.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# pykrx 시세 컬럼 → DB 컬럼 매핑
+PRICE_COLUMNS = {
+    '날짜': 'date',
+    '티커': 'ticker',
+    '시가': 'open',
+    '고가': 'high',
+    '저가': 'low',
+    '종가': 'close',
+    '거래량': 'volume'
+}
+
+DAILY_PRICE_FIELDS = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
+SECTOR_PRICE_FIELDS = ['sector_code', 'sector_name', 'date', 'open', 'high', 'low', 'close', 'volume']
+
+# 가격 기준: 수정 전 실제 거래 가격
+# 날짜 단위 조회(get_market_ohlcv_by_ticker)는 수정주가를 지원하지 않아서 종목 단위 조회도 adjusted=False 로 맞춤
+# (수집 모드가 기간마다 자동으로 바뀌어도 daily_prices 에 수정 / 수정 전 가격이 섞이지 않도록)
+PRICE_ADJUSTED = False
+
+# 수집 모드
+MODE_AUTO = 'auto'
+MODE_BY_TICKER = 'ticker'
+MODE_BY_DATE = 'date'
+
+
+def business_days(start_date: str, end_date: str) -> List[str]:
+    """기간 내 평일 목록 (YYYYMMDD) - 휴장일은 조회 결과가 비어 있어 자연히 건너뜀"""
+    return [d.strftime('%Y%m%d') for d in pd.bdate_range(start_date, end_date)]
+
+
+def choose_fetch_mode(ticker_count: int, start_date: str, end_date: str,
+                      market_count: int, mode: str = MODE_AUTO,
+                      days: Optional[List[str]] = None) -> str:
+    """API 호출 수를 비교해서 수집 모드 결정
+
+    - 종목 단위: 종목 수만큼 호출
+    - 날짜 단위: 거래일 수 × 시장 수만큼 호출 (days 가 없으면 평일 수)
+    """
+    if mode != MODE_AUTO:
+        return mode
+
+    if days is None:
+        days = business_days(start_date, end_date)
+
+    calls_by_ticker = ticker_count
+    calls_by_date = len(days) * market_count
+
+    return MODE_BY_DATE if calls_by_date < calls_by_ticker else MODE_BY_TICKER
+
+
+def normalize_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """pykrx 시세 DataFrame을 daily_prices 컬럼 구조로 변환"""
+    df = df.reset_index().rename(columns=PRICE_COLUMNS)
+    # 상위 응답의 컬럼 이름이 바뀌면 KeyError 대신 빈 컬럼으로 남겨서 검증 단계에서 격리
+    return df.reindex(columns=DAILY_PRICE_FIELDS)
+
+
+def prices_from_ticker_frame(ticker: str, df: pd.DataFrame) -> pd.DataFrame:
+    """종목 하나의 기간 시세(get_market_ohlcv_by_date 결과) → daily_prices 컬럼 구조"""
+    if df.empty:
+        return df
+
+    df = df.copy()
+    df['티커'] = ticker
+    return normalize_prices(df)
+
+
+def fetch_ticker_frame(api, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """종목 하나의 기간 시세 조회 (pykrx 응답 그대로, 수정 전 가격)"""
+    return api.get_market_ohlcv_by_date(start_date, end_date, ticker, adjusted=PRICE_ADJUSTED)
+
+
+def fetch_prices_by_ticker(api, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """종목 하나의 기간 시세 조회"""
+    return prices_from_ticker_frame(ticker, fetch_ticker_frame(api, ticker, start_date, end_date))
+
+
+def fetch_market_frames(api, date: str, markets: Iterable[str]) -> Dict[str, pd.DataFrame]:
+    """하루치 전 종목 시세를 시장별 1회 호출로 조회 (pykrx 응답 그대로)"""
+    return {market: api.get_market_ohlcv_by_ticker(date, market=market) for market in markets}
+
+
+def prices_from_market_frames(date: str, frames: Dict[str, pd.DataFrame],
+                              tickers: Optional[set] = None) -> pd.DataFrame:
+    """시장별 하루치 시세(get_market_ohlcv_by_ticker 결과) → daily_prices 컬럼 구조
+
+    tickers 가 주어지면 해당 종목만 남깁니다 (stocks 테이블 외래키 보호).
+    """
+    normalized = []
+
+    for df in frames.values():
+        if df.empty:
+            continue
+
+        df = df.copy()
+        df['날짜'] = pd.Timestamp(date)
+        normalized.append(normalize_prices(df))
+
+    if not normalized:
+        return pd.DataFrame(columns=DAILY_PRICE_FIELDS)
+
+    df = pd.concat(normalized, ignore_index=True)
+
+    # 휴장일에는 전 종목이 0으로 채워진 행이 내려오므로 제거
+    ohlcv = df[['open', 'high', 'low', 'close', 'volume']]
+    df = df[(ohlcv != 0).any(axis=1)]
+
+    if tickers is not None:
+        df = df[df['ticker'].isin(tickers)]
+
+    return df.reset_index(drop=True)
+
+
+def fetch_prices_by_date(api, date: str, markets: Iterable[str],
+                         tickers: Optional[set] = None) -> pd.DataFrame:
+    """하루치 전 종목 시세를 시장별 1회 호출로 조회"""
+    return prices_from_market_frames(date, fetch_market_frames(api, date, markets), tickers)
+
+
+def fetch_sector_frame(api, sector_code: str, start_date: str, end_date: str) -> Tuple[str, pd.DataFrame]:
+    """업종 지수 하나의 이름과 기간 시세 조회 (pykrx 응답 그대로)"""
+    sector_name = api.get_index_ticker_name(sector_code)
+    return sector_name, api.get_index_ohlcv_by_date(start_date, end_date, sector_code)
+
+
+def sector_prices_from_frame(sector_code: str, sector_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """업종 지수 기간 시세 → sector_prices 컬럼 구조"""
+    if df.empty:
+        return df
+
+    df = df.reset_index().rename(columns=PRICE_COLUMNS)
+    df['sector_code'] = sector_code
+    df['sector_name'] = sector_name
+    return df.reindex(columns=SECTOR_PRICE_FIELDS)
+
+
+def fetch_sector_prices(api, sector_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """업종 지수 하나의 기간 시세 조회 (sector_prices 컬럼 구조)"""
+    return sector_prices_from_frame(sector_code, *fetch_sector_frame(api, sector_code, start_date, end_date))
@@ -0,0 +1,54 @@
+"""
+업종 최신 시세 요약 (sector_latest 테이블)
+
+/api/sectors 가 업종마다 최신 시세를 따로 조회하지 않도록, 업종별 마지막 거래일 시세와
+전일 대비 / 5거래일 / 20거래일 수익률을 한 테이블에 미리 계산해 둡니다.
+- 계산식은 db/schema.sql 의 sector_latest_view 뷰 하나 (업종별 최근 21거래일만 집계)
+- 업종 시세 수집 / 업데이트가 끝날 때마다 뷰 결과로 테이블을 통째로 교체 (같은 트랜잭션이라 읽는 쪽은 항상 완성된 결과)
+
+사용법:
+    python scripts/sector_latest.py       # 직접 다시 계산
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECTOR_LATEST_COLUMNS = [
+    'sector_code', 'sector_name', 'date', 'open', 'high', 'low', 'close', 'volume',
+    'prev_close', 'change', 'change_rate', 'return_5d', 'return_20d',
+]
+
+
+def refresh_sector_latest(conn) -> int:
+    """sector_prices 에서 업종별 최신 시세 / 수익률을 다시 계산해서 교체, 업종 수 반환"""
+    columns = ', '.join(SECTOR_LATEST_COLUMNS)
+
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM sector_latest")
+        cursor.execute(f"""
+            INSERT INTO sector_latest ({columns})
+            SELECT {columns} FROM sector_latest_view
+        """)
+        count = cursor.rowcount
+    conn.commit()
+    return count
+
+
+def main():
+    """요약 테이블 다시 계산"""
+    from data_generation import bump_data_generation
+    from db_config import connect
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    conn = connect()
+    try:
+        count = refresh_sector_latest(conn)
+        logger.info(f"🏢 업종 최신 시세 요약 {count:,}개 업종 갱신")
+        bump_data_generation(conn)  # API 응답 캐시 무효화
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
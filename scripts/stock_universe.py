@@ -0,0 +1,167 @@
+"""
+상장 종목 정보 동기화 공통 모듈
+
+data_collector.py / data_updater.py 가 함께 사용하는 stocks 테이블 동기화 로직입니다.
+- 시장별 1회 호출로 전 종목 코드 / 이름 조회 (종목마다 이름을 조회하지 않음)
+- 현재 stocks 테이블과 메모리에서 비교해서 바뀐 행만 저장
+  - 신규 상장: INSERT
+  - 종목명 / 시장 변경: UPDATE
+  - 목록에서 사라진 종목: delisted_date 기록 (행은 남겨서 과거 시세 유지)
+  - 다시 나타난 종목: delisted_date 해제
+- 변경 없는 행은 건드리지 않음
+- 기준일이 어제보다 과거면 (과거 기간 수집 / 백필) 신규 종목만 추가
+  (그 뒤의 상장 / 폐지 / 종목명 변경을 과거 목록으로 되돌리지 않도록)
+
+api 인자(첫 번째)에는 pykrx.stock 또는 같은 함수를 가진 객체(FetchEngine.api, FakeKRX 등)를 넘깁니다.
+pykrx 는 상장일을 일괄 조회하는 함수가 없어서 listed_date 는 채우지 않습니다.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+STOCK_FIELDS = ['ticker', 'name', 'market']
+LOOKBACK_DAYS = 7  # 휴장일이면 가장 가까운 거래일을 찾을 때까지 거슬러 올라가는 최대 일수
+
+
+def fetch_stock_universe(api, date: str, markets: Iterable[str]) -> pd.DataFrame:
+    """기준일의 시장별 전 종목 (ticker, name, market) 조회
+
+    기준일이 휴장일이라 결과가 비어 있으면 LOOKBACK_DAYS 까지 하루씩 거슬러 올라갑니다.
+    결과가 없는 시장은 빠지므로 호출하는 쪽에서 시장별로 확인해야 합니다.
+    """
+    frames = []
+
+    for market in markets:
+        day = datetime.strptime(date, '%Y%m%d')
+        for _ in range(LOOKBACK_DAYS + 1):
+            target = day.strftime('%Y%m%d')
+            df = api.get_market_price_change_by_ticker(target, target, market=market)
+            if not df.empty:
+                break
+            day -= timedelta(days=1)
+
+        if df.empty:
+            continue
+
+        frames.append(pd.DataFrame({
+            'ticker': df.index.astype(str),
+            'name': df['종목명'].astype(str).values,
+            'market': market,
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=STOCK_FIELDS)
+
+    return pd.concat(frames, ignore_index=True).drop_duplicates('ticker', keep='last')
+
+
+def load_current_stocks(conn) -> pd.DataFrame:
+    """현재 stocks 테이블 (ticker, name, market, delisted_date)"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT ticker, name, market, delisted_date FROM stocks")
+        rows = cursor.fetchall()
+    return pd.DataFrame(rows, columns=STOCK_FIELDS + ['delisted_date'])
+
+
+def diff_stock_universe(current: pd.DataFrame, latest: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """현재 테이블과 최신 목록 비교 → {'inserted', 'changed', 'delisted', 'relisted'}
+
+    상장폐지 판단은 최신 목록에 결과가 있는 시장의 종목만 대상으로 합니다
+    (조회 실패로 한 시장이 통째로 빠졌을 때 전 종목을 폐지 처리하지 않도록).
+    """
+    merged = current.merge(latest, on='ticker', how='outer', suffixes=('_old', ''), indicator=True)
+
+    inserted = merged[merged['_merge'] == 'right_only']
+    both = merged[merged['_merge'] == 'both']
+    missing = merged[merged['_merge'] == 'left_only']
+
+    changed = both[(both['name'] != both['name_old']) | (both['market'] != both['market_old'])]
+    relisted = both[both['delisted_date'].notna()]
+    delisted = missing[missing['delisted_date'].isna() & missing['market_old'].isin(set(latest['market']))]
+
+    return {
+        'inserted': inserted[STOCK_FIELDS],
+        'changed': changed[STOCK_FIELDS],
+        'delisted': delisted[['ticker']],
+        'relisted': relisted[['ticker']],
+    }
+
+
+def apply_stock_diff(conn, diff: Dict[str, pd.DataFrame], as_of: str) -> Dict[str, int]:
+    """비교 결과만큼만 stocks 테이블에 반영 (커밋은 호출하는 쪽에서)"""
+    with conn.cursor() as cursor:
+        if not diff['inserted'].empty:
+            execute_values(cursor, """
+                INSERT INTO stocks (ticker, name, market) VALUES %s
+                ON CONFLICT (ticker) DO NOTHING
+            """, list(diff['inserted'].itertuples(index=False, name=None)))
+
+        if not diff['changed'].empty:
+            execute_values(cursor, """
+                UPDATE stocks SET name = v.name, market = v.market, updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v (ticker, name, market)
+                WHERE stocks.ticker = v.ticker
+            """, list(diff['changed'].itertuples(index=False, name=None)))
+
+        if not diff['delisted'].empty:
+            cursor.execute("""
+                UPDATE stocks SET delisted_date = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE ticker = ANY(%s)
+            """, (as_of, diff['delisted']['ticker'].tolist()))
+
+        if not diff['relisted'].empty:
+            cursor.execute("""
+                UPDATE stocks SET delisted_date = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE ticker = ANY(%s)
+            """, (diff['relisted']['ticker'].tolist(),))
+
+    return {kind: len(df) for kind, df in diff.items()}
+
+
+def _inserted_only(diff: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """과거 목록과의 비교 결과에서 신규 종목만 남기기"""
+    return {kind: df if kind == 'inserted' else df.iloc[0:0] for kind, df in diff.items()}
+
+
+def latest_list_date() -> str:
+    """최신 종목 목록 기준일 (어제, YYYYMMDD)"""
+    return (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+
+
+def sync_stocks(conn, api, date: str, markets: Iterable[str]) -> Dict[str, int]:
+    """종목 목록 조회 → 비교 → 바뀐 행만 저장, 종류별 건수 반환 (커밋은 호출하는 쪽에서)
+
+    기준일이 latest_list_date() 보다 과거면 신규 종목만 추가하고
+    변경 / 상장폐지 / 재상장은 반영하지 않습니다 (과거 목록에는 그 뒤 상장된 종목이 없음).
+    """
+    latest = fetch_stock_universe(api, date, markets)
+    if latest.empty:
+        raise RuntimeError(f"{date} 기준 종목 목록이 비어 있습니다")
+
+    diff = diff_stock_universe(load_current_stocks(conn), latest)
+    if date < latest_list_date():
+        diff = _inserted_only(diff)
+    counts = apply_stock_diff(conn, diff, date)
+
+    touched = set(diff['inserted']['ticker']) | set(diff['changed']['ticker']) | set(diff['relisted']['ticker'])
+    counts['unchanged'] = len(latest) - len(touched)
+    return counts
+
+
+def sync_historical_universe(conn, api, dates: Iterable[str], markets: Iterable[str]) -> List[str]:
+    """기준일마다 종목 목록 조회 → 처음 보는 종목만 추가, 한 번이라도 목록에 있던 종목 반환 (커밋은 호출하는 쪽에서)
+
+    과거 기간 백필 대상 종목용 (stocks 테이블을 처음 채우기 전에 상장폐지된 종목 포함, 생존 편향 방지).
+    """
+    dates = list(dates)
+    frames = [fetch_stock_universe(api, date, markets) for date in dates]
+    universe = pd.concat(frames, ignore_index=True).drop_duplicates('ticker', keep='last') if frames else None
+    if universe is None or universe.empty:
+        return []
+
+    diff = diff_stock_universe(load_current_stocks(conn), universe)
+    apply_stock_diff(conn, _inserted_only(diff), max(dates))
+    return sorted(universe['ticker'])
@@ -0,0 +1,153 @@
+"""
+테이블 통계 (table_stats 테이블)
+
+/api/stats, /api/db-info 가 요청마다 COUNT(*) / COUNT(DISTINCT ticker) 로 팩트 테이블 전체를 읽지 않도록
+행 수 / 종목 수 / 날짜 범위를 작은 테이블에 저장해 둡니다.
+- 팩트 테이블 (daily_prices, investor_trends, sector_prices): 수집 / 업데이트 파이프라인이 저장할 때마다
+  같은 트랜잭션에서 카운터를 올림 (bulk_upsert 의 신규 행 수, 처음 들어온 종목 수, 배치 날짜 범위)
+  - 쌓인 기간과 상관없이 저장한 배치 크기만큼만 일함 (전체 스캔 없음)
+  - 통계 행이 아직 없으면 (처음 실행) 그 실행이 끝날 때 한 번 정확한 값으로 계산
+- 작은 테이블 (stocks, sectors, trading_calendar, ingest_quarantine): 실행이 끝날 때 정확한 값으로 다시 계산
+- 백필이 끝날 때 / 직접 실행하면 모든 테이블을 정확한 값으로 다시 계산 (종목 수는 stocks 기준 EXISTS,
+  날짜 범위는 date 인덱스의 양 끝)
+- 여기 없는 테이블은 API 가 플래너 추정치 (pg_class.reltuples) 로 대신 표시
+
+사용법:
+    python scripts/table_stats.py       # 모든 테이블 직접 다시 계산
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 통계를 저장할 테이블 (테이블 → 종목 / 날짜 컬럼 여부, 저장할 때 카운터를 올리는지)
+COUNTED_TABLES = {
+    'stocks': {'ticker': False, 'date': False, 'incremental': False},
+    'daily_prices': {'ticker': True, 'date': True, 'incremental': True},
+    'investor_trends': {'ticker': True, 'date': True, 'incremental': True},
+    'sector_prices': {'ticker': False, 'date': True, 'incremental': True},
+    'sectors': {'ticker': False, 'date': False, 'incremental': False},
+    'trading_calendar': {'ticker': False, 'date': True, 'incremental': False},
+    'ingest_quarantine': {'ticker': False, 'date': False, 'incremental': False},
+}
+
+
+def compute_table_stats(conn, table: str) -> Optional[Dict[str, Any]]:
+    """테이블 하나의 정확한 통계 (테이블이 없으면 None)"""
+    columns = COUNTED_TABLES[table]
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if not cursor.fetchone()[0]:
+            return None
+
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        stats = {'table_name': table, 'row_count': cursor.fetchone()[0],
+                 'distinct_tickers': None, 'min_date': None, 'max_date': None}
+
+        if columns['ticker']:
+            # COUNT(DISTINCT ticker) 대신 종목마다 ticker 인덱스로 한 행만 확인
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM stocks s
+                WHERE EXISTS (SELECT 1 FROM {table} t WHERE t.ticker = s.ticker)
+            """)
+            stats['distinct_tickers'] = cursor.fetchone()[0]
+
+        if columns['date']:
+            cursor.execute(f"SELECT MIN(date), MAX(date) FROM {table}")
+            stats['min_date'], stats['max_date'] = cursor.fetchone()
+
+    return stats
+
+
+def count_new_tickers(conn, table: str, df: pd.DataFrame) -> int:
+    """배치 종목 중 테이블에 아직 한 행도 없는 종목 수 (저장 전에 호출, 종목마다 ticker 인덱스 확인 1회)"""
+    if not COUNTED_TABLES.get(table, {}).get('ticker') or df.empty:
+        return 0
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM unnest(%s::text[]) AS k(ticker)
+            WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.ticker = k.ticker)
+        """, (df['ticker'].unique().tolist(),))
+        return cursor.fetchone()[0]
+
+
+def record_write(conn, table: str, df: pd.DataFrame, inserted: int, new_tickers: int = 0):
+    """저장 직후 같은 트랜잭션에서 카운터 올리기 (커밋은 호출하는 쪽에서)
+
+    통계 행이 아직 없으면 그대로 둡니다 (실행이 끝날 때 refresh_table_stats 가 정확한 값으로 채움).
+    """
+    if not COUNTED_TABLES.get(table, {}).get('incremental') or df.empty or not inserted:
+        return
+
+    dates = pd.to_datetime(df['date'])
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE table_stats SET
+            row_count = row_count + %s,
+            distinct_tickers = distinct_tickers + %s,
+            min_date = LEAST(min_date, %s),
+            max_date = GREATEST(max_date, %s),
+            updated_at = CURRENT_TIMESTAMP
+            WHERE table_name = %s
+        """, (inserted, new_tickers, dates.min().date(), dates.max().date(), table))
+
+
+def refresh_table_stats(conn, tables: Optional[List[str]] = None, full: bool = True) -> Dict[str, Dict[str, Any]]:
+    """통계 다시 계산 후 저장, 다시 계산한 테이블별 통계 반환
+
+    full=False 면 저장할 때 카운터를 올리는 팩트 테이블은 건너뜁니다 (통계 행이 아직 없는 테이블만 계산).
+    """
+    tables = list(tables or COUNTED_TABLES)
+    if not full:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT table_name FROM table_stats")
+            counted = {row[0] for row in cursor.fetchall()}
+        tables = [table for table in tables
+                  if not COUNTED_TABLES[table]['incremental'] or table not in counted]
+
+    results = {}
+    for table in tables:
+        stats = compute_table_stats(conn, table)
+        if stats is not None:
+            results[table] = stats
+
+    with conn.cursor() as cursor:
+        for stats in results.values():
+            cursor.execute("""
+                INSERT INTO table_stats (table_name, row_count, distinct_tickers, min_date, max_date, updated_at)
+                VALUES (%(table_name)s, %(row_count)s, %(distinct_tickers)s, %(min_date)s, %(max_date)s,
+                        CURRENT_TIMESTAMP)
+                ON CONFLICT (table_name) DO UPDATE SET
+                row_count = EXCLUDED.row_count,
+                distinct_tickers = EXCLUDED.distinct_tickers,
+                min_date = EXCLUDED.min_date,
+                max_date = EXCLUDED.max_date,
+                updated_at = EXCLUDED.updated_at
+            """, stats)
+    conn.commit()
+    return results
+
+
+def main():
+    """모든 테이블 통계 다시 계산"""
+    from data_generation import bump_data_generation
+    from db_config import connect
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    conn = connect()
+    try:
+        results = refresh_table_stats(conn)
+        for table, stats in results.items():
+            logger.info(f"📊 {table}: {stats['row_count']:,}행")
+        bump_data_generation(conn)  # API 응답 캐시 무효화
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
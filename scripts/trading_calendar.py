@@ -0,0 +1,149 @@
+"""
+KRX 거래일 달력
+
+이미 저장된 시세(daily_prices / sector_prices)의 날짜와 krx_holidays 휴장일 테이블로 거래일을 판단합니다.
+- trading_calendar: 시세가 있는 거래일 (저장된 시세에서 증분 갱신, 나중에 채워진 날짜도 추가)
+- krx_holidays: 평일 휴장일 (직접 추가, source = 'manual')
+  - 시세가 없는 평일을 휴장일로 추정하지 않음 (수집에 실패한 날이 영구 휴장일이 되지 않도록)
+- 메모리에 한 번 올려서 기간 내 거래일 / 이전 N 거래일을 바로 계산
+
+시세가 없는 날짜는 주말과 krx_holidays 만 빼고 거래일로 봅니다.
+
+사용법:
+    python scripts/trading_calendar.py                # 달력 갱신 후 최근 거래일 출력
+    python scripts/trading_calendar.py --full         # 전체 다시 계산
+"""
+
+import bisect
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Set
+
+DATE_FORMAT = '%Y%m%d'
+
+# 거래일을 가져올 시세 테이블
+SOURCE_TABLES = ['sector_prices', 'daily_prices']
+
+
+def _to_date(value) -> date:
+    """YYYYMMDD 문자열 / date / datetime → date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+class TradingCalendar:
+    """trading_calendar + krx_holidays 테이블 기반 거래일 달력 (메모리 캐시)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.trading_days_known: List[date] = []
+        self.holidays: Set[date] = set()
+        self.load()
+
+    def load(self):
+        """거래일 / 휴장일을 메모리로 읽기"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT date FROM trading_calendar ORDER BY date")
+            self.trading_days_known = [row[0] for row in cursor.fetchall()]
+            # 이전 버전이 시세 없는 평일에서 추정한 휴장일 (inferred) 은 쓰지 않음
+            cursor.execute("SELECT date FROM krx_holidays WHERE source <> 'inferred'")
+            self.holidays = {row[0] for row in cursor.fetchall()}
+
+    def refresh(self, full: bool = False) -> int:
+        """저장된 시세에서 거래일 갱신, 새로 추가된 거래일 수 반환
+
+        기본은 증분 갱신 (달력에 없는 날짜만 추가, 빠졌다가 나중에 채워진 날짜 포함),
+        full=True 면 달력을 비우고 시세 테이블 전체 날짜로 다시 채웁니다.
+        """
+        rebuild = full or not self.trading_days_known
+        select = " UNION ".join(
+            f"SELECT DISTINCT date FROM {table} src" + (
+                "" if rebuild else
+                " WHERE NOT EXISTS (SELECT 1 FROM trading_calendar t WHERE t.date = src.date)")
+            for table in SOURCE_TABLES)
+
+        with self.conn.cursor() as cursor:
+            if rebuild:
+                # 시세가 지워진 날짜도 달력에서 빠지도록 처음부터 다시 채움
+                cursor.execute("DELETE FROM trading_calendar")
+
+            cursor.execute(f"""
+                INSERT INTO trading_calendar (date)
+                {select}
+                ON CONFLICT (date) DO NOTHING
+            """)
+            added = cursor.rowcount
+
+        self.conn.commit()
+        self.load()
+        return added
+
+    def add_holiday(self, day, name: str = None):
+        """휴장일 직접 추가 (임시 공휴일 등 아직 오지 않은 날짜)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO krx_holidays (date, name, source) VALUES (%s, %s, 'manual')
+                ON CONFLICT (date) DO UPDATE SET name = EXCLUDED.name, source = 'manual'
+            """, (_to_date(day), name))
+        self.conn.commit()
+        self.holidays.add(_to_date(day))
+
+    @property
+    def last_known(self) -> Optional[date]:
+        """시세가 저장된 마지막 거래일"""
+        return self.trading_days_known[-1] if self.trading_days_known else None
+
+    def is_trading_day(self, day) -> bool:
+        """거래일 여부 (시세가 있으면 거래일, 주말 / 휴장일이면 아님, 나머지 평일은 거래일로 간주)"""
+        day = _to_date(day)
+        index = bisect.bisect_left(self.trading_days_known, day)
+        if index < len(self.trading_days_known) and self.trading_days_known[index] == day:
+            return True
+        return day.weekday() < 5 and day not in self.holidays
+
+    def trading_days(self, start_date, end_date) -> List[str]:
+        """기간 내 거래일 목록 (YYYYMMDD)"""
+        day, end = _to_date(start_date), _to_date(end_date)
+        days = []
+        while day <= end:
+            if self.is_trading_day(day):
+                days.append(day.strftime(DATE_FORMAT))
+            day += timedelta(days=1)
+        return days
+
+    def previous_trading_days(self, n: int, as_of=None) -> List[str]:
+        """as_of(기본 오늘) 이전(당일 포함) N 거래일 (YYYYMMDD, 오래된 순)"""
+        day = _to_date(as_of) if as_of else date.today()
+        days = []
+        while len(days) < n:
+            if self.is_trading_day(day):
+                days.append(day.strftime(DATE_FORMAT))
+            day -= timedelta(days=1)
+        return days[::-1]
+
+
+def main():
+    """달력 갱신 후 요약 출력"""
+    import argparse
+
+    from db_config import connect
+
+    parser = argparse.ArgumentParser(description="KRX 거래일 달력 갱신")
+    parser.add_argument('--full', action='store_true', help="시세 테이블 전체 날짜를 다시 확인")
+    parser.add_argument('--days', type=int, default=5, help="출력할 최근 거래일 수")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        calendar = TradingCalendar(conn)
+        added = calendar.refresh(full=args.full)
+        print(f"📅 거래일 {len(calendar.trading_days_known):,}일 (신규 {added:,}일), 휴장일 {len(calendar.holidays):,}일")
+        print(f"최근 {args.days} 거래일: {', '.join(calendar.previous_trading_days(args.days))}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# scripts/ 모듈은 서로를 패키지 없이 import 하므로 경로에 추가
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+# backend 는 패키지로 import (from backend.services import ...)
+sys.path.insert(0, ROOT)
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from data_validation import PRICE_LIMIT_EXCEEDED, ZERO_VOLUME, BatchValidator
+from pipeline import IngestPipeline
+
+
+def daily_prices(rows):
+    return pd.DataFrame(rows, columns=['ticker', 'date', 'open', 'high', 'low', 'close', 'volume'])
+
+
+def split_day_prices():
+    """005930 이 2018-05-04 에 50:1 액면분할 (수정 전 종가 2,650,000 → 51,900)"""
+    return daily_prices([
+        ('005930', pd.Timestamp('2018-04-27'), 2600000, 2660000, 2590000, 2650000, 300000),
+        ('005930', pd.Timestamp('2018-05-04'), 53000, 53900, 51800, 51900, 39565391),
+        ('005930', pd.Timestamp('2018-05-08'), 52600, 53200, 51900, 52600, 23104720),
+        ('000660', pd.Timestamp('2018-04-27'), 86000, 87000, 85500, 86500, 3000000),
+        ('000660', pd.Timestamp('2018-05-04'), 87000, 88000, 86000, 87500, 2900000),
+        ('000660', pd.Timestamp('2018-05-08'), 87500, 89000, 87000, 88000, 2800000),
+    ])
+
+
+def test_split_day_is_saved_and_recorded():
+    result = BatchValidator().validate('daily_prices', split_day_prices())
+
+    assert len(result.valid) == 6
+    assert result.rejected.empty
+    assert result.warnings['reason'].tolist() == [PRICE_LIMIT_EXCEEDED]
+    assert result.warnings['key'].tolist() == ['005930']
+    assert str(result.warnings['date'].iloc[0]) == '2018-05-04'
+    assert result.reasons() == {PRICE_LIMIT_EXCEEDED: 1}
+
+
+def test_rejected_rows_are_not_saved():
+    df = split_day_prices()
+    df.loc[1, 'volume'] = 0
+    result = BatchValidator().validate('daily_prices', df)
+
+    assert len(result.valid) == 5
+    assert result.rejected['reason'].tolist() == [ZERO_VOLUME]
+    assert result.warnings.empty
+
+
+def test_saved_rows_per_item_exclude_rejected():
+    df = split_day_prices()
+    df.loc[4, 'volume'] = 0
+    pending = [('005930', df.iloc[:3]), ('EMPTY', pd.DataFrame()), ('000660', df.iloc[3:])]
+    batch = BatchValidator().validate('daily_prices', pd.concat([d for _, d in pending], ignore_index=True)).valid
+
+    assert IngestPipeline._saved_rows(pending, batch) == [3, 0, 2]
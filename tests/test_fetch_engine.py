@@ -0,0 +1,64 @@
+import fetch_engine
+from fetch_engine import TokenBucket
+
+
+class FakeClock:
+    """time.monotonic / time.sleep 대신 사용 (sleep 하면 시각만 앞으로)"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fetch_engine.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(fetch_engine.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_burst_then_rate(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+    assert clock.slept == [0.5, 0.5]
+
+
+def test_idle_refill_is_capped_at_capacity(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == 0.5
+
+
+def test_partial_token_waits_only_for_the_rest(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.acquire()
+
+    clock.now += 0.125
+    assert bucket.acquire() == 0.125
+
+
+def test_default_capacity_and_unlimited_rate(monkeypatch):
+    clock = fake_clock(monkeypatch)
+
+    assert TokenBucket(rate=0.5).capacity == 1
+    assert TokenBucket(rate=5).capacity == 5
+    unlimited = TokenBucket(rate=0)
+    assert [unlimited.acquire() for _ in range(100)] == [0.0] * 100
+    assert clock.slept == []
@@ -0,0 +1,28 @@
+from price_fetch import MODE_AUTO, MODE_BY_DATE, MODE_BY_TICKER, business_days, choose_fetch_mode
+
+# 2024-01-01(월) ~ 2024-01-05(금): 평일 5일
+WEEK = ('20240101', '20240105')
+
+
+def test_equal_call_counts_keep_ticker_mode():
+    # 날짜 단위 5일 × 2시장 = 10회, 종목 단위 10회 → 줄지 않으면 종목 단위
+    assert choose_fetch_mode(10, *WEEK, market_count=2) == MODE_BY_TICKER
+    assert choose_fetch_mode(11, *WEEK, market_count=2) == MODE_BY_DATE
+
+
+def test_trading_days_override_weekdays():
+    # 휴장일 하루를 뺀 거래일 4일 × 2시장 = 8회 < 종목 9회
+    days = ['20240102', '20240103', '20240104', '20240105']
+    assert choose_fetch_mode(9, *WEEK, market_count=2) == MODE_BY_TICKER
+    assert choose_fetch_mode(9, *WEEK, market_count=2, days=days) == MODE_BY_DATE
+
+
+def test_weekends_are_not_counted():
+    assert business_days('20240105', '20240108') == ['20240105', '20240108']
+    assert choose_fetch_mode(5, '20240105', '20240108', market_count=2) == MODE_BY_DATE
+
+
+def test_explicit_mode_is_kept():
+    assert choose_fetch_mode(1, *WEEK, market_count=2, mode=MODE_BY_DATE) == MODE_BY_DATE
+    assert choose_fetch_mode(10000, *WEEK, market_count=2, mode=MODE_BY_TICKER) == MODE_BY_TICKER
+    assert choose_fetch_mode(10000, *WEEK, market_count=2, mode=MODE_AUTO) == MODE_BY_DATE
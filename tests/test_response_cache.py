@@ -0,0 +1,83 @@
+import asyncio
+
+from backend.services.response_cache import (
+    DataGeneration, ResponseCache, ResponseCacheMiddleware, cache_key, etag_matches,
+)
+
+BODY = b'{"stocks": []}'
+
+
+class App:
+    """Content-Length 가 있는 200 JSON 응답, 호출 수 기록"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(BODY)).encode()),
+        ]})
+        await send({'type': 'http.response.body', 'body': BODY})
+
+
+def middleware(token='20240105:1'):
+    async def load_token():
+        return token
+
+    app = App()
+    return app, ResponseCacheMiddleware(app, cache=ResponseCache(), generation=DataGeneration(load_token))
+
+
+def request(handler, path='/api/stocks', query=b'', headers=()):
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query,
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+    start, body = messages
+    return start['status'], dict(start['headers']), body.get('body', b'')
+
+
+def test_if_none_match_returns_304_without_calling_the_app():
+    app, handler = middleware()
+    status, headers, body = request(handler)
+    etag = headers[b'etag'].decode()
+
+    assert (status, body, headers[b'x-cache']) == (200, BODY, b'MISS')
+    status, headers, body = request(handler, headers=[('if-none-match', etag)])
+    assert (status, body, headers[b'etag'].decode()) == (304, b'', etag)
+    assert request(handler, headers=[('if-none-match', f'"other", W/{etag}')])[0] == 304
+    assert app.calls == 1
+
+
+def test_stale_etag_gets_the_cached_body():
+    app, handler = middleware()
+    request(handler)
+
+    status, headers, body = request(handler, headers=[('if-none-match', '"stale"')])
+    assert (status, body, headers[b'x-cache']) == (200, BODY, b'HIT')
+    assert app.calls == 1
+
+
+def test_new_generation_changes_the_etag():
+    _, old = middleware('20240105:1')
+    _, new = middleware('20240105:2')
+    etag = request(old)[1][b'etag'].decode()
+
+    assert request(new, headers=[('if-none-match', etag)])[0] == 200
+
+
+def test_query_order_does_not_change_the_key():
+    scope = {'path': '/api/stocks', 'query_string': b'limit=10&market=KOSPI', 'headers': []}
+    reordered = dict(scope, query_string=b'market=KOSPI&limit=10')
+
+    assert cache_key(scope) == cache_key(reordered)
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches(None, '"abc"')
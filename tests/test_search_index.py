@@ -0,0 +1,52 @@
+from backend.services.search_index import StockSearchIndex, to_choseong
+
+STOCKS = [
+    ('005930', '삼성전자', 'KOSPI', False),
+    ('005935', '삼성전자우', 'KOSPI', False),
+    ('028260', '삼성물산', 'KOSPI', False),
+    ('000660', 'SK하이닉스', 'KOSPI', False),
+    ('035720', '카카오', 'KOSPI', False),
+    ('900110', '삼성제약', 'KOSDAQ', True),
+]
+
+
+def index():
+    stock_index = StockSearchIndex()
+    stock_index.load(STOCKS, token='1')
+    return stock_index
+
+
+def tickers(results):
+    return [stock['ticker'] for stock in results]
+
+
+def test_to_choseong_keeps_non_hangul():
+    assert to_choseong('sk하이닉스') == 'skㅎㅇㄴㅅ'
+
+
+def test_choseong_only_query():
+    assert tickers(index().search('ㅅㅅㅈㅈ')) == ['005930', '005935']
+    # 같은 접두어 일치면 이름이 짧을수록 앞, 상장폐지 종목(삼성제약)은 맨 뒤
+    assert tickers(index().search('ㅅㅅㅈ')) == ['005930', '005935', '900110']
+    assert tickers(index().search('ㅋㅋㅇ')) == ['035720']
+    assert index().search('ㅋㅋㅋ') == []
+
+
+def test_choseong_mixed_with_syllables():
+    assert tickers(index().search('삼성ㅈ')) == ['005930', '005935', '900110']
+    assert tickers(index().search('ㅅㅅ물')) == ['028260']
+    assert tickers(index().search('삼성ㅈㅇ')) == ['900110']
+    assert index().search('삼ㅅ물산ㅋ') == []
+
+
+def test_choseong_substring_ranks_after_prefix():
+    # 'ㅈㅈ' 는 삼성전자 / 삼성전자우 의 중간 부분 문자열
+    assert tickers(index().search('ㅈㅈ')) == ['005930', '005935']
+    assert tickers(index().search('ㅅㅈ')) == ['005930', '005935', '900110']
+    assert tickers(index().search('ㅎㅇㄴ')) == ['000660']
+
+
+def test_case_space_and_market():
+    assert tickers(index().search('sk 하이')) == ['000660']
+    assert tickers(index().search('ㅅㅅ', market='KOSDAQ')) == ['900110']
+    assert index().tickers('삼성') == ['005930', '005935', '028260', '900110']
@@ -0,0 +1,107 @@
+import asyncio
+
+from backend import main
+
+# 종목명 / 시장이 같은 종목이 섞여 있어도 페이지 경계는 종목코드 (기본키) 기준
+STOCKS = [
+    {'ticker': ticker, 'name': name, 'market': market, 'sector_name': None}
+    for ticker, name, market in [
+        ('000020', '동화약품', 'KOSPI'),
+        ('000040', 'KR모터스', 'KOSPI'),
+        ('000050', '경방', 'KOSPI'),
+        ('000070', '삼양홀딩스', 'KOSPI'),
+        ('000075', '삼양홀딩스우', 'KOSPI'),
+        ('000250', '삼천당제약', 'KOSDAQ'),
+        ('000440', '중앙에너비스', 'KOSDAQ'),
+    ]
+]
+
+
+class StocksCursor:
+    """get_stocks 조회만 흉내내는 커서 (시장 / cursor 다음 종목코드 / LIMIT / OFFSET)"""
+
+    def __init__(self, queries):
+        self.queries = queries
+        self.rows = []
+
+    def execute(self, query, params):
+        self.queries.append((query, list(params)))
+        params = list(params)
+        rows = STOCKS
+        if 's.market = %s' in query:
+            market = params.pop(0)
+            rows = [row for row in rows if row['market'] == market]
+        if 's.ticker > %s' in query:
+            after = params.pop(0)
+            rows = [row for row in rows if row['ticker'] > after]
+        rows = sorted(rows, key=lambda row: row['ticker'])
+        limit = params.pop(0)
+        offset = params.pop(0) if 'OFFSET' in query else 0
+        self.rows = rows[offset:offset + limit]
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, queries):
+        self.queries = queries
+
+    def cursor(self):
+        return StocksCursor(self.queries)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.queries = []
+
+    async def run(self, func, *args):
+        return func(FakeConnection(self.queries), *args)
+
+
+def get_stocks(db, limit, after=None, offset=0, market=None):
+    return asyncio.run(main.get_stocks(limit=limit, offset=offset, after=after, market=market, search=None,
+                                       include_total=False, db=db))
+
+
+def all_pages(limit, market=None):
+    db = FakeDatabase()
+    pages, after = [], None
+    while True:
+        page = get_stocks(db, limit, after=after, market=market)
+        pages.append([stock['ticker'] for stock in page['stocks']])
+        after = page['next_cursor']
+        if after is None:
+            return pages, db.queries
+
+
+def test_cursor_round_trip_visits_every_stock_once():
+    pages, queries = all_pages(3)
+
+    assert pages == [['000020', '000040', '000050'], ['000070', '000075', '000250'], ['000440']]
+    # 다음 페이지가 있는지 확인하려고 한 행 더 조회, 두 번째 페이지부터는 OFFSET 없이 종목코드로 이어서
+    assert queries[0][1] == [4]
+    assert queries[1][1] == ['000050', 4]
+    assert all('OFFSET' not in query for query, _ in queries)
+
+
+def test_last_full_page_has_no_next_cursor():
+    pages, _ = all_pages(len(STOCKS))
+    assert pages == [[stock['ticker'] for stock in STOCKS]]
+
+    pages, _ = all_pages(1)
+    assert len(pages) == len(STOCKS)
+    assert [page[0] for page in pages] == [stock['ticker'] for stock in STOCKS]
+
+
+def test_cursor_with_market_filter():
+    pages, _ = all_pages(1, market='KOSDAQ')
+    assert pages == [['000250'], ['000440']]
+
+
+def test_cursor_ignores_offset():
+    page = get_stocks(FakeDatabase(), 2, after='000050', offset=3)
+
+    assert [stock['ticker'] for stock in page['stocks']] == ['000070', '000075']
+    assert page['offset'] is None
+    assert page['next_cursor'] == '000075'